@@ -1,6 +1,12 @@
 """The main entry point for the Posting CLI."""
 
+import asyncio
+import glob
+import json
 from pathlib import Path
+import sys
+import time
+from typing import TYPE_CHECKING
 import click
 import os
 
@@ -9,7 +15,9 @@ from rich.console import Console
 
 from posting.app import Posting
 from posting.collection import Collection
-from posting.config import Settings
+from posting.collection_index import CollectionIndex
+from posting.config import SETTINGS, Settings
+from posting.exit_codes import GENERAL_ERROR
 from posting.locations import (
     config_file,
     default_collection_directory,
@@ -17,6 +25,9 @@ from posting.locations import (
 )
 from posting.variables import load_variables
 
+if TYPE_CHECKING:
+    from posting.bench import Schedule
+
 
 def create_config_file() -> None:
     f = config_file()
@@ -174,6 +185,335 @@ def import_spec(spec_path: str, output: str | None, type: str) -> None:
         console.print_exception()
 
 
+@cli.command()
+@click.argument("target")
+@click.option(
+    "--collection",
+    "-c",
+    type=click.Path(exists=True, file_okay=False),
+    help="Path to the collection directory, which scripts are resolved relative to. "
+    "Defaults to TARGET if it's a directory, or the directory containing the "
+    "matching requests.",
+)
+@click.option(
+    "--env",
+    "-e",
+    type=click.Path(exists=True),
+    help="Path to the .env environment file(s)",
+    multiple=True,
+)
+@click.option(
+    "--concurrency",
+    "-n",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The maximum number of requests to send at once.",
+)
+def run(
+    target: str,
+    collection: str | None,
+    env: tuple[str, ...],
+    concurrency: int,
+) -> None:
+    """Send requests without starting the TUI.
+
+    TARGET is a collection directory, a .posting.yaml file, or a glob matching
+    .posting.yaml files. A JSON object describing the outcome of each request
+    is written to stdout on its own line as soon as the request completes.
+    """
+    # We defer this import as it's only needed for this command.
+    from posting.runner import CollectionRunner, iter_requests
+
+    console = Console(stderr=True)
+    target_path = Path(target)
+    if target_path.is_dir():
+        collection_path = Path(collection) if collection else target_path
+        matches = None
+        recursive = True
+    else:
+        collection_path = Path(collection) if collection else glob_root(target)
+        matches = {Path(match).resolve() for match in glob.glob(target, recursive=True)}
+        # A bare filename pattern only matches files directly inside the
+        # directory, so there's no need to read the whole tree beneath it
+        # (which could be the user's home directory).
+        recursive = collection is not None or not is_bare_pattern(target)
+
+    collection_path = collection_path.resolve()
+    collection_tree = Collection.from_directory(
+        str(collection_path), recursive=recursive
+    )
+    requests = [
+        request
+        for request in iter_requests(collection_tree)
+        if matches is None or (request.path and request.path.resolve() in matches)
+    ]
+    if not requests:
+        console.print(f"No requests found matching {target!r}.", style="red")
+        sys.exit(GENERAL_ERROR)
+
+    _, settings = load_environment(env)
+    SETTINGS.set(settings)
+
+    runner = CollectionRunner(collection_path, concurrency=concurrency)
+    start = time.perf_counter()
+    results = asyncio.run(runner.run(requests))
+    elapsed = time.perf_counter() - start
+
+    failed = sum(not result.ok for result in results)
+    console.print(
+        f"Ran {len(results)} request{'s' if len(results) != 1 else ''} "
+        f"in {elapsed:.2f}s ({failed} failed).",
+        style="red" if failed else "green",
+    )
+    if failed:
+        sys.exit(GENERAL_ERROR)
+
+
+@cli.command()
+@click.argument("request_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--collection",
+    "-c",
+    type=click.Path(exists=True, file_okay=False),
+    help="Path to the collection directory, which scripts are resolved relative to. "
+    "Defaults to the directory containing the request.",
+)
+@click.option(
+    "--env",
+    "-e",
+    type=click.Path(exists=True),
+    help="Path to the .env environment file(s)",
+    multiple=True,
+)
+@click.option(
+    "--concurrency",
+    "-n",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="The number of concurrent workers, or the maximum number of requests "
+    "in flight when --rate is used.",
+)
+@click.option(
+    "--rate",
+    "-r",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Send requests at a given rate (requests per second), regardless of "
+    "how long earlier requests take to complete, rather than as fast as the "
+    "workers allow.",
+)
+@click.option(
+    "--schedule",
+    type=click.Choice(["constant", "poisson", "ramp"]),
+    default="constant",
+    show_default=True,
+    help="How requests are spaced when --rate is used. A ramp increases the rate "
+    "linearly from --ramp-from to --rate over the duration of the benchmark.",
+)
+@click.option(
+    "--ramp-from",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    show_default=True,
+    help="The starting rate of a ramp, in requests per second.",
+)
+@click.option(
+    "--duration",
+    "-d",
+    type=click.FloatRange(min=0, min_open=True),
+    help="How long to run the benchmark for, in seconds. [default: 10]",
+)
+@click.option(
+    "--requests",
+    "total_requests",
+    type=click.IntRange(min=1),
+    help="The number of requests to send.",
+)
+@click.option(
+    "--processes",
+    "-p",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="The number of worker processes to spread the requests across. "
+    "Use 0 for one per CPU core.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Output the results as JSON.")
+def bench(
+    request_file: str,
+    collection: str | None,
+    env: tuple[str, ...],
+    concurrency: int,
+    rate: float | None,
+    schedule: "Schedule",
+    ramp_from: float,
+    duration: float | None,
+    total_requests: int | None,
+    processes: int,
+    as_json: bool,
+) -> None:
+    """Benchmark a saved request.
+
+    The request is sent repeatedly, with templating and scripts applied
+    to every request, and the latency, throughput and errors are reported.
+    The benchmark ends after --duration seconds or --requests requests,
+    whichever comes first.
+    """
+    # We defer these imports as they're only needed for this command.
+    from posting.bench import Benchmark, MultiProcessBenchmark, format_report
+    from posting.collection import load_request_from_yaml
+    from posting.runner import CollectionRunner
+
+    console = Console(stderr=True)
+    request_path = Path(request_file).resolve()
+    collection_path = Path(collection).resolve() if collection else request_path.parent
+    request_model = load_request_from_yaml(str(request_path))
+
+    _, settings = load_environment(env)
+    SETTINGS.set(settings)
+
+    if duration is None and total_requests is None:
+        duration = 10.0
+
+    if schedule == "ramp" and (rate is None or duration is None):
+        raise click.UsageError("--schedule ramp requires --rate and --duration.")
+
+    options = dict(
+        concurrency=concurrency,
+        rate=rate,
+        duration=duration,
+        total_requests=total_requests,
+        schedule=schedule,
+        ramp_from=ramp_from,
+    )
+    processes = processes or os.cpu_count() or 1
+    console.print(f"Benchmarking {request_model.name or request_path.name!r}…")
+    if processes == 1:
+        benchmark = Benchmark(
+            CollectionRunner(collection_path), request_model, **options
+        )
+        stats = asyncio.run(benchmark.run())
+    else:
+        stats = MultiProcessBenchmark(
+            collection_path, request_model, processes=processes, **options
+        ).run()
+
+    if as_json:
+        print(json.dumps(stats.to_dict()))
+    else:
+        Console().print(format_report(stats))
+
+
+@cli.command(name="bench-load", hidden=True)
+@click.argument(
+    "collection_path", type=click.Path(exists=True, file_okay=False), default="."
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    help="The maximum number of processes to read files with. "
+    "Defaults to the number of CPU cores.",
+)
+@click.option(
+    "--repeat", "-r", type=click.IntRange(min=1), default=3, show_default=True
+)
+@click.option(
+    "--index/--no-index",
+    default=False,
+    help="Use the on-disk collection index, as Posting does at startup.",
+)
+@click.option(
+    "--lazy/--eager",
+    default=False,
+    help="Load request summaries, as Posting does at startup, rather than "
+    "full requests.",
+)
+def bench_load(
+    collection_path: str, workers: int | None, repeat: int, index: bool, lazy: bool
+) -> None:
+    """Measure how quickly a collection is loaded at startup."""
+
+    def count_requests(collection: Collection) -> int:
+        return len(collection.requests) + sum(
+            count_requests(child) for child in collection.children
+        )
+
+    console = Console()
+    path = Path(collection_path).resolve()
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        collection_index = CollectionIndex.for_collection(path) if index else None
+        collection_tree = Collection.from_directory(
+            str(path), max_workers=workers, index=collection_index, lazy=lazy
+        )
+        elapsed = time.perf_counter() - start
+        files = count_requests(collection_tree)
+        rate = files / elapsed if elapsed else 0.0
+        best = max(best, rate)
+        cached = (
+            f", {collection_index.hits:,} from the index" if collection_index else ""
+        )
+        console.print(
+            f"Loaded {files:,} requests in {elapsed:.3f}s "
+            f"({rate:,.0f} files/s{cached})"
+        )
+    console.print(f"Best: {best:,.0f} files/s")
+
+
+@cli.command(name="bench-watch", hidden=True)
+@click.argument(
+    "collection_path", type=click.Path(exists=True, file_okay=False), default="."
+)
+@click.option(
+    "--seconds", "-s", type=click.FloatRange(min=0.1), default=10, show_default=True
+)
+def bench_watch(collection_path: str, seconds: float) -> None:
+    """Measure the cost of watching a collection for changes while idle."""
+    from posting.file_watcher import FileWatcher
+
+    settings = Settings()
+    path = Path(collection_path).resolve()
+    watcher = FileWatcher(
+        debounce=settings.watch_debounce, ignore=settings.watch_ignore
+    )
+    watcher.subscribe([path], lambda changes: None, recursive=True)
+
+    async def watch() -> None:
+        try:
+            await asyncio.wait_for(watcher.run(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    start = time.process_time()
+    asyncio.run(watch())
+    cpu_time = time.process_time() - start
+    metrics = watcher.metrics
+    Console().print(
+        f"Watched {metrics.watched_paths:,} paths for {seconds:g}s, using "
+        f"{cpu_time * 1000:.1f}ms of CPU time ({cpu_time / seconds:.3%}). "
+        f"{metrics.events:,} changes dispatched, {metrics.ignored_events:,} ignored."
+    )
+
+
+def glob_root(pattern: str) -> Path:
+    """Return the deepest directory which contains every path matching the pattern."""
+    root = Path()
+    parts = Path(pattern).parts
+    for part in parts[:-1]:
+        if any(character in part for character in "*?["):
+            break
+        root /= part
+    return root
+
+
+def is_bare_pattern(pattern: str) -> bool:
+    """Return True if the pattern only matches files in the current directory."""
+    return "**" not in pattern and len(Path(pattern).parts) == 1
+
+
 @cli.command(name="sponsors")
 def sponsors() -> None:
     """Show the list of sponsors."""
@@ -197,8 +537,28 @@ def make_posting(
     using_default_collection: bool = False,
 ) -> Posting:
     """Return a Posting instance with the given collection and environment."""
-    collection_tree = Collection.from_directory(str(collection.resolve()))
+    collection_index = CollectionIndex.for_collection(collection)
+    # The app saves the index in a thread once it's running.
+    collection_index.autosave = False
+    collection_tree = Collection.from_directory(
+        str(collection.resolve()), index=collection_index, lazy=True
+    )
+    env_paths, settings = load_environment(env)
+    return Posting(
+        settings,
+        env_paths,
+        collection_tree,
+        not using_default_collection,
+        collection_index=collection_index,
+    )
+
 
+def load_environment(env: tuple[str, ...] = ()) -> tuple[tuple[Path, ...], Settings]:
+    """Load the settings and variables from the given environment files.
+
+    Returns:
+        The resolved paths of the environment files, and the settings.
+    """
     # if env empty then load current directory posting.env file if it exists
     if not env and os.path.exists("posting.env"):
         env = ("posting.env",)
@@ -206,8 +566,7 @@ def make_posting(
     env_paths = tuple(Path(e).resolve() for e in env)
     settings = Settings(_env_file=env_paths)  # type: ignore[call-arg]
     load_variables(env_paths, settings.use_host_environment, avoid_cache=True)
-
-    return Posting(settings, env_paths, collection_tree, not using_default_collection)
+    return env_paths, settings
 
 
 if __name__ == "__main__":
@@ -1,8 +1,10 @@
-import inspect
+import asyncio
+import codecs
 from contextlib import redirect_stdout, redirect_stderr
 import os
 from pathlib import Path
 import sys
+import time
 from typing import Any, Literal, Sequence, cast
 
 import httpx
@@ -15,7 +17,6 @@ from textual import messages, on, log, work
 from textual.command import (
     CommandListItem,
     CommandPalette,
-    SimpleCommand,
     SimpleProvider,
 )
 from textual.css.query import NoMatches
@@ -25,6 +26,7 @@ from textual.app import App, ComposeResult, InvalidThemeError
 from textual.binding import Binding
 from textual.containers import Horizontal, Vertical
 from textual.screen import Screen
+from textual.timer import Timer
 from textual.coordinate import Coordinate
 from textual.markup import escape
 from textual.signal import Signal
@@ -33,41 +35,68 @@ from textual.widget import AwaitMount, Widget
 from textual.widgets.input import Selection
 from textual.widgets import Button, Footer, Input, Label, Tab, Tabs
 from textual.widgets.tabbed_content import ContentTab
+from textual.worker import Worker
 from posting.collection import (
     Collection,
     Cookie,
-    Header,
     HttpRequestMethod,
     Options,
     RequestModel,
+    RequestSummary,
+    read_request_files,
 )
+from posting.collection_index import CollectionIndex
 
-from posting.commands import PostingProvider
+from posting.commands import (
+    EnvironmentProvider,
+    PostingProvider,
+    RequestSearchProvider,
+)
 from posting.config import SETTINGS, Settings
+from posting.file_watcher import FileChange, FileWatcher
+from posting.http_client import (
+    ClientPool,
+    get_ssl_context,
+    send_request,
+    set_default_user_agent,
+)
 from posting.jump_overlay import JumpOverlay
 from posting.jumper import Jumper
-from posting.scripts import execute_script, uncache_module, Posting as PostingContext
+from posting.response_buffer import buffered_response, read_response
+from posting.scripts import (
+    call_script_function,
+    execute_script,
+    parse_script_path,
+    uncache_module,
+    Posting as PostingContext,
+)
 from posting.themes import (
     BUILTIN_THEMES,
     load_user_theme,
     load_user_themes,
 )
-from posting.types import CertTypes, PostingLayout
+from posting.types import PostingLayout
 from posting.user_host import get_user_host_string
 from posting.variables import (
     SubstitutionError,
     get_variables,
-    load_variables,
-    update_variables,
+    EnvironmentProfiles,
+    reload_environment_files,
+    use_environment_layer,
 )
 from posting.version import VERSION
 from posting.widgets.collection.browser import (
+    REQUEST_NODE_TYPES,
     CollectionBrowser,
     CollectionTree,
 )
 from posting.widgets.datatable import PostingDataTable
 from posting.widgets.request.header_editor import HeadersTable
-from posting.messages import HttpResponseReceived
+from posting.messages import (
+    HttpResponseReceived,
+    HttpResponseStreamChunk,
+    HttpResponseStreamStarted,
+)
 from posting.widgets.request.method_selection import MethodSelector
 
 from posting.widgets.request.query_editor import ParamsTable
@@ -90,6 +119,13 @@ from posting.widgets.rich_log import RichLogIO
 from posting.xresources import load_xresources_themes
 
 
+COLLECTION_RELOAD_DELAY = 0.25
+"""Seconds to wait for request files to stop changing before reloading them."""
+
+SEARCH_INDEX_CHUNK_SIZE = 200
+"""The number of requests to index between yields to the event loop."""
+
+
 class AppHeader(Horizontal):
     """The header of the app."""
 
@@ -177,7 +213,7 @@ class MainScreen(Screen[None]):
             "open_request_search_palette",
             "Search requests",
             show=True,
-            tooltip="Search for a request by name.",
+            tooltip="Search for a request by name, URL, headers or body.",
             id="search-requests",
         ),
     ]
@@ -207,6 +243,8 @@ class MainScreen(Screen[None]):
         self.settings = SETTINGS.get()
         self.jumper: Jumper | None = None
         self.posting = cast("Posting", self.app)
+        self.search_index_worker: Worker[None] | None = None
+        """The worker adding every request in the collection to the search index."""
 
     def on_mount(self) -> None:
         self.current_layout = self._initial_layout
@@ -229,6 +267,53 @@ class MainScreen(Screen[None]):
         if target is not None:
             self.set_focus(target)
 
+        # Index the collection for request search in the background. This is
+        # started now rather than after a refresh, which is deferred for as
+        # long as the screen is busy.
+        self.search_index_worker = self.build_search_index()
+
+    @work(group="search-index")
+    async def build_search_index(self) -> None:
+        """Add every request in the collection to the search index.
+
+        Requests are read a chunk at a time in a thread, and added to the
+        index on the event loop, so that the app stays responsive while
+        it's built. The collection index is saved once at the end."""
+        posting = self.posting
+        collection_tree = self.collection_tree
+        collection_index = posting.collection_index
+        search_index = collection_tree.search_index
+        file_paths = [
+            str(request.path)
+            for request in collection_tree.iter_requests()
+            if request.path is not None
+        ]
+        for start in range(0, len(file_paths), SEARCH_INDEX_CHUNK_SIZE):
+            chunk = file_paths[start : start + SEARCH_INDEX_CHUNK_SIZE]
+            if collection_index is not None:
+                async with posting.collection_index_lock:
+                    results = await asyncio.to_thread(
+                        collection_index.read_request_files,
+                        chunk,
+                        max_workers=1,
+                        prune=False,
+                    )
+            else:
+                results = await asyncio.to_thread(
+                    read_request_files, chunk, max_workers=1
+                )
+            for path_string, (data, error) in zip(chunk, results):
+                path = Path(path_string)
+                # Requests which were saved while the index was being built
+                # have already been indexed, with newer data.
+                if (
+                    error is None
+                    and isinstance(data, dict)
+                    and path not in search_index
+                ):
+                    search_index.add(path, data)
+        await posting.save_collection_index()
+
     def on_screen_resume(self) -> None:
         self.jumper = Jumper(
             {
@@ -284,13 +369,9 @@ class MainScreen(Screen[None]):
             write_logs_to_ui: Whether to write logs to the UI.
             *args: Arguments to pass to the script function.
         """
-        path_name_parts = path_to_script.split(":")
-        if len(path_name_parts) == 2:
-            script_path = Path(path_name_parts[0])
-            function_name = path_name_parts[1]
-        else:
-            script_path = Path(path_to_script)
-            function_name = default_function_name
+        script_path, function_name = parse_script_path(
+            path_to_script, default_function_name
+        )
 
         try:
             script_function = execute_script(
@@ -323,12 +404,7 @@ class MainScreen(Screen[None]):
                 with redirect_stdout(stdout_log), redirect_stderr(stderr_log):
                     # Ensure we pass in the number of parameters the user has
                     # implicitly requested in their script.
-                    signature = inspect.signature(script_function)
-                    num_params = len(signature.parameters)
-                    if num_params > 0:
-                        script_function(*args[:num_params])
-                    else:
-                        script_function()
+                    call_script_function(script_function, *args)
 
                 # Ensure any remaining content is flushed
                 stdout_log.flush()
@@ -367,19 +443,9 @@ class MainScreen(Screen[None]):
 
         request_options = self.request_options.to_model()
 
-        cert_config = SETTINGS.get().ssl
-        httpx_cert_config: list[str] = []
-        if certificate_path := cert_config.certificate_path:
-            httpx_cert_config.append(certificate_path)
-        if key_file := cert_config.key_file:
-            httpx_cert_config.append(key_file)
-        if password := cert_config.password:
-            httpx_cert_config.append(password.get_secret_value())
-
         app = cast("Posting", self.app)
         script_context = PostingContext(app)
 
-        cert = cast(CertTypes, tuple(httpx_cert_config))
         try:
             # Run setup scripts first
             request_model = self.build_request_model(request_options)
@@ -406,75 +472,69 @@ class MainScreen(Screen[None]):
                 log.error(e)
                 raise
 
-            verify_ssl = request_model.options.verify_ssl
-            verify: str | bool = verify_ssl
-            if verify_ssl and cert_config.ca_bundle is not None:
-                # If verification is enabled and a CA bundle is supplied,
-                # use the CA bundle.
-                verify = cert_config.ca_bundle
-
-            timeout = request_model.options.timeout
-            async with httpx.AsyncClient(
-                verify=verify,
-                cert=cert,
+            # If verification is enabled and a CA bundle is supplied, the
+            # SSL context will use the CA bundle.
+            ssl_context = get_ssl_context(
+                request_model.options.verify_ssl, SETTINGS.get().ssl
+            )
+            client = app.client_pool.get_client(
+                verify=ssl_context,
                 proxy=request_model.options.proxy_url or None,
-                timeout=timeout,
-                auth=request_model.auth.to_httpx_auth() if request_model.auth else None,
-            ) as client:
-                script_context.request = request_model
+                timeout=request_model.options.timeout,
+                http2=request_model.options.http2,
+            )
+            script_context.request = request_model
 
-                # If there's an associated pre-request script, run it.
-                if on_request := request_model.scripts.on_request:
-                    try:
-                        self.get_and_run_script(
-                            on_request,
-                            "on_request",
-                            True,
-                            # The args below are passed to the script function.
-                            request_model,
-                            script_context,
-                        )
-                    except Exception:
-                        self.response_script_output.set_request_status("error")
-                        # TODO - load the error into the response area, or log it.
-                    else:
-                        self.response_script_output.set_request_status("success")
-                else:
-                    self.response_script_output.set_request_status("no-script")
-                request = self.build_httpx_request(request_model, client)
-
-                # Prioritise user-defined `User-Agent` header over Posting's default.
-                if "User-Agent" not in request.headers or request.headers.get(
-                    "user-agent", ""
-                ).startswith("python-httpx"):
-                    request.headers["User-Agent"] = (
-                        f"Posting/{VERSION} (Terminal-based API client)"
+            # If there's an associated pre-request script, run it.
+            if on_request := request_model.scripts.on_request:
+                try:
+                    self.get_and_run_script(
+                        on_request,
+                        "on_request",
+                        True,
+                        # The args below are passed to the script function.
+                        request_model,
+                        script_context,
                     )
-                response = await client.send(
-                    request=request,
-                    follow_redirects=request_options.follow_redirects,
-                )
+                except Exception:
+                    self.response_script_output.set_request_status("error")
+                    # TODO - load the error into the response area, or log it.
+                else:
+                    self.response_script_output.set_request_status("success")
+            else:
+                self.response_script_output.set_request_status("no-script")
+            request = self.build_httpx_request(request_model, client)
+            set_default_user_agent(request)
+            response = await send_request(
+                client,
+                request,
+                auth=request_model.auth.to_httpx_auth() if request_model.auth else None,
+                follow_redirects=request_options.follow_redirects,
+            )
+            self.url_bar.set_http_version(response.http_version)
+            await self.read_response_body(response, live=request_options.stream)
 
-                self.post_message(HttpResponseReceived(response))
+            self.post_message(HttpResponseReceived(response))
 
-                script_context.response = response
-                if on_response := request_model.scripts.on_response:
-                    try:
-                        self.get_and_run_script(
-                            on_response,
-                            "on_response",
-                            True,
-                            # The args below are passed to the script function.
-                            response,
-                            script_context,
-                        )
-                    except Exception:
-                        self.response_script_output.set_response_status("error")
-                        # TODO - load the error into the response area, or log it.
-                    else:
-                        self.response_script_output.set_response_status("success")
+            if on_response := request_model.scripts.on_response:
+                script_response = buffered_response(response)
+                script_context.response = script_response
+                try:
+                    self.get_and_run_script(
+                        on_response,
+                        "on_response",
+                        True,
+                        # The args below are passed to the script function.
+                        script_response,
+                        script_context,
+                    )
+                except Exception:
+                    self.response_script_output.set_response_status("error")
+                    # TODO - load the error into the response area, or log it.
                 else:
-                    self.response_script_output.set_response_status("no-script")
+                    self.response_script_output.set_response_status("success")
+            else:
+                self.response_script_output.set_response_status("no-script")
 
         except httpx.ConnectTimeout as connect_timeout:
             log.error("Connect timeout", connect_timeout)
@@ -509,6 +569,39 @@ class MainScreen(Screen[None]):
         else:
             self.url_input.remove_class("error")
 
+    async def read_response_body(self, response: httpx.Response, live: bool) -> None:
+        """Read the body of a streamed response.
+
+        Once this returns, the body is available via `response_body` and
+        `response_text` (see `posting.response_buffer`).
+
+        Args:
+            response: The response, sent with `stream=True`.
+            live: Post each chunk of text as it arrives, so that it can be
+                displayed immediately.
+        """
+        spill_threshold = SETTINGS.get().response.spill_to_disk_threshold
+        if not live:
+            await read_response(response, spill_threshold)
+            return
+
+        self.post_message(HttpResponseStreamStarted(response))
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+            errors="replace"
+        )
+        start = time.perf_counter()
+
+        def on_chunk(chunk: bytes, bytes_received: int) -> None:
+            self.post_message(
+                HttpResponseStreamChunk(
+                    text=decoder.decode(chunk),
+                    bytes_received=bytes_received,
+                    elapsed=time.perf_counter() - start,
+                )
+            )
+
+        await read_response(response, spill_threshold, on_chunk)
+
     @work(exclusive=True)
     async def send_via_worker(self) -> None:
         await self.send_request()
@@ -527,20 +620,36 @@ class MainScreen(Screen[None]):
     def on_response_received(self, event: HttpResponseReceived) -> None:
         """Update the response area with the response."""
 
+        self.response_area.response = event.response
+
         # If the config to automatically move the focus on receipt
         # of a response has been set, move focus as required.
         focus_on_response = self.settings.focus.on_response
         if focus_on_response == "body":
-            self.response_area.text_editor.text_area.focus()
+            self.response_area.body_widget.focus()
         elif focus_on_response == "tabs":
             self.response_area.content_tabs.focus()
 
-        self.response_area.response = event.response
         self.url_bar.response_status_code = event.response.status_code
         self.url_bar.response_reason_phrase = event.response.reason_phrase
         self.cookies.update(event.response.cookies)
         self.response_trace.trace_complete()
 
+    @on(HttpResponseStreamStarted)
+    def on_response_stream_started(self, event: HttpResponseStreamStarted) -> None:
+        """Display the status and headers of a streamed response before the
+        body has been received."""
+        self.response_area.start_stream(event.response)
+        self.url_bar.response_status_code = event.response.status_code
+        self.url_bar.response_reason_phrase = event.response.reason_phrase
+
+    @on(HttpResponseStreamChunk)
+    def on_response_stream_chunk(self, event: HttpResponseStreamChunk) -> None:
+        """Append a chunk of a streamed response body to the response area."""
+        self.response_area.append_stream_chunk(
+            event.text, event.bytes_received, event.elapsed
+        )
+
     @on(CollectionTree.RequestSelected)
     def on_request_selected(self, event: CollectionTree.RequestSelected) -> None:
         """Load a request model into the UI when a request is selected."""
@@ -562,7 +671,7 @@ class MainScreen(Screen[None]):
         self, event: CollectionTree.RequestCacheUpdated
     ) -> None:
         """Update the autocomplete suggestions when the request cache is updated."""
-        self.url_bar.cached_base_urls = sorted(event.cached_base_urls)
+        self.url_bar.cached_base_urls = event.cached_base_urls
 
     @on(UrlInput.PathParamJumpRequestedFromUrlInput)
     def on_url_param_jump(
@@ -913,21 +1022,7 @@ class MainScreen(Screen[None]):
         assert not isinstance(open_request, Collection)
 
         request_editor_args = self.request_editor.to_request_model_args()
-        headers = self.headers_table.to_model()
-        if request_body := request_editor_args.get("body"):
-            header_names_lower = {header.name.lower(): header for header in headers}
-            # Don't add the content type header if the user has explicitly set it.
-            if (
-                request_body.content_type is not None
-                and "content-type" not in header_names_lower
-            ):
-                headers.append(
-                    Header(
-                        name="content-type",
-                        value=request_body.content_type,
-                    )
-                )
-        return RequestModel(
+        request_model = RequestModel(
             name=self.request_metadata.request_name,
             path=open_request.path if open_request else None,
             description=self.request_metadata.description,
@@ -935,7 +1030,7 @@ class MainScreen(Screen[None]):
             url=self.url_input.value.strip(),
             params=self.params_table.to_model(),
             path_params=self.path_params_table.to_model(),
-            headers=headers,
+            headers=self.headers_table.to_model(),
             options=request_options,
             auth=self.request_auth.to_model(),
             cookies=(
@@ -946,6 +1041,8 @@ class MainScreen(Screen[None]):
             scripts=self.request_scripts.to_model(),
             **request_editor_args,
         )
+        request_model.add_content_type_header()
+        return request_model
 
     def on_curl_message(self, event: CurlMessage):
         try:
@@ -968,33 +1065,29 @@ class MainScreen(Screen[None]):
 
     def action_open_request_search_palette(self) -> None:
         """Open the request search palette."""
-        collection_tree_nodes = list(self.collection_tree.walk_nodes())
+        self.app.push_screen(
+            CommandPalette(
+                providers=[RequestSearchProvider],
+                placeholder="Search for a request…",
+                id="request-search-palette",
+            )
+        )
+
+    def open_request(self, path: Path) -> None:
+        """Open a request in the collection, and select it in the tree.
 
-        def load_and_select_request(request: RequestModel) -> None:
+        Args:
+            path: The path of the request file.
+        """
+        collection_tree = self.collection_tree
+        # The request may be in a collection which hasn't been expanded yet.
+        node = collection_tree.reveal_request(path)
+        if node is None or not isinstance(node.data, REQUEST_NODE_TYPES):
+            return
+        request = collection_tree.load_request(node.data)
+        if request is not None:
             self.load_request_model(request)
-            for node in collection_tree_nodes:
-                if node.data == request:
-                    self.collection_tree.select_node(node)
-                    break
-
-        collection_path = self.collection.path
-        self.app.search_commands(
-            [
-                SimpleCommand(
-                    name=node.data.name if node.data.path else node.data.name,
-                    callback=lambda request=node.data: load_and_select_request(request),
-                    help_text=(
-                        str(node.data.path.relative_to(collection_path))
-                        if node.data.path
-                        else ""
-                    ),
-                )
-                for node in collection_tree_nodes
-                if isinstance(node.data, RequestModel)
-            ],
-            placeholder="Search for a request…",
-            palette_id="request-search-palette",
-        )
+            collection_tree.select_node(node)
 
     def load_request_model(
         self, request_model: RequestModel, overwrite_metadata: bool = True
@@ -1231,6 +1324,14 @@ class Posting(App[None], inherit_bindings=False):
             tooltip="Open the help dialog for the currently focused widget.",
             id="help",
         ),
+        Binding(
+            "ctrl+g",
+            "switch_environment",
+            "Environment",
+            tooltip="Switch to one of the named environments from the config.",
+            show=False,
+            id="switch-environment",
+        ),
         Binding("f8", "save_screenshot", "Save screenshot.", show=False),
     ]
 
@@ -1242,6 +1343,7 @@ class Posting(App[None], inherit_bindings=False):
         environment_files: tuple[Path, ...],
         collection: Collection,
         collection_specified: bool = False,
+        collection_index: CollectionIndex | None = None,
     ) -> None:
         SETTINGS.set(settings)
 
@@ -1252,6 +1354,18 @@ class Posting(App[None], inherit_bindings=False):
         self.environment_files = environment_files
         """A list of paths to dotenv files, in the order they're loaded."""
 
+        self.environment_profiles = EnvironmentProfiles()
+        """The named environments from the config, read ahead of time."""
+        for name, environment in settings.environments.items():
+            self.environment_profiles.add(
+                name,
+                (path.expanduser().resolve() for path in environment.files),
+                environment.variables,
+            )
+
+        self.active_environment: str | None = None
+        """The name of the named environment in use, if any."""
+
         self.collection = collection
         """The loaded collection."""
 
@@ -1260,16 +1374,40 @@ class Posting(App[None], inherit_bindings=False):
         supplying a collection directory, or if they let Posting auto-discover
         it in some way (likely just using the default collection)."""
 
-        self.env_changed_signal = Signal[None](self, "env-changed")
+        self.collection_index = collection_index
+        """The on-disk index the collection was loaded from, if any. Entries are
+        invalidated when the watcher sees request files change."""
+
+        self.file_watcher = FileWatcher(
+            debounce=settings.watch_debounce, ignore=settings.watch_ignore
+        )
+        """Watches the environment files, collection and themes for changes."""
+
+        self._changed_request_files: set[str] = set()
+        """Request files which have changed on disk since the tree was last
+        updated from them."""
+
+        self._request_reload_timer: Timer | None = None
+        self._request_reload_lock = asyncio.Lock()
+
+        self.collection_index_lock = asyncio.Lock()
+        """Held while the collection index is read or written in a thread."""
+
+        self.env_changed_signal = Signal[frozenset[str]](self, "env-changed")
         """Signal that is published when the environment has changed.
         This means one or more of the loaded environment files (in
-        `self.environment_files`) have been modified."""
+        `self.environment_files`) have been modified. It's published with
+        the names of the variables whose values changed."""
 
         self.session_env: dict[str, object] = {}
         """Users can set the value of variables for the duration of the
         session (until the app is quit). This can be done via the scripting
         interface: pre-request or post-response scripts."""
 
+        self.client_pool = ClientPool(settings.http)
+        """HTTP clients which live for the duration of the session, allowing
+        connections to be reused between requests."""
+
         super().__init__()
 
         # The animation is set AFTER the app is initialized intentionally,
@@ -1282,6 +1420,50 @@ class Posting(App[None], inherit_bindings=False):
         """The initial spacing of the app is taken from settings, but is a reactive
         which can be toggled via the command palette."""
 
+        # Use the default named environment, unless env files were supplied.
+        default_environment = settings.default_environment
+        if default_environment is not None and not environment_files:
+            if default_environment in self.environment_profiles:
+                self.switch_environment(default_environment, notify=False)
+            else:
+                log.warning(f"Unknown default environment {default_environment!r}")
+
+    def switch_environment(self, name: str, notify: bool = True) -> None:
+        """Use the variables from a named environment.
+
+        The environment's files were read when Posting started, so this
+        doesn't read from disk.
+
+        Args:
+            name: The name of the environment, as it appears in the config.
+            notify: Whether to show a notification.
+        """
+        profiles = self.environment_profiles
+        self.environment_files = profiles.files(name)
+        self.active_environment = name
+        changed = use_environment_layer(profiles.layer(name))
+        if changed:
+            self.env_changed_signal.publish(frozenset(changed))
+        if notify:
+            self.notify(f"Switched to the {name!r} environment", timeout=2)
+
+    def action_switch_environment(self) -> None:
+        """Open a palette to choose a named environment."""
+        if not self.environment_profiles:
+            self.notify(
+                "Add named environments to the `environments` section of the config.",
+                title="No environments",
+                severity="warning",
+            )
+            return
+        self.push_screen(
+            CommandPalette(
+                providers=[EnvironmentProvider],
+                placeholder="Switch to an environment…",
+                id="environment-palette",
+            )
+        )
+
     def on_ready(self) -> None:
         import time
         from posting._start_time import START_TIME
@@ -1299,93 +1481,180 @@ class Posting(App[None], inherit_bindings=False):
         else:
             footer.compact = is_compact
 
-    @work(exclusive=True, group="environment-watcher")
-    async def watch_environment_files(self) -> None:
-        """Watching files that were passed in as the environment."""
-
-        from watchfiles import awatch
+    @work(exclusive=True, group="file-watcher")
+    async def watch_files(self) -> None:
+        """Watch the environment files, collection and themes, depending on
+        which are enabled in the settings, with a single watcher."""
+        settings = self.settings
+        watcher = self.file_watcher
+        environment_files = {
+            *self.environment_files,
+            *self.environment_profiles.all_files(),
+        }
+        if settings.watch_env_files and environment_files:
+            watcher.subscribe(environment_files, self._environment_files_changed)
+
+        if settings.watch_collection_files:
+            watcher.subscribe(
+                [self.collection.path],
+                self._collection_files_changed,
+                recursive=True,
+            )
 
-        async for changes in awatch(*self.environment_files):
-            # Reload the variables from the environment files.
-            load_variables(
-                self.environment_files,
-                self.settings.use_host_environment,
-                avoid_cache=True,
+        if settings.watch_themes:
+            theme_paths = {settings.theme_directory}
+            if settings.theme_directory.exists():
+                for p in settings.theme_directory.iterdir():
+                    if p.is_symlink():
+                        theme_paths.add(p.resolve().parent)
+            watcher.subscribe(theme_paths, self._theme_files_changed)
+
+        await watcher.run()
+
+    def _environment_files_changed(self, changes: list[FileChange]) -> None:
+        # Parse the changed environment files again. The host environment
+        # and session variables are in their own layers, so are untouched.
+        # The named environments are read again first, which also discards
+        # the cached contents of the changed files.
+        self.environment_profiles.reload(change.path for change in changes)
+        if self.active_environment is not None:
+            changed = use_environment_layer(
+                self.environment_profiles.layer(self.active_environment)
             )
-            # Overlay the session variables on top of the environment variables.
-            update_variables(self.session_env)
-
-            # Notify the app that the environment has changed,
-            # which will trigger a reload of the variables in the relevant widgets.
-            # Widgets subscribed to this signal can reload as needed.
-            # For example, AutoComplete dropdowns will want to reload their
-            # candidate variables when the environment changes.
-            self.env_changed_signal.publish(None)
-            self.notify(
-                title="Environment changed",
-                message=f"Reloaded {len(changes)} dotenv files",
-                timeout=3,
+        else:
+            changed = reload_environment_files(
+                self.environment_files, [change.path for change in changes]
             )
 
-    @work(exclusive=True, group="collection-watcher")
-    async def watch_collection_files(self) -> None:
-        """Watching specific files within the collection directory."""
-
-        from watchfiles import awatch, Change
-
-        async for changes in awatch(self.collection.path):
-            for change_type, file_path in changes:
-                if file_path.endswith(".py"):
-                    if change_type in (
-                        Change.deleted,
-                        Change.modified,
-                    ):
-                        # If a Python file was updated, then we want to clear
-                        # the script module cache for the app so that modules
-                        # are reloaded on the next request being sent.
-                        # Without this, we'd hit the module cache and simply
-                        # re-execute the previously cached module.
-                        uncache_module(file_path)
-                        file_path_object = Path(file_path)
-                        file_name = file_path_object.name
-                        self.notify(
-                            f"Reloaded {file_name!r}",
-                            title="Script reloaded",
-                            timeout=2,
-                        )
-                    if change_type in (Change.added, Change.deleted):
-                        # TODO - update the autocompletion
-                        # of the available scripts.
-                        pass
-
-    @work(exclusive=True, group="theme-watcher")
-    async def watch_themes(self) -> None:
-        """Watching the theme directory for changes."""
+        # Nothing to refresh or report if no variable's value changed (e.g.
+        # a comment was edited, or the file was saved without changes).
+        if not changed:
+            return
 
-        from watchfiles import awatch
+        # Notify the app of the variables which changed, so the relevant
+        # widgets can refresh. Widgets subscribed to this signal can check
+        # whether they use any of the changed variables.
+        self.env_changed_signal.publish(frozenset(changed))
+        self.notify(
+            title="Environment changed",
+            message=f"Reloaded {len(changes)} dotenv files",
+            timeout=3,
+        )
 
-        paths_to_watch = {self.settings.theme_directory}
-        
-        if self.settings.theme_directory.exists():
-            for p in self.settings.theme_directory.iterdir():
-                if p.is_symlink():
-                    paths_to_watch.add(p.resolve().parent)
+    def _collection_files_changed(self, changes: list[FileChange]) -> None:
+        for change_type, file_path in changes:
+            if file_path.name.endswith(".posting.yaml"):
+                self._changed_request_files.add(str(file_path))
+            if file_path.suffix == ".py":
+                if change_type in ("deleted", "modified"):
+                    # If a Python file was updated, then we want to clear
+                    # the script module cache for the app so that modules
+                    # are reloaded on the next request being sent.
+                    # Without this, we'd hit the module cache and simply
+                    # re-execute the previously cached module.
+                    uncache_module(str(file_path))
+                    self.notify(
+                        f"Reloaded {file_path.name!r}",
+                        title="Script reloaded",
+                        timeout=2,
+                    )
+                if change_type in ("added", "deleted"):
+                    # TODO - update the autocompletion
+                    # of the available scripts.
+                    pass
+        if self._changed_request_files:
+            # Wait for a burst of changes (e.g. switching git branches)
+            # to settle, then update the tree once.
+            if self._request_reload_timer is not None:
+                self._request_reload_timer.stop()
+            self._request_reload_timer = self.set_timer(
+                COLLECTION_RELOAD_DELAY, self.reload_request_files
+            )
 
-        async for changes in awatch(*paths_to_watch):
-            for _change_type, file_path in changes:
-                if file_path.endswith((".yml", ".yaml")):
+    def _theme_files_changed(self, changes: list[FileChange]) -> None:
+        for _change_type, file_path in changes:
+            if file_path.suffix in (".yml", ".yaml"):
+                try:
+                    theme = load_user_theme(file_path)
+                except Exception as e:
+                    log.warning(f"Couldn't load theme from {str(file_path)}: {e}.")
+                    continue
+                if theme and theme.name == self.theme:
+                    self.register_theme(theme)
+                    self.set_reactive(App.theme, theme.name)
                     try:
-                        theme = load_user_theme(Path(file_path))
+                        self._watch_theme(theme.name)
                     except Exception as e:
-                        log.warning(f"Couldn't load theme from {str(file_path)}: {e}.")
-                        continue
-                    if theme and theme.name == self.theme:
-                        self.register_theme(theme)
-                        self.set_reactive(App.theme, theme.name)
-                        try:
-                            self._watch_theme(theme.name)
-                        except Exception as e:
-                            log.warning(f"Error refreshing CSS: {e}")
+                        log.warning(f"Error refreshing CSS: {e}")
+
+    async def save_collection_index(self) -> None:
+        """Write the collection index to disk in a thread, if it has changed."""
+        collection_index = self.collection_index
+        if collection_index is not None:
+            async with self.collection_index_lock:
+                await asyncio.to_thread(collection_index.save)
+
+    @work(group="collection-reload")
+    async def reload_request_files(self) -> None:
+        """Re-read the request files which changed on disk, and patch
+        the collection tree to match them."""
+        async with self._request_reload_lock:
+            file_paths = sorted(self._changed_request_files)
+            self._changed_request_files.clear()
+            if not file_paths:
+                return
+
+            collection_index = self.collection_index
+            if collection_index is not None:
+                async with self.collection_index_lock:
+                    # Never start a process pool from inside the running app,
+                    # even for a large burst of changes (e.g. `git checkout`).
+                    results = await asyncio.to_thread(
+                        collection_index.read_request_files,
+                        file_paths,
+                        max_workers=1,
+                        prune=False,
+                    )
+                await self.save_collection_index()
+            else:
+                results = await asyncio.to_thread(
+                    read_request_files, file_paths, max_workers=1
+                )
+
+            updated: list[RequestSummary] = []
+            removed: list[Path] = []
+            failed: list[str] = []
+            collection_tree = self.main_screen.collection_tree
+            search_index = collection_tree.search_index
+            for path_string, (data, error) in zip(file_paths, results):
+                file_path = Path(path_string)
+                if error is None:
+                    try:
+                        updated.append(RequestSummary.from_data(data, file_path))
+                    except Exception:
+                        failed.append(file_path.name)
+                    else:
+                        search_index.add(file_path, data)
+                elif not file_path.exists():
+                    removed.append(file_path)
+                    search_index.remove(file_path)
+                else:
+                    failed.append(file_path.name)
+
+            collection_tree.sync_requests(updated, removed)
+            if updated or removed:
+                self.notify(
+                    title="Collection changed",
+                    message=f"Reloaded {len(updated) + len(removed)} request files",
+                    timeout=3,
+                )
+            if failed:
+                self.notify(
+                    title="Couldn't reload requests",
+                    message=", ".join(failed),
+                    severity="warning",
+                    timeout=5,
+                )
 
     def on_mount(self) -> None:
         settings = self.settings
@@ -1441,14 +1710,15 @@ class Posting(App[None], inherit_bindings=False):
 
         self.spacing = self.settings.spacing
 
-        if self.settings.watch_env_files:
-            self.watch_environment_files()
-
-        if self.settings.watch_collection_files:
-            self.watch_collection_files()
+        if (
+            self.settings.watch_env_files
+            or self.settings.watch_collection_files
+            or self.settings.watch_themes
+        ):
+            self.watch_files()
 
-        if self.settings.watch_themes:
-            self.watch_themes()
+    async def on_unmount(self) -> None:
+        await self.client_pool.aclose()
 
     def get_default_screen(self) -> MainScreen:
         self.main_screen = MainScreen(
@@ -0,0 +1,669 @@
+"""Load generation for a saved request, via `posting bench`.
+
+Each iteration is sent through the same pipeline as `posting run` (and
+therefore the TUI), so templating and scripts apply to every request.
+Latencies are recorded in a histogram with bounded relative error, in the
+style of HdrHistogram, so percentiles stay accurate over long runs without
+storing every sample.
+
+When a rate is given, requests are dispatched open-loop on a timeline which
+is computed up front. Latency is measured from the time each request was
+*intended* to start, so a server which stalls is charged for the requests
+that queued up behind the stall, rather than the stall hiding them (the
+"coordinated omission" problem of closed-loop load generators).
+
+A single event loop is limited by the CPU time spent building requests and
+parsing responses, so a benchmark can also be spread across several worker
+processes, each with its own event loop and connection pool. The workers
+receive the request, settings and variables when they start, and send their
+results back to the coordinating process, which merges them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import multiprocessing
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from multiprocessing.synchronize import Event
+from pathlib import Path
+from typing import Any, Iterable, Literal, get_args
+
+from rich.console import Group, RenderableType
+from rich.table import Table
+
+from posting.collection import RequestModel
+from posting.config import SETTINGS, Settings
+from posting.http_client import ClientPool
+from posting.runner import CollectionRunner, RunResult
+from posting.variables import VARIABLES, get_variables
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+"""The percentiles shown in benchmark reports."""
+
+Schedule = Literal["constant", "poisson", "ramp"]
+"""The shape of the timeline requests are dispatched on, when a rate is given."""
+
+SCHEDULES: tuple[Schedule, ...] = get_args(Schedule)
+
+
+class LatencyHistogram:
+    """A histogram of non-negative integer values (e.g. microseconds).
+
+    Values are grouped into log-linear buckets, so that every recorded value
+    is represented to within `significant_figures` decimal digits of precision,
+    regardless of magnitude. Buckets are stored sparsely, and histograms
+    can be merged, e.g. to combine samples recorded by several workers.
+    """
+
+    def __init__(self, significant_figures: int = 3) -> None:
+        self.significant_figures = significant_figures
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._sub_bucket_half = self._sub_bucket_count >> 1
+        self.counts: Counter[int] = Counter()
+        self.total_count = 0
+        self.min = 0
+        self.max = 0
+        self._sum = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        shift = value.bit_length() - self._sub_bucket_bits
+        return shift * self._sub_bucket_half + (value >> shift)
+
+    def _highest_equivalent_value(self, index: int) -> int:
+        if index < self._sub_bucket_count:
+            return index
+        shift = index // self._sub_bucket_half - 1
+        sub_bucket = index - shift * self._sub_bucket_half
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        """Record a value (`count` times)."""
+        if value < 0:
+            raise ValueError("Can't record a negative value.")
+        self.counts[self._index(value)] += count
+        if self.total_count == 0 or value < self.min:
+            self.min = value
+        self.max = max(self.max, value)
+        self.total_count += count
+        self._sum += value * count
+
+    def merge(self, other: LatencyHistogram) -> None:
+        """Add the values recorded in another histogram to this one."""
+        if other.significant_figures != self.significant_figures:
+            raise ValueError("Can't merge histograms with different precision.")
+        if other.total_count == 0:
+            return
+        self.counts.update(other.counts)
+        self.min = other.min if self.total_count == 0 else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.total_count += other.total_count
+        self._sum += other._sum
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.total_count if self.total_count else 0.0
+
+    def percentile(self, percentile: float) -> int:
+        """Return the value below which `percentile` percent of values fall."""
+        if self.total_count == 0:
+            return 0
+        target = max(1, math.ceil(self.total_count * percentile / 100))
+        running = 0
+        for index in sorted(self.counts):
+            running += self.counts[index]
+            if running >= target:
+                return min(self._highest_equivalent_value(index), self.max)
+        return self.max
+
+
+@dataclass
+class BenchStats:
+    """Aggregated results of a benchmark."""
+
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    """The time to receive a complete response, in microseconds.
+
+    For open-loop benchmarks, this is measured from the time the request
+    was scheduled to start, so it includes `schedule_delay`."""
+    service_time: LatencyHistogram = field(default_factory=LatencyHistogram)
+    """The time from sending a request to receiving the complete response,
+    in microseconds."""
+    schedule_delay: LatencyHistogram = field(default_factory=LatencyHistogram)
+    """How late each request started, relative to the time it was scheduled
+    to start, in microseconds. Only recorded for open-loop benchmarks."""
+    phases: dict[str, LatencyHistogram] = field(default_factory=dict)
+    """The time spent in each phase of a request, in microseconds."""
+    statuses: Counter[int] = field(default_factory=Counter)
+    errors: Counter[str] = field(default_factory=Counter)
+    """The number of failed requests, by HTTP status or exception type."""
+    failed_requests: int = 0
+    """The number of requests which failed without a response."""
+    bytes_received: int = 0
+    duration: float = 0.0
+    """The wall-clock duration of the benchmark, in seconds."""
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses.values()) + self.failed_requests
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def add(
+        self,
+        result: RunResult,
+        response_time_ms: float | None = None,
+        schedule_delay_ms: float | None = None,
+    ) -> None:
+        """Record the result of a single request.
+
+        Args:
+            result: The result of the request.
+            response_time_ms: The time from the intended start of the request
+                to its completion. Defaults to the service time of the request.
+            schedule_delay_ms: How late the request started.
+        """
+        if schedule_delay_ms is not None:
+            self.schedule_delay.record(_microseconds(schedule_delay_ms))
+        for script, status in result.scripts.items():
+            if status == "error":
+                self.errors[f"{script} script"] += 1
+
+        if result.status is None:
+            self.failed_requests += 1
+            self.errors[(result.error or "Error").partition(":")[0]] += 1
+            return
+
+        self.statuses[result.status] += 1
+        if result.status >= 400:
+            self.errors[f"HTTP {result.status}"] += 1
+        self.bytes_received += result.size or 0
+        if result.elapsed_ms is not None:
+            self.service_time.record(_microseconds(result.elapsed_ms))
+            if response_time_ms is None:
+                response_time_ms = result.elapsed_ms
+        if response_time_ms is not None:
+            self.latency.record(_microseconds(response_time_ms))
+        for phase, milliseconds in result.timings.items():
+            histogram = self.phases.get(phase)
+            if histogram is None:
+                histogram = self.phases[phase] = LatencyHistogram(
+                    self.latency.significant_figures
+                )
+            histogram.record(_microseconds(milliseconds))
+
+    def merge(self, other: BenchStats) -> None:
+        """Combine the results of another benchmark (e.g. another worker)."""
+        self.latency.merge(other.latency)
+        self.service_time.merge(other.service_time)
+        self.schedule_delay.merge(other.schedule_delay)
+        for phase, histogram in other.phases.items():
+            self.phases.setdefault(
+                phase, LatencyHistogram(histogram.significant_figures)
+            ).merge(histogram)
+        self.statuses.update(other.statuses)
+        self.errors.update(other.errors)
+        self.failed_requests += other.failed_requests
+        self.bytes_received += other.bytes_received
+        self.duration = max(self.duration, other.duration)
+
+    def to_dict(self) -> dict[str, object]:
+        """A JSON-serialisable summary of the results, with times in milliseconds."""
+
+        def summarise(histogram: LatencyHistogram) -> dict[str, float]:
+            summary = {
+                "min": histogram.min / 1000,
+                "mean": round(histogram.mean / 1000, 3),
+                "max": histogram.max / 1000,
+            }
+            for percentile in PERCENTILES:
+                summary[f"p{percentile:g}"] = histogram.percentile(percentile) / 1000
+            return summary
+
+        return {
+            "requests": self.requests,
+            "duration_s": round(self.duration, 3),
+            "throughput_rps": round(self.throughput, 2),
+            "bytes_received": self.bytes_received,
+            "latency_ms": summarise(self.latency),
+            "service_time_ms": summarise(self.service_time),
+            "schedule_delay_ms": (
+                summarise(self.schedule_delay)
+                if self.schedule_delay.total_count
+                else None
+            ),
+            "phases_ms": {
+                phase: summarise(histogram) for phase, histogram in self.phases.items()
+            },
+            "statuses": {
+                str(status): count for status, count in self.statuses.items()
+            },
+            "errors": dict(self.errors),
+        }
+
+
+def _microseconds(milliseconds: float) -> int:
+    return max(0, round(milliseconds * 1000))
+
+
+def build_timeline(
+    schedule: Schedule,
+    rate: float,
+    duration: float | None = None,
+    total_requests: int | None = None,
+    *,
+    ramp_from: float = 0.0,
+    seed: int | None = None,
+) -> array[float]:
+    """Compute the times at which requests should start, in seconds from the
+    start of the benchmark.
+
+    Args:
+        schedule: `constant` spaces requests evenly at `rate`. `poisson`
+            spaces them randomly, with exponentially distributed gaps, at an
+            average of `rate`. `ramp` increases (or decreases) the rate
+            linearly from `ramp_from` to `rate` over `duration`.
+        rate: The (target) rate, in requests per second.
+        duration: The time the timeline covers, in seconds.
+        total_requests: The maximum number of requests on the timeline.
+        ramp_from: The starting rate of a `ramp`, in requests per second.
+        seed: Seeds the random gaps of a `poisson` timeline.
+    """
+    if rate <= 0:
+        raise ValueError("The rate must be greater than zero.")
+    if duration is None and total_requests is None:
+        raise ValueError("A duration or number of requests is required.")
+    if schedule == "ramp" and duration is None:
+        raise ValueError("A ramp requires a duration.")
+
+    limit = math.inf if total_requests is None else total_requests
+    end = math.inf if duration is None else duration
+    timeline = array("d")
+
+    if schedule == "constant":
+        count = total_requests if duration is None else math.ceil(duration * rate)
+        if total_requests is not None:
+            count = min(count, total_requests)
+        timeline.extend(index / rate for index in range(count))
+    elif schedule == "poisson":
+        rng = random.Random(seed)
+        offset = 0.0
+        while offset < end and len(timeline) < limit:
+            timeline.append(offset)
+            offset += rng.expovariate(rate)
+    elif schedule == "ramp":
+        assert duration is not None
+        # The k-th request starts when the number of requests expected so far,
+        # `ramp_from * t + (rate - ramp_from) * t**2 / (2 * duration)`, reaches k.
+        half_slope = (rate - ramp_from) / (2 * duration)
+        count = math.ceil((ramp_from + rate) * duration / 2)
+        if total_requests is not None:
+            count = min(count, total_requests)
+        for index in range(count):
+            if half_slope == 0:
+                offset = index / rate
+            else:
+                discriminant = ramp_from**2 + 4 * half_slope * index
+                offset = (math.sqrt(max(0.0, discriminant)) - ramp_from) / (
+                    2 * half_slope
+                )
+            timeline.append(offset)
+    else:
+        raise ValueError(f"Unknown schedule {schedule!r}.")
+    return timeline
+
+
+class Benchmark:
+    """Sends a request repeatedly, either from a fixed number of concurrent
+    workers (closed-loop), or on a timeline at a given rate (open-loop)."""
+
+    def __init__(
+        self,
+        runner: CollectionRunner,
+        request_model: RequestModel,
+        *,
+        concurrency: int = 1,
+        rate: float | None = None,
+        duration: float | None = None,
+        total_requests: int | None = None,
+        schedule: Schedule = "constant",
+        ramp_from: float = 0.0,
+        seed: int | None = None,
+        timeline: array[float] | None = None,
+    ) -> None:
+        """
+        Args:
+            runner: Sends the requests.
+            request_model: The request to send.
+            concurrency: The number of closed-loop workers, or the maximum
+                number of open-loop requests in flight.
+            rate: The rate to send requests at, making the benchmark open-loop.
+            duration: How long to run the benchmark for, in seconds.
+            total_requests: The maximum number of requests to send.
+            schedule: The shape of the open-loop timeline.
+            ramp_from: The starting rate of a `ramp` timeline.
+            seed: Seeds the random gaps of a `poisson` timeline.
+            timeline: A precomputed open-loop timeline, used instead of
+                building one from `rate` and `schedule`.
+        """
+        if duration is None and total_requests is None:
+            raise ValueError("A duration or number of requests is required.")
+        self.runner = runner
+        self.request_model = request_model
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.total_requests = total_requests
+        if timeline is None and rate is not None:
+            timeline = build_timeline(
+                schedule,
+                rate,
+                duration,
+                total_requests,
+                ramp_from=ramp_from,
+                seed=seed,
+            )
+        self.timeline = timeline
+        """The intended start time of each request, if the benchmark is open-loop."""
+        self.stats = BenchStats()
+        self._dispatched = 0
+
+    def _should_continue(self, start: float) -> bool:
+        total_requests = self.total_requests
+        if total_requests is not None and self._dispatched >= total_requests:
+            return False
+        if self.duration is not None and time.perf_counter() - start >= self.duration:
+            return False
+        return True
+
+    async def _send(self, client_pool: ClientPool) -> RunResult:
+        return await self.runner.run_request(
+            self.request_model.model_copy(deep=True), client_pool, run_setup=False
+        )
+
+    async def run(self, run_setup: bool = True) -> BenchStats:
+        """Run the benchmark, and return the aggregated results.
+
+        Args:
+            run_setup: Whether to run the request's setup script first.
+        """
+        if run_setup:
+            self.runner.run_setup_script(self.request_model)
+        client_pool = ClientPool(SETTINGS.get().http)
+        start = time.perf_counter()
+        try:
+            if self.timeline is None:
+                await self._run_closed_loop(client_pool, start)
+            else:
+                await self._run_open_loop(client_pool, start, self.timeline)
+        finally:
+            self.stats.duration = time.perf_counter() - start
+            await client_pool.aclose()
+        return self.stats
+
+    async def _run_closed_loop(self, client_pool: ClientPool, start: float) -> None:
+        """Each worker sends its next request as soon as the previous completes."""
+
+        async def worker() -> None:
+            while self._should_continue(start):
+                self._dispatched += 1
+                self.stats.add(await self._send(client_pool))
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _run_open_loop(
+        self, client_pool: ClientPool, start: float, timeline: array[float]
+    ) -> None:
+        """Dispatch a request at each time on the timeline, regardless of how
+        many are still in flight.
+
+        At most `concurrency` requests are sent at once. Requests which have to
+        wait for one to complete are late, and that delay counts towards their
+        latency, as it would for a real client.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks: set[asyncio.Task[None]] = set()
+
+        async def send(intended_start: float) -> None:
+            async with semaphore:
+                actual_start = time.perf_counter()
+                result = await self._send(client_pool)
+            completed = time.perf_counter()
+            self.stats.add(
+                result,
+                response_time_ms=(completed - intended_start) * 1000,
+                schedule_delay_ms=(actual_start - intended_start) * 1000,
+            )
+
+        for offset in timeline:
+            intended_start = start + offset
+            delay = intended_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(send(intended_start))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            self._dispatched += 1
+        await asyncio.gather(*tasks)
+
+
+class MultiProcessBenchmark:
+    """Runs a benchmark across several worker processes.
+
+    The setup script runs once, in this process, and the resulting variables
+    are sent to every worker. Closed-loop workers and the request limit are
+    divided between the workers, and for open-loop benchmarks each worker
+    takes every n-th request from a shared timeline, so that together they
+    follow the same schedule as a single process would.
+    """
+
+    def __init__(
+        self,
+        collection_root: Path,
+        request_model: RequestModel,
+        *,
+        processes: int,
+        concurrency: int = 1,
+        rate: float | None = None,
+        duration: float | None = None,
+        total_requests: int | None = None,
+        schedule: Schedule = "constant",
+        ramp_from: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        if duration is None and total_requests is None:
+            raise ValueError("A duration or number of requests is required.")
+        self.collection_root = collection_root
+        self.request_model = request_model
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.timeline = (
+            None
+            if rate is None
+            else build_timeline(
+                schedule,
+                rate,
+                duration,
+                total_requests,
+                ramp_from=ramp_from,
+                seed=seed,
+            )
+        )
+        # Every worker needs at least one request in flight to be useful.
+        limit = concurrency
+        if total_requests is not None:
+            limit = min(limit, total_requests)
+        self.processes = max(1, min(processes, limit))
+
+    def _worker_options(self) -> list[dict[str, Any]]:
+        """The keyword arguments for the `Benchmark` in each worker."""
+        processes = self.processes
+        concurrency = _divide(self.concurrency, processes)
+        if self.total_requests is None:
+            total_requests: list[int | None] = [None] * processes
+        else:
+            total_requests = list(_divide(self.total_requests, processes))
+
+        options: list[dict[str, Any]] = []
+        for index in range(processes):
+            timeline = (
+                None if self.timeline is None else self.timeline[index::processes]
+            )
+            options.append(
+                {
+                    "concurrency": concurrency[index],
+                    "duration": self.duration,
+                    "total_requests": total_requests[index],
+                    "timeline": timeline,
+                }
+            )
+        return options
+
+    def run(self) -> BenchStats:
+        """Run the benchmark, and return the results of all workers merged."""
+        runner = CollectionRunner(self.collection_root)
+        runner.run_setup_script(self.request_model)
+
+        context = multiprocessing.get_context()
+        start = context.Event()
+        workers: list[tuple[multiprocessing.process.BaseProcess, Connection]] = []
+        for options in self._worker_options():
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run_worker,
+                args=(
+                    sender,
+                    start,
+                    self.collection_root,
+                    self.request_model,
+                    SETTINGS.get(),
+                    dict(get_variables()),
+                    runner.host.session_env,
+                    options,
+                ),
+                daemon=True,
+            )
+            process.start()
+            sender.close()
+            workers.append((process, receiver))
+
+        stats = BenchStats()
+        try:
+            # Wait until every worker is ready, so they all start together.
+            for _, receiver in workers:
+                _receive(receiver)
+            started = time.perf_counter()
+            start.set()
+            for process, receiver in workers:
+                stats.merge(_receive(receiver))
+                process.join()
+            stats.duration = time.perf_counter() - started
+        finally:
+            for process, receiver in workers:
+                receiver.close()
+                if process.is_alive():
+                    process.terminate()
+        return stats
+
+
+def _divide(total: int, parts: int) -> list[int]:
+    """Divide `total` into `parts` integers which differ by at most one."""
+    quotient, remainder = divmod(total, parts)
+    return [quotient + (index < remainder) for index in range(parts)]
+
+
+def _receive(connection: Connection) -> Any:
+    try:
+        message = connection.recv()
+    except EOFError:
+        raise RuntimeError("A benchmark worker exited unexpectedly.") from None
+    if isinstance(message, str) and message != "ready":
+        raise RuntimeError(f"A benchmark worker failed: {message}")
+    return message
+
+
+def _run_worker(
+    connection: Connection,
+    start: Event,
+    collection_root: Path,
+    request_model: RequestModel,
+    settings: Settings,
+    variables: dict[str, object],
+    session_env: dict[str, object],
+    options: dict[str, Any],
+) -> None:
+    """The entry point of a worker process."""
+    try:
+        SETTINGS.set(settings)
+        VARIABLES.set(variables)
+        runner = CollectionRunner(collection_root, error_stream=sys.stderr)
+        runner.host.session_env.update(session_env)
+        benchmark = Benchmark(runner, request_model, **options)
+        connection.send("ready")
+        start.wait()
+        connection.send(asyncio.run(benchmark.run(run_setup=False)))
+    except Exception as error:
+        connection.send(f"{type(error).__name__}: {error}")
+    finally:
+        connection.close()
+
+
+def format_report(stats: BenchStats) -> RenderableType:
+    """Render the results of a benchmark as a set of tables."""
+    summary = Table.grid(padding=(0, 2))
+    summary.add_row("Requests", f"{stats.requests:,}")
+    summary.add_row("Duration", f"{stats.duration:.2f}s")
+    summary.add_row("Throughput", f"{stats.throughput:,.2f} req/s")
+    summary.add_row("Received", f"{stats.bytes_received:,} bytes")
+
+    latency = Table(title="Latency (ms)", title_justify="left")
+    latency.add_column("", no_wrap=True)
+    percentile_columns = [f"p{percentile:g}" for percentile in PERCENTILES]
+    for column in ("min", *percentile_columns, "max", "mean"):
+        latency.add_column(column, justify="right")
+
+    def add_row(name: str, histogram: LatencyHistogram) -> None:
+        values = (
+            histogram.min,
+            *(histogram.percentile(percentile) for percentile in PERCENTILES),
+            histogram.max,
+            histogram.mean,
+        )
+        latency.add_row(name, *(f"{value / 1000:.2f}" for value in values))
+
+    add_row("total", stats.latency)
+    if stats.schedule_delay.total_count:
+        add_row("service time", stats.service_time)
+        add_row("schedule delay", stats.schedule_delay)
+    for phase in stats.phases:
+        add_row(phase, stats.phases[phase])
+
+    renderables: list[RenderableType] = [summary, latency]
+    if stats.statuses:
+        renderables.append(
+            _counter_table("Status codes", stats.statuses.most_common())
+        )
+    if stats.errors:
+        renderables.append(_counter_table("Errors", stats.errors.most_common()))
+    return Group(*renderables)
+
+
+def _counter_table(title: str, rows: Iterable[tuple[object, int]]) -> Table:
+    table = Table(title=title, title_justify="left")
+    table.add_column("")
+    table.add_column("count", justify="right")
+    for name, count in rows:
+        table.add_row(str(name), f"{count:,}")
+    return table
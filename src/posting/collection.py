@@ -1,9 +1,11 @@
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from functools import total_ordering
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 from pathlib import Path
-from string import Template
-from typing import Any, Literal, get_args
+from typing import TYPE_CHECKING, Any, Iterator, Literal, Mapping, get_args
 import httpx
 from pydantic import BaseModel, Field, HttpUrl
 import rich
@@ -11,11 +13,18 @@ import os
 from textual import log
 from posting.auth import HttpxBearerTokenAuth
 from posting.tuple_to_multidict import tuples_to_dict
-from posting.variables import SubstitutionError
+from posting.variables import (
+    SubstitutionError,
+    substitute_variables,
+    template_variables,
+)
 from posting.version import VERSION
 from posting.yaml import dump, load, Loader
 from posting.urls import ensure_protocol, substitute_path_params
 
+if TYPE_CHECKING:
+    from posting.collection_index import CollectionIndex
+
 HttpRequestMethod = Literal["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"]
 VALID_HTTP_METHODS = get_args(HttpRequestMethod)
 
@@ -106,6 +115,8 @@ class Options(BaseModel):
     attach_cookies: bool = Field(default=True)
     proxy_url: str = Field(default="")
     timeout: float = Field(default=5.0)
+    http2: bool = Field(default=False)
+    stream: bool = Field(default=False)
 
 
 class RequestBody(BaseModel):
@@ -130,7 +141,7 @@ class RequestBody(BaseModel):
         return httpx_args
 
 
-def request_sort_key(request: RequestModel) -> tuple[int, str]:
+def request_sort_key(request: RequestModel | RequestSummary) -> tuple[int, str]:
     method_order = {"GET": 0, "POST": 1, "PUT": 2, "PATCH": 3, "DELETE": 4}
     return (method_order.get(request.method.upper(), 5), request.name)
 
@@ -202,60 +213,66 @@ class RequestModel(BaseModel):
     options: Options = Field(default_factory=Options)
     """The options for the request."""
 
-    def apply_template(self, variables: dict[str, Any]) -> None:
-        """Apply the template to the request model."""
+    def _templated_fields(self) -> Iterator[tuple[Any, str]]:
+        """Yield the object and attribute name of each field which variables
+        can be substituted into, in the order they're substituted."""
+        for param in self.path_params:
+            yield param, "value"
+        yield self, "url"
+        yield self, "description"
+        yield self.options, "proxy_url"
+        if self.body:
+            if self.body.content:
+                yield self.body, "content"
+            if self.body.form_data:
+                for item in self.body.form_data:
+                    yield item, "name"
+                    yield item, "value"
+        for header in self.headers:
+            yield header, "name"
+            yield header, "value"
+        for param in self.params:
+            yield param, "name"
+            yield param, "value"
+        if self.auth is not None:
+            if self.auth.basic is not None:
+                yield self.auth.basic, "username"
+                yield self.auth.basic, "password"
+            if self.auth.digest is not None:
+                yield self.auth.digest, "username"
+                yield self.auth.digest, "password"
+            if self.auth.bearer_token is not None:
+                yield self.auth.bearer_token, "token"
+
+    def referenced_variables(self) -> set[str]:
+        """Return the names of the variables referenced by the request."""
+        return {
+            name
+            for owner, attribute in self._templated_fields()
+            for name in template_variables(getattr(owner, attribute))
+        }
+
+    def add_content_type_header(self) -> None:
+        """Add a `content-type` header for the body, unless the user has
+        explicitly set one."""
+        body = self.body
+        if body is None or body.content_type is None:
+            return
+        if not any(header.name.lower() == "content-type" for header in self.headers):
+            self.headers.append(Header(name="content-type", value=body.content_type))
+
+    def apply_template(self, variables: Mapping[str, Any]) -> None:
+        """Apply the template to the request model.
+
+        Each field is compiled once and cached by its content, and fields
+        without variables are left as they are.
+        """
         try:
-            # Resolve variables in path parameter values
-            if self.path_params:
-                for param in self.path_params:
-                    template = Template(param.value)
-                    param.value = template.substitute(variables)
-
-            # Resolve variables in URL and other fields
-            template = Template(self.url)
-            self.url = template.substitute(variables)
-
-            template = Template(self.description)
-            self.description = template.substitute(variables)
-            template = Template(self.options.proxy_url)
-            self.options.proxy_url = template.substitute(variables)
-
-            if self.body:
-                if self.body.content:
-                    template = Template(self.body.content)
-                    self.body.content = template.substitute(variables)
-                if self.body.form_data:
-                    for item in self.body.form_data:
-                        template = Template(item.name)
-                        item.name = template.substitute(variables)
-                        template = Template(item.value)
-                        item.value = template.substitute(variables)
-
-            for header in self.headers:
-                template = Template(header.name)
-                header.name = template.substitute(variables)
-                template = Template(header.value)
-                header.value = template.substitute(variables)
-            for param in self.params:
-                template = Template(param.name)
-                param.name = template.substitute(variables)
-                template = Template(param.value)
-                param.value = template.substitute(variables)
-
-            if self.auth is not None:
-                if self.auth.basic is not None:
-                    template = Template(self.auth.basic.username)
-                    self.auth.basic.username = template.substitute(variables)
-                    template = Template(self.auth.basic.password)
-                    self.auth.basic.password = template.substitute(variables)
-                if self.auth.digest is not None:
-                    template = Template(self.auth.digest.username)
-                    self.auth.digest.username = template.substitute(variables)
-                    template = Template(self.auth.digest.password)
-                    self.auth.digest.password = template.substitute(variables)
-                if self.auth.bearer_token is not None:
-                    template = Template(self.auth.bearer_token.token)
-                    self.auth.bearer_token.token = template.substitute(variables)
+            for owner, attribute in self._templated_fields():
+                value = getattr(owner, attribute)
+                if "$" in value:
+                    setattr(owner, attribute, substitute_variables(value, variables))
+
             # After resolving variables, substitute path parameters into the URL and ensure protocol
             if self.path_params:
                 substitutions = {p.name: p.value for p in self.path_params}
@@ -389,7 +406,7 @@ class RequestModel(BaseModel):
         # Join with newlines for better readability, similar to other tools
         return " \\\n  ".join(parts)
 
-    def __lt__(self, other: RequestModel) -> bool:
+    def __lt__(self, other: RequestModel | RequestSummary) -> bool:
         return request_sort_key(self) < request_sort_key(other)
 
     def __eq__(self, other: object) -> bool:
@@ -398,6 +415,67 @@ class RequestModel(BaseModel):
         return NotImplemented
 
 
+@dataclass(slots=True, eq=False)
+class RequestSummary:
+    """The parts of a request file needed to show it in the collection browser.
+
+    Loading a summary skips validating the body, headers, auth, scripts and
+    options of the request, and they aren't kept in memory. The full request
+    is loaded from disk with `load` when it's opened.
+    """
+
+    name: str
+    method: HttpRequestMethod
+    path: Path
+    description: str = ""
+    url: str = ""
+
+    @classmethod
+    def from_data(cls, data: dict[str, Any], path: Path) -> RequestSummary:
+        """Create a summary from the data read from a request file."""
+        if not isinstance(data, dict):
+            raise ValueError("A request file must contain a mapping.")
+        method = str(data.get("method", "GET")).upper()
+        if method not in VALID_HTTP_METHODS:
+            raise ValueError(f"Invalid HTTP method {method!r}.")
+        return cls(
+            name=str(data.get("name", "")),
+            method=method,  # type: ignore[arg-type]
+            path=path,
+            description=str(data.get("description", "")),
+            url=str(data.get("url", "")),
+        )
+
+    @classmethod
+    def from_model(cls, request: RequestModel) -> RequestSummary:
+        assert request.path is not None, "a summary requires a path"
+        return cls(
+            name=request.name,
+            method=request.method,
+            path=request.path,
+            description=request.description,
+            url=request.url,
+        )
+
+    def load(self) -> RequestModel:
+        """Load the full request from disk."""
+        return load_request_from_yaml(str(self.path))
+
+    def delete_from_disk(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            log.warning(f"Could not delete request {self.name!r} from disk: not found")
+
+    def __lt__(self, other: RequestModel | RequestSummary) -> bool:
+        return request_sort_key(self) < request_sort_key(other)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (RequestModel, RequestSummary)):
+            return request_sort_key(self) == request_sort_key(other)
+        return NotImplemented
+
+
 class Contact(BaseModel):
     name: str | None = None
     url: HttpUrl | None = None
@@ -427,7 +505,9 @@ class APIInfo(BaseModel):
 class Collection(BaseModel):
     path: Path
     name: str = Field(default="__default__")
-    requests: list[RequestModel] = Field(default_factory=list)
+    requests: list[RequestModel | RequestSummary] = Field(default_factory=list)
+    """The requests in the collection, which are only summaries if the
+    collection was loaded lazily."""
     children: list[Collection] = Field(default_factory=list)
     readme: str | None = Field(default=None)
 
@@ -478,11 +558,26 @@ class Collection(BaseModel):
         return readme.strip()
 
     @classmethod
-    def from_directory(cls, directory: str) -> Collection:
+    def from_directory(
+        cls,
+        directory: str,
+        max_workers: int | None = None,
+        index: CollectionIndex | None = None,
+        lazy: bool = False,
+        recursive: bool = True,
+    ) -> Collection:
         """Load all request models into a tree structure from a directory containing .posting.yaml files.
 
         Args:
             directory_path: The path to the directory containing .posting.yaml files.
+            max_workers: The maximum number of processes to read the files with.
+                Defaults to the number of CPU cores.
+            index: An index of previously read files. Only files which have
+                changed since they were indexed are read from disk.
+            lazy: Load a `RequestSummary` of each request, rather than
+                the full `RequestModel`.
+            recursive: Load requests from sub-directories. If False, only
+                requests directly inside the directory are loaded.
 
         Returns:
             Collection: The root collection containing all loaded requests and subcollections.
@@ -493,35 +588,41 @@ class Collection(BaseModel):
             directory_path = Path.cwd()
             directory = str(directory_path)
 
-        request_files = directory_path.rglob("*.posting.yaml")
+        glob = directory_path.rglob if recursive else directory_path.glob
+        request_files = [str(path) for path in glob("*.posting.yaml")]
         collection_name = directory_path.name
         root_collection = Collection(name=collection_name, path=directory_path)
 
-        for file_path in request_files:
+        # Collections indexed by their path relative to the root.
+        collections: dict[tuple[str, ...], Collection] = {(): root_collection}
+
+        def get_collection(parts: tuple[str, ...]) -> Collection:
+            collection = collections.get(parts)
+            if collection is None:
+                parent = get_collection(parts[:-1])
+                collection = Collection(name=parts[-1], path=parent.path / parts[-1])
+                parent.children.append(collection)
+                collections[parts] = collection
+            return collection
+
+        if index is None:
+            request_data = read_request_files(request_files, max_workers)
+        else:
+            request_data = index.read_request_files(request_files, max_workers)
+        for path_string, (data, error) in zip(request_files, request_data):
             try:
-                path_string = str(file_path)
-                request = load_request_from_yaml(path_string)
-                path_parts = (
-                    path_string[len(directory) :].strip(os.path.sep).split(os.path.sep)
-                )
-                current_level = root_collection
-                subpath = root_collection.path
-                for part in path_parts[:-1]:
-                    subpath = subpath / part
-                    found = False
-                    for child in current_level.children:
-                        if child.name == part:
-                            current_level = child
-                            found = True
-                            break
-
-                    if not found:
-                        new_collection = Collection(name=part, path=subpath)
-                        current_level.children.append(new_collection)
-                        current_level = new_collection
-                current_level.requests.append(request)
+                if error is not None:
+                    raise ValueError(error)
+                file_path = Path(path_string)
+                request: RequestModel | RequestSummary
+                if lazy:
+                    request = RequestSummary.from_data(data, file_path)
+                else:
+                    request = RequestModel(**data, path=file_path)
+                parts = file_path.relative_to(directory_path).parent.parts
+                get_collection(parts).requests.append(request)
             except Exception as e:
-                print(f"Failed to load {file_path}: {e}")
+                print(f"Failed to load {path_string}: {e}")
 
         # Sort the requests and children at all levels of the tree
         def sort_collection(collection: Collection):
@@ -545,11 +646,62 @@ class Collection(BaseModel):
             readme_path.write_text(self.readme)
             rich.print(f"Saved collection README to {str(readme_path)!r}.")
         for request in self.requests:
+            if isinstance(request, RequestSummary):
+                request = request.load()
             request.save_to_disk(path / f"{request.name}.posting.yaml")
         for child in self.children:
             child.save_to_disk(path / child.name)
 
 
+PARALLEL_LOAD_MIN_FILES = 500
+"""The number of request files at which they're read using a pool of processes.
+
+Below this, the cost of starting the processes outweighs the time saved."""
+
+
+def read_request_files(
+    file_paths: list[str], max_workers: int | None = None
+) -> list[tuple[Any, str | None]]:
+    """Read the YAML from a number of request files, in parallel if there are many.
+
+    Most of the time spent loading a request goes into building Python objects
+    from the YAML, which holds the GIL, so large collections are read using a pool
+    of processes. The plain data is returned, rather than validated models,
+    as it's much quicker to send back from the worker processes.
+
+    Args:
+        file_paths: The paths of the files to read.
+        max_workers: The maximum number of processes to use.
+            Defaults to the number of CPU cores.
+
+    Returns:
+        The data from each file, or an error message if the file couldn't be read,
+            in the same order as `file_paths`.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers > 1 and len(file_paths) >= PARALLEL_LOAD_MIN_FILES:
+        chunk_size = max(1, len(file_paths) // (max_workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers) as executor:
+                return list(
+                    executor.map(_read_request_file, file_paths, chunksize=chunk_size)
+                )
+        except (BrokenProcessPool, NotImplementedError, OSError) as error:
+            # Some platforms can't start processes (e.g. sandboxes without
+            # working semaphores), so fall back to reading them here.
+            log.warning(f"Couldn't read request files in parallel: {error}")
+    return [_read_request_file(path) for path in file_paths]
+
+
+def _read_request_file(file_path: str) -> tuple[Any, str | None]:
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            return load(file, Loader=Loader), None
+    except Exception as error:
+        return None, str(error)
+
+
 def load_request_from_yaml(file_path: str) -> RequestModel:
     """Load a request model from a YAML file.
 
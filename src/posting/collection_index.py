@@ -0,0 +1,175 @@
+"""A persistent index of the request files in a collection.
+
+Reading the YAML of every request file is the slowest part of loading a large
+collection. The index stores the data read from each file in the cache
+directory, keyed by the file's modification time and size, so that on the next
+launch only the files which have changed need to be read again.
+
+The index is written with `marshal`, which is compact and quick to load, and
+can only contain plain data, so loading an index can't execute code.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+from pathlib import Path
+from typing import Any
+
+from textual import log
+
+from posting.collection import read_request_files
+from posting.locations import collection_index_directory
+from posting.version import VERSION
+
+INDEX_FORMAT_VERSION = 1
+"""Incremented whenever the layout of the index changes."""
+
+
+class CollectionIndex:
+    """The data read from each request file in a collection, keyed by path.
+
+    Each entry is only used while the modification time and size of the file
+    match those recorded when it was read.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        """The file the index is stored in."""
+        self.hits = 0
+        """The number of files read from the index."""
+        self.misses = 0
+        """The number of files which had to be read from disk."""
+        self.autosave = True
+        """Save the index whenever files are read. The app disables this, and
+        saves the index in a thread instead, so it doesn't block the UI."""
+        self._entries: dict[str, tuple[int, int, Any]] = {}
+        self._dirty = False
+
+    @classmethod
+    def for_collection(cls, collection_root: Path) -> CollectionIndex:
+        """Load the index for a collection from the cache directory."""
+        root = str(collection_root.resolve())
+        name = hashlib.sha256(root.encode("utf-8")).hexdigest()[:32]
+        index = cls(collection_index_directory() / f"{name}.index")
+        index.load()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> None:
+        """Load the index from disk, discarding it if it's missing or outdated."""
+        self._entries = {}
+        try:
+            format_version, posting_version, entries = marshal.loads(
+                self.path.read_bytes()
+            )
+        except FileNotFoundError:
+            return
+        except Exception as error:
+            log.warning(f"Couldn't read the collection index {self.path}: {error}")
+            return
+        if format_version == INDEX_FORMAT_VERSION and posting_version == VERSION:
+            self._entries = entries
+
+    def save(self) -> None:
+        """Write the index to disk, if it has changed since it was loaded."""
+        if not self._dirty:
+            return
+        data = marshal.dumps((INDEX_FORMAT_VERSION, VERSION, self._entries))
+        temporary_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            temporary_path.write_bytes(data)
+            # Replacing the file means other instances never see a partial index.
+            os.replace(temporary_path, self.path)
+        except OSError as error:
+            log.warning(f"Couldn't write the collection index {self.path}: {error}")
+            temporary_path.unlink(missing_ok=True)
+            return
+        self._dirty = False
+
+    def get(self, path: str, stat: os.stat_result) -> Any | None:
+        """Return the data for a file, or None if it isn't in the index or
+        the file has changed since it was indexed."""
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        mtime_ns, size, data = entry
+        if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+            return None
+        return data
+
+    def put(self, path: str, stat: os.stat_result, data: Any) -> None:
+        """Add (or replace) the data for a file."""
+        try:
+            # Only plain data can be stored. YAML can produce other types
+            # (e.g. dates), and files containing them are always read from disk.
+            marshal.dumps(data)
+        except ValueError:
+            self.invalidate(path)
+            return
+        self._entries[path] = (stat.st_mtime_ns, stat.st_size, data)
+        self._dirty = True
+
+    def invalidate(self, path: str) -> None:
+        """Remove the entry for a file, if there is one."""
+        if self._entries.pop(path, None) is not None:
+            self._dirty = True
+
+    def read_request_files(
+        self,
+        file_paths: list[str],
+        max_workers: int | None = None,
+        prune: bool = True,
+    ) -> list[tuple[Any, str | None]]:
+        """Read the data from a number of request files, using the index for
+        the files which haven't changed, and updating it with the others.
+
+        Entries for files which no longer exist are removed, and if `autosave`
+        is enabled, the index is saved if anything changed.
+
+        Args:
+            file_paths: The paths of the files to read.
+            max_workers: The maximum number of processes to read changed files with.
+            prune: Remove the entries for files which aren't in `file_paths`.
+                Disable this when reading only some of the files in the collection.
+
+        Returns:
+            The data from each file, or an error message if the file couldn't be read,
+                in the same order as `file_paths`.
+        """
+        results: list[tuple[Any, str | None]] = [(None, None)] * len(file_paths)
+        stats: dict[str, os.stat_result] = {}
+        stale: list[int] = []
+        for position, path in enumerate(file_paths):
+            try:
+                stat = stats[path] = os.stat(path)
+            except OSError:
+                stale.append(position)
+                continue
+            data = self.get(path, stat)
+            if data is None:
+                stale.append(position)
+            else:
+                results[position] = (data, None)
+
+        self.hits = len(file_paths) - len(stale)
+        self.misses = len(stale)
+        stale_paths = [file_paths[position] for position in stale]
+        for position, path, (data, error) in zip(
+            stale, stale_paths, read_request_files(stale_paths, max_workers)
+        ):
+            results[position] = (data, error)
+            if error is None and path in stats:
+                self.put(path, stats[path], data)
+            else:
+                self.invalidate(path)
+
+        if prune:
+            for path in self._entries.keys() - set(file_paths):
+                self.invalidate(path)
+        if self.autosave:
+            self.save()
+        return results
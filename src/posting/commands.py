@@ -1,17 +1,35 @@
 from functools import partial
+from pathlib import Path
 from typing import TYPE_CHECKING, cast
 from textual.command import DiscoveryHit, Hit, Hits, Provider
 from textual.types import IgnoreReturnCallbackType
+from posting.fuzzy import FuzzyIndex
 from posting.widgets.load_env_file_dialog import show_load_env_file_dialog
 
 if TYPE_CHECKING:
-    from posting.app import Posting
+    from posting.app import MainScreen, Posting
 
 
 CommandType = tuple[str, IgnoreReturnCallbackType, str, bool]
 
 
+def _environment_help(files: tuple[Path, ...]) -> str:
+    """Describe a named environment by the names of its dotenv files."""
+    if not files:
+        return "Use the variables defined in the config"
+    return "Use the variables from " + ", ".join(path.name for path in files)
+
+
 class PostingProvider(Provider):
+    async def startup(self) -> None:
+        """Build the commands once when the palette opens, rather than on
+        every keystroke, and index their names for fuzzy matching."""
+        self._commands = self.commands
+        self._command_names: FuzzyIndex[int] = FuzzyIndex()
+        self._command_names.update(
+            (position, name) for position, (name, *_) in enumerate(self._commands)
+        )
+
     @property
     def commands(
         self,
@@ -163,6 +181,18 @@ class PostingProvider(Provider):
                 ),
             )
 
+        profiles = app.environment_profiles
+        for environment in profiles.names:
+            if environment != app.active_environment:
+                commands_to_show.append(
+                    (
+                        f"environment: Switch to {environment}",
+                        partial(app.switch_environment, environment),
+                        _environment_help(profiles.files(environment)),
+                        True,
+                    ),
+                )
+
         if screen.query("HelpPanel"):
             commands_to_show.append(
                 (
@@ -207,7 +237,7 @@ class PostingProvider(Provider):
         Yields:
             Commands that can be discovered.
         """
-        for name, runnable, help_text, show_discovery in self.commands:
+        for name, runnable, help_text, show_discovery in self._commands:
             if show_discovery:
                 yield DiscoveryHit(
                     name,
@@ -225,7 +255,9 @@ class PostingProvider(Provider):
             Command hits for use in the command palette.
         """
         matcher = self.matcher(query)
-        for name, runnable, help_text, _ in self.commands:
+        commands = self._commands
+        for position in self._command_names.candidates(query):
+            name, runnable, help_text, _ = commands[position]
             if (match := matcher.match(name)) > 0:
                 yield Hit(
                     match,
@@ -237,3 +269,94 @@ class PostingProvider(Provider):
     @property
     def posting(self) -> "Posting":
         return cast("Posting", self.screen.app)
+
+
+class RequestSearchProvider(Provider):
+    """Searches the requests in the collection by their name, URL, method,
+    description, headers and body, using the collection's search index.
+
+    Names are also fuzzy matched, as commands are, and requests which have
+    been opened often and recently are ranked first."""
+
+    async def discover(self) -> Hits:
+        screen = self.main_screen
+        collection_path = screen.collection.path
+        recent = screen.collection_tree.search_index.recent
+        requests = sorted(
+            screen.collection_tree.iter_requests(),
+            key=lambda request: -recent.boost(request.path),
+        )
+        for request in requests:
+            yield DiscoveryHit(
+                request.name,
+                partial(screen.open_request, request.path),
+                help=str(request.path.relative_to(collection_path)),
+            )
+
+    async def search(self, query: str) -> Hits:
+        screen = self.main_screen
+        collection_path = screen.collection.path
+        search_index = screen.collection_tree.search_index
+        matcher = self.matcher(query)
+        matched: set[Path] = set()
+        for path, name in search_index.name_candidates(query):
+            if (match := matcher.match(name)) > 0:
+                matched.add(path)
+                yield Hit(
+                    search_index.recent.boosted(path, match),
+                    matcher.highlight(name),
+                    partial(screen.open_request, path),
+                    text=name,
+                    help=str(path.relative_to(collection_path)),
+                )
+        for result in search_index.search(query):
+            if result.path in matched:
+                continue
+            yield Hit(
+                result.score,
+                matcher.highlight(result.name),
+                partial(screen.open_request, result.path),
+                text=result.name,
+                help=str(result.path.relative_to(collection_path)),
+            )
+
+    @property
+    def main_screen(self) -> "MainScreen":
+        return cast("MainScreen", self.screen)
+
+
+class EnvironmentProvider(Provider):
+    """Lists the named environments from the config, so one can be switched to."""
+
+    async def discover(self) -> Hits:
+        app = self.posting
+        for name in app.environment_profiles.names:
+            yield DiscoveryHit(
+                name,
+                partial(app.switch_environment, name),
+                help=self._help(name),
+            )
+
+    async def search(self, query: str) -> Hits:
+        app = self.posting
+        matcher = self.matcher(query)
+        for name in app.environment_profiles.names:
+            if (match := matcher.match(name)) > 0:
+                yield Hit(
+                    match,
+                    matcher.highlight(name),
+                    partial(app.switch_environment, name),
+                    text=name,
+                    help=self._help(name),
+                )
+
+    def _help(self, name: str) -> str:
+        app = self.posting
+        help_text = _environment_help(app.environment_profiles.files(name))
+        if name == app.active_environment:
+            return f"{help_text} (current)"
+        return help_text
+
+    @property
+    def posting(self) -> "Posting":
+        return cast("Posting", self.screen.app)
@@ -49,6 +49,24 @@ class ResponseSettings(BaseModel):
     prettify_json: bool = Field(default=True)
     """If enabled, JSON responses will be pretty-formatted."""
 
+    prettify_json_max_size: int | None = Field(default=10_000_000)
+    """JSON responses larger than this size (in bytes) will not be pretty-formatted.
+
+    If unset, JSON responses of any size will be pretty-formatted."""
+
+    large_body_threshold: int | None = Field(default=5_000_000)
+    """Response bodies larger than this size (in bytes) are displayed in a
+    lightweight viewer which only decodes and highlights the visible lines.
+
+    If unset, all response bodies are displayed in the regular text area."""
+
+    spill_to_disk_threshold: int | None = Field(default=50_000_000)
+    """Response bodies larger than this size (in bytes) are written to a temporary
+    file as they're received, and read from a memory mapping of that file rather
+    than being held in memory.
+
+    If unset, response bodies are always held in memory."""
+
     show_size_and_time: bool = Field(default=True)
     """If enabled, the size and time taken for the response will be displayed."""
 
@@ -89,6 +107,26 @@ class CertificateSettings(BaseModel):
     """Password for the key file."""
 
 
+class HttpSettings(BaseModel):
+    """Configuration for the HTTP client and its connection pool."""
+
+    max_connections: int | None = Field(default=100)
+    """The maximum number of concurrent connections that may be established.
+
+    If unset, there is no limit."""
+
+    max_keepalive_connections: int | None = Field(default=20)
+    """The maximum number of idle connections to keep alive for reuse.
+
+    If unset, there is no limit."""
+
+    keepalive_expiry: float | None = Field(default=5.0)
+    """Time in seconds an idle keep-alive connection may remain in the pool
+    before it is closed.
+
+    If unset, idle connections are never expired."""
+
+
 class TextInputSettings(BaseModel):
     """Configuration for text input widgets."""
 
@@ -113,6 +151,17 @@ class CollectionBrowserSettings(BaseModel):
     """If enabled, the collection browser will be shown on startup."""
 
 
+class EnvironmentSettings(BaseModel):
+    """A named environment, which can be switched to while Posting is running."""
+
+    files: list[Path] = Field(default_factory=list)
+    """The dotenv files to load variables from, in order. Variables in later
+    files override those in earlier ones."""
+
+    variables: dict[str, str] = Field(default_factory=dict)
+    """Variables to set in the environment, which override those in the files."""
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -145,6 +194,15 @@ class Settings(BaseSettings):
     using the `${VARIABLE_NAME}` syntax. When disabled, you are restricted to variables
     defined in any `.env` files explicitly supplied via the `--env` option."""
 
+    environments: dict[str, EnvironmentSettings] = Field(default_factory=dict)
+    """Named environments, which can be switched between using the command
+    palette. Each environment is read when Posting starts, so switching
+    between them doesn't read from disk."""
+
+    default_environment: str | None = Field(default=None)
+    """The named environment to use on startup, if no `--env` files are given
+    (and there's no `posting.env` file in the current directory)."""
+
     watch_env_files: bool = Field(default=True)
     """If enabled, automatically reload environment files when they change."""
 
@@ -154,6 +212,15 @@ class Settings(BaseSettings):
     watch_themes: bool = Field(default=True)
     """If enabled, automatically reload themes in the theme directory when they change on disk."""
 
+    watch_ignore: list[str] = Field(default_factory=list)
+    """Glob patterns for files and directories in the collection which shouldn't be
+    watched, in addition to common directories such as `.git`, `.venv` and
+    `node_modules`, and anything in the collection's `.gitignore`."""
+
+    watch_debounce: int = Field(default=1600, ge=0)
+    """The maximum time in milliseconds to group file changes together for
+    before reloading."""
+
     text_input: TextInputSettings = Field(default_factory=TextInputSettings)
     """General configuration for inputs and text area widgets."""
 
@@ -203,6 +270,9 @@ class Settings(BaseSettings):
     ssl: CertificateSettings = Field(default_factory=CertificateSettings)
     """Configuration for SSL CA bundle and client certificates."""
 
+    http: HttpSettings = Field(default_factory=HttpSettings)
+    """Configuration for the HTTP client and its connection pool."""
+
     focus: FocusSettings = Field(default_factory=FocusSettings)
     """Configuration for focus."""
 
@@ -0,0 +1,346 @@
+"""A single service watching all the files Posting reloads when they change.
+
+Environment files, the collection and the theme directory are all watched by
+one `awatch` loop, and each batch of changes is dispatched to the subscribers
+whose paths it touches.
+
+Directories are watched individually rather than recursively, so that folders
+which are ignored (e.g. `.venv`, `node_modules` and anything in the collection's
+`.gitignore`) don't consume any inotify watches, and their changes don't wake
+the app. When a directory is created the watch is restarted to include it.
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path, PurePosixPath
+from typing import Awaitable, Callable, Iterable, Literal, NamedTuple
+
+from textual import log
+
+ChangeType = Literal["added", "modified", "deleted"]
+
+DEFAULT_IGNORE = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    ".venv/",
+    "venv/",
+    "node_modules/",
+    "__pycache__/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    ".tox/",
+    ".nox/",
+    ".idea/",
+    ".DS_Store",
+    "*.py[cod]",
+    "*.sw[px]",
+    "*~",
+)
+"""Patterns which are always ignored inside watched directories."""
+
+
+class FileChange(NamedTuple):
+    """A change to a file or directory."""
+
+    change: ChangeType
+    path: Path
+
+
+ChangeCallback = Callable[[list[FileChange]], "Awaitable[None] | None"]
+
+
+class IgnoreRules:
+    """Decides whether paths inside a directory are ignored, using a subset of
+    the `.gitignore` syntax.
+
+    Patterns without a slash match the name of a file or directory at any
+    depth, patterns containing a slash match the path relative to the root,
+    and patterns ending in a slash only match directories. Negated patterns
+    aren't supported, and are skipped.
+    """
+
+    def __init__(self, root: Path, patterns: Iterable[str]) -> None:
+        self.root = root
+        self._names: list[tuple[str, bool]] = []
+        self._paths: list[tuple[str, bool]] = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith(("#", "!")):
+                continue
+            directory_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            if "/" in pattern:
+                self._paths.append((pattern.lstrip("/"), directory_only))
+            else:
+                self._names.append((pattern, directory_only))
+
+    @classmethod
+    def for_directory(cls, root: Path, extra_patterns: Iterable[str] = ()) -> IgnoreRules:
+        """Create the rules for a directory from the default patterns, any
+        extra patterns, and the `.gitignore` file in the directory, if present."""
+        patterns = [*DEFAULT_IGNORE, *extra_patterns]
+        try:
+            patterns += (root / ".gitignore").read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            pass
+        return cls(root, patterns)
+
+    def ignores(self, path: Path, is_dir: bool = False) -> bool:
+        """Return True if the path, or any directory containing it, is ignored.
+
+        Args:
+            path: A path inside the root directory.
+            is_dir: Whether the path itself is a directory.
+        """
+        try:
+            parts = PurePosixPath(path.relative_to(self.root).as_posix()).parts
+        except ValueError:
+            return False
+        for depth, name in enumerate(parts, start=1):
+            part_is_dir = is_dir or depth < len(parts)
+            relative = "/".join(parts[:depth])
+            for pattern, directory_only in self._names:
+                if (part_is_dir or not directory_only) and fnmatch(name, pattern):
+                    return True
+            for pattern, directory_only in self._paths:
+                if (part_is_dir or not directory_only) and fnmatch(relative, pattern):
+                    return True
+        return False
+
+
+@dataclass
+class Subscription:
+    """The paths a subscriber is interested in, and the callback to notify it."""
+
+    paths: tuple[Path, ...]
+    callback: ChangeCallback
+    recursive: bool
+    ignore: dict[Path, IgnoreRules]
+
+    def matches(self, path: Path, is_dir: bool = False) -> bool:
+        for watched in self.paths:
+            if path == watched:
+                return True
+            if self.recursive and path.is_relative_to(watched):
+                return not self.ignore[watched].ignores(path, is_dir=is_dir)
+            if not self.recursive and path.parent == watched:
+                return True
+        return False
+
+
+@dataclass
+class WatcherMetrics:
+    """Counters describing the work done by the watcher."""
+
+    watched_paths: int = 0
+    """The number of files and directories currently being watched."""
+    batches: int = 0
+    """The number of times the watcher woke up with changes to dispatch."""
+    events: int = 0
+    """The number of changes dispatched to subscribers."""
+    ignored_events: int = 0
+    """The number of changes discarded by the ignore rules."""
+    restarts: int = 0
+    """The number of times the watch was restarted to add new directories."""
+    cpu_time: float = 0.0
+    """CPU seconds spent filtering and dispatching changes."""
+    started_at: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "watched_paths": self.watched_paths,
+            "batches": self.batches,
+            "events": self.events,
+            "ignored_events": self.ignored_events,
+            "restarts": self.restarts,
+            "cpu_time": round(self.cpu_time, 6),
+            "uptime": round(time.monotonic() - self.started_at, 3),
+        }
+
+
+class FileWatcher:
+    """Watches files and directories for a number of subscribers at once.
+
+    Subscribers are registered with `subscribe` before the watcher is started
+    with `run`, and are called with the changes to their paths after each batch.
+    """
+
+    def __init__(
+        self,
+        debounce: int = 1600,
+        ignore: Iterable[str] = (),
+    ) -> None:
+        """
+        Args:
+            debounce: The maximum time in milliseconds to group changes together
+                for, before dispatching them.
+            ignore: Glob patterns to ignore inside recursively watched directories,
+                in addition to the defaults and any `.gitignore`.
+        """
+        self.debounce = debounce
+        self.ignore = tuple(ignore)
+        self.metrics = WatcherMetrics()
+        self._subscriptions: list[Subscription] = []
+        self._watched: set[Path] = set()
+
+    def subscribe(
+        self,
+        paths: Iterable[Path],
+        callback: ChangeCallback,
+        recursive: bool = False,
+    ) -> None:
+        """Call `callback` with the changes to the given paths.
+
+        Args:
+            paths: Files and directories to watch. Changes to the direct children
+                of a directory are reported.
+            callback: Called with a list of changes after each batch. It may be
+                a coroutine function.
+            recursive: Also watch every directory inside the given directories,
+                except for those which are ignored.
+        """
+        resolved = tuple(Path(path) for path in paths)
+        ignore = {
+            path: IgnoreRules.for_directory(path, self.ignore) for path in resolved
+        }
+        self._subscriptions.append(Subscription(resolved, callback, recursive, ignore))
+
+    def watch_paths(self) -> set[Path]:
+        """Return the files and directories to watch for the current subscriptions."""
+        watched: set[Path] = set()
+        for subscription in self._subscriptions:
+            for path in subscription.paths:
+                if not path.exists():
+                    continue
+                watched.add(path)
+                if subscription.recursive and path.is_dir():
+                    watched.update(self._walk(path, subscription.ignore[path]))
+        return watched
+
+    def _walk(self, root: Path, ignore: IgnoreRules) -> Iterable[Path]:
+        for directory, directory_names, _file_names in os.walk(root):
+            kept = []
+            for name in directory_names:
+                path = Path(directory, name)
+                if not ignore.ignores(path, is_dir=True):
+                    kept.append(name)
+                    yield path
+            # Prune ignored directories, so they're never walked into.
+            directory_names[:] = kept
+
+    def _is_ignored(self, path: Path) -> bool:
+        """Return True if no subscriber is interested in the path.
+
+        The ignore rules of a recursive subscription only apply to that
+        subscription, so a file it ignores (e.g. a `.env` in the collection's
+        `.gitignore`) is still reported to a subscriber which names it."""
+        is_dir = path.is_dir()
+        return not any(
+            subscription.matches(path, is_dir=is_dir)
+            for subscription in self._subscriptions
+        )
+
+    def _watch_filter(self, change: object, path: str) -> bool:
+        if self._is_ignored(Path(path)):
+            self.metrics.ignored_events += 1
+            return False
+        return True
+
+    async def run(self) -> None:
+        """Watch the subscribed paths until cancelled."""
+        from watchfiles import awatch
+
+        while True:
+            self._watched = self.watch_paths()
+            self.metrics.watched_paths = len(self._watched)
+            if not self._watched:
+                return
+            log.debug(f"Watching {len(self._watched)} paths for changes")
+
+            restart = False
+            async with aclosing(
+                awatch(
+                    *self._watched,
+                    watch_filter=self._watch_filter,
+                    debounce=self.debounce,
+                    recursive=False,
+                )
+            ) as batches:
+                async for raw_changes in batches:
+                    started = time.process_time()
+                    changes = [
+                        FileChange(change.raw_str(), Path(path))  # type: ignore[arg-type]
+                        for change, path in raw_changes
+                    ]
+                    changes += self._new_directory_contents(changes)
+                    restart = self._needs_restart(changes)
+                    self.metrics.batches += 1
+                    self.metrics.events += len(changes)
+                    self.metrics.cpu_time += time.process_time() - started
+                    await self.dispatch(changes)
+                    if restart:
+                        break
+            if not restart:
+                return
+            self.metrics.restarts += 1
+
+    async def dispatch(self, changes: list[FileChange]) -> None:
+        """Call each subscriber with the changes to its paths."""
+        for subscription in self._subscriptions:
+            relevant = [change for change in changes if subscription.matches(change.path)]
+            if not relevant:
+                continue
+            started = time.process_time()
+            try:
+                result = subscription.callback(relevant)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as error:
+                log.error(f"Error handling file changes: {error!r}")
+            finally:
+                self.metrics.cpu_time += time.process_time() - started
+
+    def _needs_restart(self, changes: list[FileChange]) -> bool:
+        """Return True if directories have been created or removed, and so the
+        set of directories to watch has changed."""
+        for change, path in changes:
+            if change == "deleted" and path in self._watched:
+                return True
+            if (
+                change == "added"
+                and path not in self._watched
+                and path.is_dir()
+                and any(
+                    subscription.recursive and subscription.matches(path)
+                    for subscription in self._subscriptions
+                )
+            ):
+                return True
+        return False
+
+    def _new_directory_contents(self, changes: list[FileChange]) -> list[FileChange]:
+        """Report the files inside newly created directories as added, as they
+        may have been written before the directory was watched."""
+        contents: list[FileChange] = []
+        for change, path in changes:
+            if change != "added" or path in self._watched or not path.is_dir():
+                continue
+            for directory, directory_names, file_names in os.walk(path):
+                directory_names[:] = [
+                    name
+                    for name in directory_names
+                    if not self._is_ignored(Path(directory, name))
+                ]
+                for name in file_names:
+                    file_path = Path(directory, name)
+                    if not self._is_ignored(file_path):
+                        contents.append(FileChange("added", file_path))
+        return contents
@@ -0,0 +1,291 @@
+"""A prefilter for fuzzy matching large numbers of candidates.
+
+Textual's fuzzy matcher requires the characters of a query to appear in a
+candidate in the same order, and scoring a candidate means searching for every
+way they could be matched. This is too slow to run against tens of thousands
+of candidates on each keystroke.
+
+Each candidate is indexed with two bitsets: the characters it contains, and the
+ordered pairs of characters it contains (i.e. `a` followed, at any distance, by
+`b`). A candidate can only match a query if it contains every character of the
+query, and every pair of consecutive characters of the query in order, which
+can be checked with a couple of integer operations. Only the candidates which
+pass are scored.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Generic, Hashable, Iterable, TypeVar
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 "
+_CODES = {character: code for code, character in enumerate(_ALPHABET)}
+_OTHER = len(_ALPHABET)
+"""The code shared by every character outside the alphabet."""
+_WIDTH = _OTHER + 1
+
+LARGE_POOL_FACTOR = 100
+"""When there are more than this many candidates per result, they're picked
+by length rather than being scored individually."""
+
+
+def _code(character: str) -> int:
+    return _CODES.get(character, _OTHER)
+
+
+def character_bitsets(text: str) -> tuple[int, int]:
+    """Return the bitsets of the characters, and ordered pairs of characters,
+    in some text.
+
+    Matching is case-insensitive, as it is in the command palette.
+    """
+    characters = 0
+    pairs = 0
+    # Walk backwards, so `characters` holds the characters after the current one.
+    for character in reversed(text.lower()):
+        code = _code(character)
+        pairs |= characters << (code * _WIDTH)
+        characters |= 1 << code
+    return characters, pairs
+
+
+def query_bitsets(query: str) -> tuple[int, int]:
+    """Return the characters, and ordered pairs of characters, which a candidate
+    must contain to match a query."""
+    characters = 0
+    pairs = 0
+    previous: int | None = None
+    for character in query.lower():
+        code = _code(character)
+        characters |= 1 << code
+        if previous is not None:
+            pairs |= 1 << (previous * _WIDTH + code)
+        previous = code
+    return characters, pairs
+
+
+class FuzzyIndex(Generic[KeyT]):
+    """Candidates for fuzzy matching, with their bitsets.
+
+    The candidates containing each character are also kept in a set, so the
+    candidates containing every character of a query can be found by
+    intersecting sets, and only those are checked for pairs of characters.
+
+    The candidates for the previous query are remembered, and when the query
+    is extended (as it is when the user types) they're intersected too.
+    """
+
+    def __init__(self) -> None:
+        self._texts: dict[KeyT, str] = {}
+        self._lowercase: dict[KeyT, str] = {}
+        self._characters: dict[KeyT, int] = {}
+        self._pairs: dict[KeyT, int] = {}
+        self._with_character: list[set[KeyT]] = [set() for _ in range(_WIDTH)]
+        self._with_initial: list[set[KeyT]] = [set() for _ in range(_WIDTH)]
+        """The candidates with each character at the start of a word."""
+        self._by_length: list[KeyT] | None = None
+        """Every candidate, shortest first. Built when it's first needed."""
+        self._last_query: str | None = None
+        self._last_pool: set[KeyT] = set()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._texts
+
+    def add(self, key: KeyT, text: str) -> None:
+        """Add (or replace) a candidate."""
+        self.remove(key)
+        characters, pairs = character_bitsets(text)
+        self._texts[key] = text
+        self._lowercase[key] = text.lower()
+        self._characters[key] = characters
+        self._pairs[key] = pairs
+        for code in _codes_in(characters):
+            self._with_character[code].add(key)
+        for code in _initial_codes(text):
+            self._with_initial[code].add(key)
+        self._last_query = None
+        self._by_length = None
+
+    def remove(self, key: KeyT) -> None:
+        """Remove a candidate, if it's present."""
+        if key not in self._texts:
+            return
+        for code in _codes_in(self._characters.pop(key)):
+            self._with_character[code].discard(key)
+        for code in _initial_codes(self._texts.pop(key)):
+            self._with_initial[code].discard(key)
+        del self._lowercase[key]
+        del self._pairs[key]
+        self._last_query = None
+        self._by_length = None
+
+    def update(self, candidates: Iterable[tuple[KeyT, str]]) -> None:
+        """Add a number of candidates."""
+        for key, text in candidates:
+            self.add(key, text)
+
+    def text(self, key: KeyT) -> str:
+        """Return the text of a candidate."""
+        return self._texts[key]
+
+    def candidates(self, query: str) -> list[KeyT]:
+        """Return the keys of the candidates which could match a query.
+
+        Every candidate which matches is returned, but some of those returned
+        may not match, so they should still be scored with the fuzzy matcher.
+        """
+        _, query_pairs = query_bitsets(query)
+        pairs = self._pairs
+        return [
+            key for key in self._pool(query) if pairs[key] & query_pairs == query_pairs
+        ]
+
+    def best(
+        self, query: str, limit: int, include: Iterable[KeyT] = ()
+    ) -> list[KeyT]:
+        """Return the candidates most likely to match a query well, without
+        running the fuzzy matcher.
+
+        Candidates containing the query, particularly at the start of a word,
+        come first, and shorter candidates are preferred to longer ones.
+
+        Args:
+            query: The query.
+            limit: The maximum number of candidates to return.
+            include: Keys to return if they could match the query, even if they
+                wouldn't otherwise be amongst the best (e.g. recently used ones).
+        """
+        pool = self._pool(query)
+        _, query_pairs = query_bitsets(query)
+        pairs = self._pairs
+
+        if len(pool) > limit * LARGE_POOL_FACTOR:
+            best = self._shortest(query, pool, query_pairs, limit)
+        else:
+            lowercase = self._lowercase
+            lowercase_query = query.lower()
+
+            def quick_score(key: KeyT) -> tuple[int, int]:
+                text = lowercase[key]
+                position = text.find(lowercase_query)
+                if position == -1:
+                    tier = 0
+                elif position == 0 or not text[position - 1].isalnum():
+                    tier = 2
+                else:
+                    tier = 1
+                return tier, -len(text)
+
+            candidates = [
+                key for key in pool if pairs[key] & query_pairs == query_pairs
+            ]
+            best = heapq.nlargest(limit, candidates, key=quick_score)
+
+        if include:
+            chosen = set(best)
+            best += [
+                key
+                for key in include
+                if key in pool
+                and key not in chosen
+                and pairs[key] & query_pairs == query_pairs
+            ]
+        return best
+
+    def _pool(self, query: str) -> set[KeyT]:
+        """Return the candidates containing every character of a query.
+
+        The set returned may be shared with the index, so must not be modified.
+        """
+        if not query:
+            return set(self._texts)
+
+        last_query = self._last_query
+        if query == last_query:
+            return self._last_pool
+
+        query_characters, _ = query_bitsets(query)
+        sets = [self._with_character[code] for code in _codes_in(query_characters)]
+        if last_query and query.lower().startswith(last_query.lower()):
+            # Anything which matches the longer query matches the shorter one.
+            sets.append(self._last_pool)
+        sets.sort(key=len)
+        pool = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+        self._last_query = query
+        self._last_pool = pool
+        return pool
+
+    def _shortest(
+        self, query: str, pool: set[KeyT], query_pairs: int, limit: int
+    ) -> list[KeyT]:
+        """Pick the best of a large number of candidates (i.e. for a query of a
+        character or two) without checking every one of them.
+
+        The shortest candidates with the first character of the query at the
+        start of a word are chosen, followed by the shortest of the others.
+        """
+        initial = self._with_initial[_code(query[0].lower())]
+        best = self._first_by_length(pool & initial, query_pairs, limit)
+        if len(best) < limit:
+            chosen = set(best)
+            best += self._first_by_length(
+                pool, query_pairs, limit - len(best), exclude=chosen
+            )
+        return best
+
+    def _first_by_length(
+        self,
+        keys: set[KeyT],
+        query_pairs: int,
+        limit: int,
+        exclude: set[KeyT] | frozenset[KeyT] = frozenset(),
+    ) -> list[KeyT]:
+        """Return the shortest of some candidates which contain the pairs."""
+        pairs = self._pairs
+        if len(keys) <= limit * LARGE_POOL_FACTOR:
+            texts = self._texts
+            matching = [
+                key
+                for key in keys
+                if key not in exclude and pairs[key] & query_pairs == query_pairs
+            ]
+            return heapq.nsmallest(limit, matching, key=lambda key: len(texts[key]))
+
+        # There are enough candidates that walking the shortest first will
+        # find `limit` of them long before reaching the end.
+        if self._by_length is None:
+            texts = self._texts
+            self._by_length = sorted(texts, key=lambda key: len(texts[key]))
+        best: list[KeyT] = []
+        for key in self._by_length:
+            if (
+                key in keys
+                and key not in exclude
+                and pairs[key] & query_pairs == query_pairs
+            ):
+                best.append(key)
+                if len(best) == limit:
+                    break
+        return best
+
+
+def _initial_codes(text: str) -> set[int]:
+    """Return the codes of the characters at the start of each word in some text."""
+    return {
+        _code(character)
+        for position, character in enumerate(text.lower())
+        if character.isalnum() and (position == 0 or not text[position - 1].isalnum())
+    }
+
+
+def _codes_in(characters: int) -> Iterable[int]:
+    """Yield the character codes in a bitset."""
+    while characters:
+        lowest = characters & -characters
+        yield lowest.bit_length() - 1
+        characters ^= lowest
@@ -1,7 +1,10 @@
+import bisect
 import re
+from typing import Container, Iterable
 from rich.highlighter import Highlighter
 from rich.style import Style
-from rich.text import Text
+from rich.text import Span, Text
+from textual.cache import LRUCache
 from textual.widgets import Input
 from posting.themes import UrlStyles, VariableStyles
 
@@ -11,14 +14,31 @@ from posting.variables import (
     find_variables,
     get_variables,
     is_cursor_within_variable,
+    variables_generation,
 )
 
 
 _URL_REGEX = re.compile(r"(?P<protocol>https?)://(?P<base>[^/]+)(?P<path>/[^ ]*)?")
 
+# Match ":name" but not "::name" (escaped literal)
+_PATH_PARAM_REGEX = re.compile(r"(?<!:):([A-Za-z_][A-Za-z0-9_]*)")
+
+
+HIGHLIGHT_CACHE_SIZE = 4
+"""The number of texts whose highlighting is remembered by each highlighter, so
+that re-rendering the same text (e.g. as the cursor moves) is cheap."""
+
+SEGMENT_CACHE_SIZE = 256
+"""The number of path segments whose variables and path parameters are
+remembered by each highlighter."""
+
+HighlightSpan = tuple[int, int, bool]
+"""The start and end of a variable or path parameter, and whether it has a value."""
+
 
 def highlight_url(text: Text, styles: UrlStyles) -> None:
-    for match in _URL_REGEX.finditer(text.plain):
+    plain = text.plain
+    for match in _URL_REGEX.finditer(plain):
         protocol_start, protocol_end = match.span("protocol")
         base_start, base_end = match.span("base")
         separator_start, separator_end = protocol_end, protocol_end + 3
@@ -27,54 +47,131 @@ def highlight_url(text: Text, styles: UrlStyles) -> None:
         text.stylize(styles.separator or "dim b", separator_start, separator_end)
         text.stylize(styles.base or "#00C168", base_start, base_end)
 
-    for index, char in enumerate(text.plain):
-        if char == "/":
-            text.stylize(styles.separator or "dim b", index, index + 1)
+    # Spans are added directly rather than with `stylize`, as there may be
+    # hundreds of separators in a long URL.
+    separator_style = styles.separator or "dim b"
+    index = plain.find("/")
+    separators: list[Span] = []
+    while index != -1:
+        separators.append(Span(index, index + 1, separator_style))
+        index = plain.find("/", index + 1)
+    text.spans.extend(separators)
 
 
-def highlight_variables(text: Text, styles: VariableStyles) -> None:
-    for match in find_variables(text.plain):
-        variable_name, start, end = match
-        if variable_name not in get_variables():
-            text.stylize(Style.parse(styles.unresolved or "dim"), start, end)
-        else:
-            text.stylize(Style.parse(styles.resolved or ""), start, end)
+def variable_spans(text: str) -> list[HighlightSpan]:
+    """Return the spans of the variables in some text."""
+    variables = get_variables()
+    return [
+        (start, end, variable_name in variables)
+        for variable_name, start, end in find_variables(text)
+    ]
 
 
-# Match ":name" but not "::name" (escaped literal)
-_PATH_PARAM_REGEX = re.compile(r"(?<!:):([A-Za-z_][A-Za-z0-9_]*)")
+def path_param_spans(text: str, has_value: Container[str]) -> list[HighlightSpan]:
+    """Return the spans of the path parameters (e.g. `:id`) in some text."""
+    return [
+        (*match.span(0), match.group(1) in has_value)
+        for match in _PATH_PARAM_REGEX.finditer(text)
+    ]
+
+
+def stylize_spans(
+    text: Text, spans: Iterable[HighlightSpan], styles: VariableStyles
+) -> None:
+    resolved = Style.parse(styles.resolved or "")
+    unresolved = Style.parse(styles.unresolved or "dim")
+    text.spans.extend(
+        [
+            Span(start, end, resolved if has_value else unresolved)
+            for start, end, has_value in spans
+        ]
+    )
+
+
+def highlight_variables(text: Text, styles: VariableStyles) -> None:
+    stylize_spans(text, variable_spans(text.plain), styles)
 
 
 def highlight_path_params(
     text: Text, styles: VariableStyles, has_value: set[str]
 ) -> None:
-    for match in _PATH_PARAM_REGEX.finditer(text.plain):
-        name = match.group(1)
-        start, end = match.span(0)
-        if name in has_value:
-            text.stylize(Style.parse(styles.resolved or ""), start, end)
+    stylize_spans(text, path_param_spans(text.plain, has_value), styles)
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    # Binary search, so the strings are compared in C rather than a character
+    # at a time in Python.
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix_length(a: str, b: str, prefix: int) -> int:
+    """Return the length of the common suffix which doesn't overlap the prefix."""
+    low, high = 0, min(len(a), len(b)) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle :] == b[len(b) - middle :]:
+            low = middle
         else:
-            text.stylize(Style.parse(styles.unresolved or "dim"), start, end)
+            high = middle - 1
+    return low
 
 
 class VariableHighlighter(Highlighter):
     def __init__(self, variable_styles: VariableStyles | None = None) -> None:
         super().__init__()
         self.variable_styles = variable_styles
+        self._spans: LRUCache[tuple[str, int], list[HighlightSpan]] = LRUCache(
+            HIGHLIGHT_CACHE_SIZE
+        )
 
     def highlight(self, text: Text) -> None:
         if self.variable_styles is None:
             return
-        highlight_variables(text, self.variable_styles)
+        plain = text.plain
+        if "$" not in plain:
+            return
+        key = (plain, variables_generation())
+        spans = self._spans.get(key)
+        if spans is None:
+            spans = variable_spans(plain)
+            self._spans.set(key, spans)
+        stylize_spans(text, spans, self.variable_styles)
 
 
 class VariablesAndUrlHighlighter(Highlighter):
+    """Highlights the URL, variables and path parameters in the URL bar.
+
+    The URL is highlighted on every render, but the variables and path
+    parameters are found separately in each segment of the path (they can't
+    contain a `/`). When the URL is edited, the spans of the previous version
+    are kept for the segments before and after the edit, and only the edited
+    segments are searched again. The spans of each segment are also cached.
+    """
+
     def __init__(self, input: Input) -> None:
         super().__init__()
         self.input = input
         self.variable_styles: VariableStyles = VariableStyles()
         self.url_styles: UrlStyles = UrlStyles()
         self._path_params: dict[str, str] = {}
+        self._params_with_value: frozenset[str] = frozenset()
+        self._spans: LRUCache[tuple[str, int, frozenset[str]], list[HighlightSpan]] = (
+            LRUCache(HIGHLIGHT_CACHE_SIZE)
+        )
+        self._segment_spans: LRUCache[
+            tuple[str, int, frozenset[str]], list[HighlightSpan]
+        ] = LRUCache(SEGMENT_CACHE_SIZE)
+        self._previous: (
+            tuple[tuple[str, int, frozenset[str]], list[HighlightSpan]] | None
+        ) = None
+        """The key and spans of the last text highlighted, to update on edits."""
 
     def set_path_params(self, params: dict[str, str]) -> None:
         """Update the current path params used for highlighting.
@@ -83,17 +180,85 @@ class VariablesAndUrlHighlighter(Highlighter):
             params: Mapping of placeholder name to value (empty string if unset).
         """
         self._path_params = dict(params)
+        self._params_with_value = frozenset(
+            name for name, value in params.items() if value
+        )
+
+    def spans(self, plain: str) -> list[HighlightSpan]:
+        """Return the spans of the variables and path parameters in the URL,
+        sorted by their position."""
+        key = (plain, variables_generation(), self._params_with_value)
+        spans = self._spans.get(key)
+        if spans is not None:
+            return spans
+
+        previous = self._previous
+        if previous is not None and previous[0][1:] == key[1:]:
+            spans = self._respan(previous[0][0], previous[1], plain)
+        else:
+            spans = self._spans_between(plain, 0, len(plain))
+        self._spans.set(key, spans)
+        self._previous = (key, spans)
+        return spans
+
+    def _respan(
+        self, old: str, old_spans: list[HighlightSpan], new: str
+    ) -> list[HighlightSpan]:
+        """Update the spans of the previous text for an edit, only searching
+        the path segments which were edited."""
+        prefix = _common_prefix_length(old, new)
+        suffix = _common_suffix_length(old, new, prefix)
+        # Widen the edited region to whole segments.
+        start = new.rfind("/", 0, prefix) + 1
+        old_end = old.find("/", len(old) - suffix)
+        old_end = len(old) if old_end == -1 else old_end
+        shift = len(new) - len(old)
+
+        before = bisect.bisect_right(old_spans, start, key=lambda span: span[1])
+        after = bisect.bisect_left(old_spans, old_end, key=lambda span: span[0])
+        return [
+            *old_spans[:before],
+            *self._spans_between(new, start, old_end + shift),
+            *[
+                (span_start + shift, span_end + shift, has_value)
+                for span_start, span_end, has_value in old_spans[after:]
+            ],
+        ]
+
+    def _spans_between(self, plain: str, start: int, end: int) -> list[HighlightSpan]:
+        """Return the spans in the segments between two positions, which must
+        be at the start and end of segments."""
+        spans: list[HighlightSpan] = []
+        offset = start
+        for segment in plain[start:end].split("/"):
+            if "$" in segment or ":" in segment:
+                spans.extend(
+                    (span_start + offset, span_end + offset, has_value)
+                    for span_start, span_end, has_value in self._spans_in_segment(
+                        segment
+                    )
+                )
+            offset += len(segment) + 1
+        return spans
+
+    def _spans_in_segment(self, segment: str) -> list[HighlightSpan]:
+        key = (segment, variables_generation(), self._params_with_value)
+        spans = self._segment_spans.get(key)
+        if spans is None:
+            spans = sorted(
+                variable_spans(segment)
+                + path_param_spans(segment, self._params_with_value)
+            )
+            self._segment_spans.set(key, spans)
+        return spans
 
     def highlight(self, text: Text) -> None:
-        if text.plain == "":
+        plain = text.plain
+        if plain == "":
             return
 
         highlight_url(text, self.url_styles)
-        highlight_variables(text, self.variable_styles)
-
-        # Highlight path parameters based on current values provided externally.
-        has_value = {name for name, value in self._path_params.items() if value}
-        highlight_path_params(text, self.variable_styles, has_value)
+        stylize_spans(text, self.spans(plain), self.variable_styles)
 
         input = self.input
         cursor_position = input.cursor_position  # type:ignore
@@ -0,0 +1,206 @@
+"""A pool of long-lived httpx clients, shared across requests sent from Posting.
+
+Creating a new `httpx.AsyncClient` for every request means paying for a fresh
+TCP connection, TLS handshake and CA bundle load each time. Instead, clients
+are kept alive for the duration of the session and keyed by the configuration
+which httpx only allows to be set at the client level, so that keep-alive
+connections can be reused between sends.
+"""
+
+from __future__ import annotations
+
+import os
+import ssl
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import NamedTuple
+
+import httpx
+
+from posting.config import CertificateSettings, HttpSettings
+from posting.version import VERSION
+
+
+class SSLContextKey(NamedTuple):
+    """Everything which affects the construction of an SSL context.
+
+    The modification time of the CA bundle is included so that the context
+    is rebuilt if the bundle is updated on disk."""
+
+    verify: bool
+    ca_bundle: str | None
+    ca_bundle_mtime: float | None
+    certificate_path: str | None
+    key_file: str | None
+    password: str | None
+
+
+_SSL_CONTEXTS: dict[SSLContextKey, ssl.SSLContext] = {}
+
+
+def get_ssl_context(verify: bool, settings: CertificateSettings) -> ssl.SSLContext:
+    """Return an SSL context for the given verification flag and SSL settings.
+
+    Loading a CA bundle and client certificate is expensive, so contexts are
+    cached for the lifetime of the process and shared by every client.
+
+    Args:
+        verify: Whether the server's certificate should be verified.
+        settings: The SSL settings (CA bundle and client certificate).
+
+    Returns:
+        The (possibly cached) SSL context.
+    """
+    ca_bundle = settings.ca_bundle if verify else None
+    try:
+        ca_bundle_mtime = os.stat(ca_bundle).st_mtime if ca_bundle else None
+    except OSError:
+        ca_bundle_mtime = None
+
+    password = settings.password.get_secret_value() if settings.password else None
+    key = SSLContextKey(
+        verify,
+        ca_bundle,
+        ca_bundle_mtime,
+        settings.certificate_path,
+        settings.key_file,
+        password,
+    )
+    if (context := _SSL_CONTEXTS.get(key)) is not None:
+        return context
+
+    if ca_bundle is not None:
+        if os.path.isdir(ca_bundle):
+            context = ssl.create_default_context(capath=ca_bundle)
+        else:
+            context = ssl.create_default_context(cafile=ca_bundle)
+    else:
+        context = httpx.create_ssl_context(verify=verify)
+
+    if settings.certificate_path:
+        context.load_cert_chain(settings.certificate_path, settings.key_file, password)
+
+    # Allow the server to issue session tickets, so that connections made
+    # using this context can resume a previous TLS session.
+    context.options &= ~ssl.OP_NO_TICKET
+
+    _SSL_CONTEXTS[key] = context
+    return context
+
+
+class ClientKey(NamedTuple):
+    """The client-level configuration which distinguishes one pooled client
+    from another. Requests which share a key share a client (and therefore
+    its connection pool)."""
+
+    verify: ssl.SSLContext
+    proxy: str | None
+    timeout: float
+    http2: bool
+
+
+def _cookie_jar() -> CookieJar:
+    """Return a cookie jar which never stores cookies, for a pooled client.
+
+    Pooled clients are shared between concurrent sends, so they mustn't hold
+    any cookie state. Cookies are carried between the redirects of a single
+    send by `send_request` instead."""
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+class ClientPool:
+    """A collection of `httpx.AsyncClient`s which live for the session."""
+
+    def __init__(self, settings: HttpSettings) -> None:
+        self._limits = httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        )
+        self._clients: dict[ClientKey, httpx.AsyncClient] = {}
+
+    def get_client(
+        self,
+        *,
+        verify: ssl.SSLContext,
+        proxy: str | None,
+        timeout: float,
+        http2: bool = False,
+    ) -> httpx.AsyncClient:
+        """Return the client for the given configuration, creating it if required.
+
+        Cookies are managed by Posting itself (and attached to each request
+        via the request model), so the returned client never stores cookies.
+        Send requests with `send_request` to carry cookies across redirects.
+        """
+        key = ClientKey(verify, proxy or None, timeout, http2)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                verify=key.verify,
+                proxy=key.proxy,
+                timeout=key.timeout,
+                limits=self._limits,
+                http2=key.http2,
+                cookies=_cookie_jar(),
+            )
+            self._clients[key] = client
+        return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def aclose(self) -> None:
+        """Close all clients in the pool, and their underlying connections."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+async def send_request(
+    client: httpx.AsyncClient,
+    request: httpx.Request,
+    *,
+    auth: httpx.Auth | None,
+    follow_redirects: bool,
+) -> httpx.Response:
+    """Send a request with a pooled client, streaming the response.
+
+    Redirects are followed here rather than by httpx, so that cookies set by
+    responses along the way are sent with the following requests, as they
+    would be by a new client, without being stored in the shared client.
+
+    Returns:
+        The final response, whose body hasn't been read yet.
+    """
+    cookies = httpx.Cookies()
+    history: list[httpx.Response] = []
+    while True:
+        response = await client.send(
+            request, auth=auth, follow_redirects=False, stream=True
+        )
+        cookies.extract_cookies(response)
+        next_request = response.next_request
+        if not follow_redirects or next_request is None:
+            response.history = history
+            return response
+
+        await response.aread()
+        if len(history) >= client.max_redirects:
+            raise httpx.TooManyRedirects(
+                "Exceeded maximum allowed redirects.", request=next_request
+            )
+        history.append(response)
+        cookies.set_cookie_header(next_request)
+        request = next_request
+        # As with httpx, authentication only applies to the first request.
+        auth = None
+
+
+def set_default_user_agent(request: httpx.Request) -> None:
+    """Identify requests as coming from Posting, unless the user has
+    explicitly set their own `User-Agent` header."""
+    if "User-Agent" not in request.headers or request.headers.get(
+        "user-agent", ""
+    ).startswith("python-httpx"):
+        request.headers["User-Agent"] = f"Posting/{VERSION} (Terminal-based API client)"
@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from xdg_base_dirs import xdg_config_home, xdg_data_home
+from xdg_base_dirs import xdg_cache_home, xdg_config_home, xdg_data_home
 
 
 def _posting_directory(root: Path) -> Path:
@@ -33,3 +33,15 @@ def config_directory() -> Path:
 
 def config_file() -> Path:
     return config_directory() / "config.yaml"
+
+
+def cache_directory() -> Path:
+    """Return (possibly creating) the application cache directory."""
+    return _posting_directory(xdg_cache_home())
+
+
+def collection_index_directory() -> Path:
+    """Return (possibly creating) the directory collection indexes are stored in."""
+    index_dir = cache_directory() / "collections"
+    index_dir.mkdir(exist_ok=True, parents=True)
+    return index_dir
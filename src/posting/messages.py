@@ -6,3 +6,25 @@ from textual.message import Message
 @dataclass
 class HttpResponseReceived(Message):
     response: Response
+
+
+@dataclass
+class HttpResponseStreamStarted(Message):
+    """Posted when the status and headers of a streamed response arrive,
+    before the body has been received."""
+
+    response: Response
+
+
+@dataclass
+class HttpResponseStreamChunk(Message):
+    """Posted as the body of a streamed response arrives."""
+
+    text: str
+    """The newly received (decoded) text."""
+
+    bytes_received: int
+    """The total number of body bytes received so far."""
+
+    elapsed: float
+    """Seconds since the response headers were received."""
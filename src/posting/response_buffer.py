@@ -0,0 +1,174 @@
+"""Buffering of response bodies, spilling large bodies to disk.
+
+Bodies above a configurable size are written to a temporary file as they're
+received, and exposed through a read-only memory mapping. The pages of the
+mapping are backed by the file rather than by Posting's heap, so the OS is
+free to evict them, and the viewer, pager and clipboard can all read from the
+same mapping rather than each holding their own copy of the body.
+
+The body of a response read by `read_response` is held alongside the
+response rather than in it, and read via `response_body` and `response_text`.
+Scripts are given a copy of the response made by `buffered_response`, whose
+`content` is the usual `bytes`.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import tempfile
+import weakref
+from typing import IO, Callable, Union
+
+import httpx
+
+ResponseContent = Union[bytes, mmap.mmap]
+"""The content of a response, either in memory or mapped from disk."""
+
+_SPILL_PATHS: weakref.WeakKeyDictionary[mmap.mmap, str] = weakref.WeakKeyDictionary()
+_BODIES: weakref.WeakKeyDictionary[httpx.Response, ResponseContent] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class ResponseBodyBuffer:
+    """Accumulates the chunks of a response body.
+
+    Chunks are held in memory until the size of the body exceeds
+    `spill_threshold`, at which point they're moved to a temporary file,
+    and all subsequent chunks are written straight to that file.
+    """
+
+    def __init__(self, spill_threshold: int | None) -> None:
+        self.spill_threshold = spill_threshold
+        self.size = 0
+        self._chunks: list[bytes] = []
+        self._file: IO[bytes] | None = None
+
+    @property
+    def spilled(self) -> bool:
+        """True if the body has been written to disk."""
+        return self._file is not None
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self._file is not None:
+            self._file.write(chunk)
+            return
+
+        self._chunks.append(chunk)
+        if self.spill_threshold is not None and self.size > self.spill_threshold:
+            self._file = tempfile.NamedTemporaryFile(
+                prefix="posting-response-", delete=False
+            )
+            self._file.writelines(self._chunks)
+            self._chunks.clear()
+
+    def getvalue(self) -> ResponseContent:
+        """Return the complete body, as bytes or as a read-only mapping of the
+        file it was spilled to.
+
+        The file is deleted once the mapping has been garbage collected."""
+        if self._file is None:
+            return b"".join(self._chunks)
+
+        file = self._file
+        file.flush()
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # The mapping remains valid after the file is closed.
+        file.close()
+        _SPILL_PATHS[mapping] = file.name
+        weakref.finalize(mapping, _remove_file, file.name)
+        return mapping
+
+    def close(self) -> None:
+        """Discard the body, removing any file it was spilled to."""
+        self._chunks.clear()
+        if self._file is not None:
+            self._file.close()
+            _remove_file(self._file.name)
+            self._file = None
+
+
+async def read_response(
+    response: httpx.Response,
+    spill_threshold: int | None,
+    on_chunk: Callable[[bytes, int], None] | None = None,
+) -> None:
+    """Read the body of a response sent with `stream=True`, then close it.
+
+    Bodies larger than `spill_threshold` are spilled to disk. Once this
+    returns, the body is available via `response_body` and `response_text`,
+    and via `buffered_response` for code expecting `response.content`.
+
+    Args:
+        response: The response to read the body of.
+        spill_threshold: The size in bytes above which the body is spilled to disk.
+        on_chunk: Called with each chunk of the body, and the number of bytes
+            received so far, as they arrive.
+    """
+    body = ResponseBodyBuffer(spill_threshold)
+    try:
+        async for chunk in response.aiter_bytes():
+            body.write(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk, body.size)
+    except BaseException:
+        body.close()
+        raise
+    finally:
+        await response.aclose()
+
+    _BODIES[response] = body.getvalue()
+
+
+def response_body(response: httpx.Response) -> ResponseContent:
+    """Return the body of a response read by `read_response`.
+
+    If the body was spilled to disk, this is the mapping of the file,
+    so reading it doesn't copy the body into memory. Responses which
+    weren't streamed return their `content`."""
+    body = _BODIES.get(response)
+    return response.content if body is None else body
+
+
+def response_text(response: httpx.Response) -> str:
+    """Return the body of a response read by `read_response`, decoded in
+    the same way as `response.text`."""
+    body = response_body(response)
+    return body[:].decode(response.encoding or "utf-8", errors="replace")
+
+
+def buffered_response(response: httpx.Response) -> httpx.Response:
+    """Return a copy of a response read by `read_response`, with its body
+    loaded into memory, for code (e.g. scripts) expecting `response.content`.
+    """
+    body = response_body(response)
+    buffered = httpx.Response(
+        response.status_code,
+        content=body[:],
+        request=response.request,
+        extensions=response.extensions,
+        history=response.history,
+        default_encoding=response.default_encoding,
+    )
+    # The body has already been decoded, so the original headers (which may
+    # include a `Content-Encoding`) are only restored once it's been loaded.
+    buffered.headers = response.headers
+    buffered.elapsed = response.elapsed
+    return buffered
+
+
+def spill_path(content: ResponseContent) -> str | None:
+    """Return the path of the file backing spilled content, or None if the
+    content is held in memory."""
+    if isinstance(content, mmap.mmap):
+        return _SPILL_PATHS.get(content)
+    return None
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
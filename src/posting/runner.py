@@ -0,0 +1,297 @@
+"""Run requests from a collection without the TUI, via `posting run`.
+
+Requests go through the same steps as they do when sent from the TUI: the
+setup script, templating using the loaded environment, the on_request script,
+sending via a pooled client, and the on_response script. A result is written
+as a single line of JSON as soon as each request completes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Any, Iterable, Literal
+
+import httpx
+from textual.notifications import SeverityLevel
+
+from posting.collection import (
+    Collection,
+    Cookie,
+    RequestModel,
+    RequestSummary,
+)
+from posting.config import SETTINGS
+from posting.http_client import (
+    ClientPool,
+    get_ssl_context,
+    send_request,
+    set_default_user_agent,
+)
+from posting.response_buffer import (
+    buffered_response,
+    read_response,
+    response_body,
+)
+from posting.scripts import (
+    Posting as PostingContext,
+    call_script_function,
+    execute_script,
+    parse_script_path,
+)
+from posting.variables import get_variables
+
+ScriptStatus = Literal["success", "error", "no-script"]
+
+
+@dataclass
+class RunResult:
+    """The outcome of running a single request."""
+
+    name: str
+    path: str | None
+    method: str
+    url: str
+    status: int | None = None
+    reason: str | None = None
+    http_version: str | None = None
+    size: int | None = None
+    """The size of the response body in bytes."""
+    elapsed_ms: float | None = None
+    """The time from sending the request to receiving the whole response."""
+    timings: dict[str, float] = field(default_factory=dict)
+    """Milliseconds spent in each phase of the request, from the httpx trace."""
+    scripts: dict[str, ScriptStatus] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and "error" not in self.scripts.values()
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+class RequestTimings:
+    """Collects the duration of each phase of a request from httpx trace events.
+
+    Phases are named after the httpcore events with the protocol prefix removed,
+    e.g. `connect_tcp`, `start_tls` and `receive_response_headers`.
+    """
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+        self._started: dict[str, float] = {}
+
+    async def trace(self, event_name: str, info: dict[str, Any]) -> None:
+        now = time.perf_counter()
+        base, _, stage = event_name.rpartition(".")
+        phase = base.rpartition(".")[2]
+        if stage == "started":
+            self._started[phase] = now
+        elif stage in {"complete", "failed"} and phase in self._started:
+            elapsed = (now - self._started.pop(phase)) * 1000
+            self.durations[phase] = round(self.durations.get(phase, 0) + elapsed, 3)
+
+
+class HeadlessHost:
+    """Stands in for the Posting app when running scripts outside the TUI.
+
+    Session variables behave as they do in the TUI, and notifications
+    are written to stderr rather than displayed as toasts.
+    """
+
+    def __init__(self, error_stream: IO[str]) -> None:
+        self.session_env: dict[str, object] = {}
+        self._error_stream = error_stream
+
+    def notify(
+        self,
+        message: str,
+        *,
+        title: str = "",
+        severity: SeverityLevel = "information",
+        timeout: float | None = None,
+    ) -> None:
+        prefix = f"[{severity}] {title}: " if title else f"[{severity}] "
+        print(f"{prefix}{message}", file=self._error_stream)
+
+
+def iter_requests(collection: Collection) -> Iterable[RequestModel]:
+    """Yield the requests of a collection and its sub-collections, depth first.
+
+    Requests are loaded in full if the collection was loaded lazily."""
+    for request in collection.requests:
+        yield request.load() if isinstance(request, RequestSummary) else request
+    for child in collection.children:
+        yield from iter_requests(child)
+
+
+class CollectionRunner:
+    """Sends requests from a collection, with a limit on how many are in flight."""
+
+    def __init__(
+        self,
+        collection_root: Path,
+        concurrency: int = 1,
+        output: IO[str] | None = None,
+        error_stream: IO[str] | None = None,
+    ) -> None:
+        self.collection_root = collection_root
+        self.concurrency = concurrency
+        self.output = output or sys.stdout
+        self.error_stream = error_stream or sys.stderr
+        self.host = HeadlessHost(self.error_stream)
+        self.cookies = httpx.Cookies()
+        """Cookies received during the run, attached to later requests
+        in the same way as the TUI does."""
+
+    async def run(self, requests: Iterable[RequestModel]) -> list[RunResult]:
+        """Run the requests, writing a line of JSON for each as it completes.
+
+        Returns:
+            The results, in the order the requests were given.
+        """
+        settings = SETTINGS.get()
+        client_pool = ClientPool(settings.http)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(request_model: RequestModel) -> RunResult:
+            async with semaphore:
+                result = await self.run_request(request_model, client_pool)
+            self.output.write(result.to_json() + "\n")
+            self.output.flush()
+            return result
+
+        try:
+            return await asyncio.gather(
+                *(run_one(request.model_copy(deep=True)) for request in requests)
+            )
+        finally:
+            await client_pool.aclose()
+
+    async def run_request(
+        self,
+        request_model: RequestModel,
+        client_pool: ClientPool,
+        run_setup: bool = True,
+    ) -> RunResult:
+        """Send a single request, running its scripts, and return the result.
+
+        Args:
+            request_model: The request to send. It's modified by templating.
+            client_pool: The pool to take the client from.
+            run_setup: Whether to run the request's setup script.
+        """
+        result = RunResult(
+            name=request_model.name,
+            path=str(request_model.path) if request_model.path else None,
+            method=request_model.method,
+            url=request_model.url,
+        )
+        script_context = PostingContext(self.host)  # type: ignore[arg-type]
+        scripts = request_model.scripts
+        try:
+            if run_setup:
+                result.scripts["setup"] = self._run_script(
+                    scripts.setup, "setup", script_context
+                )
+
+            request_model.apply_template(get_variables())
+            result.url = request_model.url
+            request_model.add_content_type_header()
+            if request_model.options.attach_cookies:
+                request_model.cookies = Cookie.from_httpx(self.cookies)
+
+            options = request_model.options
+            client = client_pool.get_client(
+                verify=get_ssl_context(options.verify_ssl, SETTINGS.get().ssl),
+                proxy=options.proxy_url or None,
+                timeout=options.timeout,
+                http2=options.http2,
+            )
+            script_context.request = request_model
+            result.scripts["on_request"] = self._run_script(
+                scripts.on_request, "on_request", request_model, script_context
+            )
+
+            timings = RequestTimings()
+            request = request_model.to_httpx(client)
+            request.extensions = {"trace": timings.trace}
+            set_default_user_agent(request)
+
+            start = time.perf_counter()
+            response = await send_request(
+                client,
+                request,
+                auth=request_model.auth.to_httpx_auth() if request_model.auth else None,
+                follow_redirects=options.follow_redirects,
+            )
+            await read_response(
+                response, SETTINGS.get().response.spill_to_disk_threshold
+            )
+            result.elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+            result.status = response.status_code
+            result.reason = response.reason_phrase
+            result.http_version = response.http_version
+            result.size = len(response_body(response))
+            result.timings = timings.durations
+            self.cookies.update(response.cookies)
+
+            if scripts.on_response:
+                response = buffered_response(response)
+            script_context.response = response
+            result.scripts["on_response"] = self._run_script(
+                scripts.on_response, "on_response", response, script_context
+            )
+        except httpx.TimeoutException as error:
+            result.error = f"{type(error).__name__}: timed out after {request_model.options.timeout} seconds"
+        except Exception as error:
+            result.error = f"{type(error).__name__}: {error}"
+
+        return result
+
+    def run_setup_script(self, request_model: RequestModel) -> ScriptStatus:
+        """Run the setup script of a request, if it has one."""
+        return self._run_script(
+            request_model.scripts.setup,
+            "setup",
+            PostingContext(self.host),  # type: ignore[arg-type]
+        )
+
+    def _run_script(
+        self, path_to_script: str | None, default_function_name: str, *args: Any
+    ) -> ScriptStatus:
+        """Run a script, if there is one.
+
+        Script output goes to stderr, so that it doesn't interleave
+        with the results written to stdout."""
+        if not path_to_script:
+            return "no-script"
+
+        script_path, function_name = parse_script_path(
+            path_to_script, default_function_name
+        )
+        try:
+            script_function = execute_script(
+                self.collection_root, script_path, function_name
+            )
+            if script_function is None:
+                raise FileNotFoundError(
+                    f"The {function_name} script at {script_path} could not be found."
+                )
+            with redirect_stdout(self.error_stream):
+                call_script_function(script_function, *args)
+        except Exception as error:
+            self.host.notify(
+                f"{error}",
+                title=f"Error running {function_name} script",
+                severity="error",
+            )
+            return "error"
+        return "success"
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import inspect
 import sys
 from pathlib import Path
 from types import ModuleType
@@ -10,7 +11,7 @@ from httpx import Response
 from textual.notifications import SeverityLevel
 
 from posting.collection import RequestModel
-from posting.variables import get_variables, update_variables
+from posting.variables import get_variables, set_session_variables, update_variables
 
 if TYPE_CHECKING:
     from posting.app import Posting as PostingApp
@@ -40,7 +41,7 @@ class Posting:
         This includes variables loaded from the environment and
         any variables that have been set in scripts for this session.
         """
-        return get_variables()
+        return dict(get_variables())
 
     def get_variable(self, name: str, default: object | None = None) -> object | None:
         """Get a session variable. This doesn't include variables set via environment files
@@ -66,7 +67,7 @@ class Posting:
             value: The value of the variable to set.
         """
         self._app.session_env[name] = value
-        update_variables(self._app.session_env)
+        update_variables({name: value})
 
     def clear_variable(self, name: str) -> None:
         """Clear a session variable.
@@ -76,12 +77,12 @@ class Posting:
         """
         if name in self._app.session_env:
             del self._app.session_env[name]
-            update_variables(self._app.session_env)
+            set_session_variables(self._app.session_env)
 
     def clear_all_variables(self) -> None:
         """Clear all session variables."""
         self._app.session_env.clear()
-        update_variables(self._app.session_env)
+        set_session_variables(self._app.session_env)
 
     def notify(
         self,
@@ -118,6 +119,33 @@ def clear_module_cache():
         _MODULE_CACHE.clear()
 
 
+def parse_script_path(
+    path_to_script: str, default_function_name: str
+) -> tuple[Path, str]:
+    """Split a script reference such as `scripts/auth.py:login` into the
+    path to the script and the name of the function to call.
+
+    Args:
+        path_to_script: The path to the script, optionally followed by a colon
+            and the name of the function.
+        default_function_name: The function name to use if not specified in the path.
+    """
+    path_name_parts = path_to_script.split(":")
+    if len(path_name_parts) == 2:
+        return Path(path_name_parts[0]), path_name_parts[1]
+    return Path(path_to_script), default_function_name
+
+
+def call_script_function(script_function: Callable[..., Any], *args: Any) -> None:
+    """Call a function from a script, passing only as many of `args` as
+    the function has parameters, in order."""
+    num_params = len(inspect.signature(script_function).parameters)
+    if num_params > 0:
+        script_function(*args[:num_params])
+    else:
+        script_function()
+
+
 def execute_script(
     collection_root: Path, script_path: Path, function_name: str
 ) -> Callable[..., Any] | None:
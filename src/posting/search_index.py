@@ -0,0 +1,296 @@
+"""A full-text index of the requests in a collection, used by request search.
+
+Each request is split into tokens from its name, URL, method, description,
+headers and body. Tokens are weighted by the field they came from, so a match
+in the name of a request outranks a match in its body, and rarer tokens count
+for more than common ones (e.g. `https`).
+
+The index is updated a request at a time as requests are saved or change on
+disk, rather than being rebuilt.
+
+The names of requests are also kept in a `FuzzyIndex`, so that they can be
+fuzzy matched as they are in the command palette, and requests which are opened
+often and recently are ranked above others.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from posting.collection import RequestModel
+from posting.fuzzy import FuzzyIndex
+
+FIELD_WEIGHTS = {
+    "name": 8.0,
+    "url": 4.0,
+    "method": 2.0,
+    "description": 2.0,
+    "headers": 1.0,
+    "body": 1.0,
+}
+"""How much a token in each field of a request counts towards its score."""
+
+FIELD_WEIGHTS_DESCENDING = sorted(
+    FIELD_WEIGHTS.items(), key=lambda item: item[1], reverse=True
+)
+
+RECENT_BOOST = 0.5
+"""How much being opened often and recently can raise the score of a request,
+as a fraction of its score."""
+
+MAX_FIELD_LENGTH = 10_000
+"""Only the start of very long fields (usually bodies) is indexed."""
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    return _TOKEN.findall(text[:MAX_FIELD_LENGTH].lower())
+
+
+def search_fields(data: dict[str, Any]) -> dict[str, str]:
+    """Return the searchable text of a request, from the data in its file."""
+
+    def key_values(items: Any) -> str:
+        if not isinstance(items, list):
+            return ""
+        return " ".join(
+            f"{item.get('name', '')} {item.get('value', '')}"
+            for item in items
+            if isinstance(item, dict)
+        )
+
+    body = data.get("body")
+    body_text = ""
+    if isinstance(body, dict):
+        body_text = f"{body.get('content') or ''} {key_values(body.get('form_data'))}"
+    return {
+        "name": str(data.get("name") or ""),
+        "url": str(data.get("url") or ""),
+        "method": str(data.get("method") or "GET"),
+        "description": str(data.get("description") or ""),
+        "headers": key_values(data.get("headers")),
+        "body": body_text,
+    }
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    path: Path
+    name: str
+    score: float
+    """The relevance of the request to the query, between 0 and 1."""
+
+
+class RecentRequests:
+    """Ranks requests by how often and how recently they've been opened.
+
+    Each time a request is opened its score is increased, and the increase
+    grows with every request opened, so recent opens count for more than old
+    ones without the scores needing to decay.
+    """
+
+    GROWTH = 1.1
+    """How much more each open counts for than the one before it."""
+
+    def __init__(self) -> None:
+        self._scores: dict[Path, float] = {}
+        self._increment = 1.0
+        self._maximum = 0.0
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._scores
+
+    def record(self, path: Path) -> None:
+        """Record that a request has been opened."""
+        score = self._scores.get(path, 0.0) + self._increment
+        self._scores[path] = score
+        self._maximum = max(self._maximum, score)
+        self._increment *= self.GROWTH
+        if self._increment > 1e100:
+            # Scale everything down before the scores overflow.
+            self._scores = {path: score / 1e100 for path, score in self._scores.items()}
+            self._increment /= 1e100
+            self._maximum /= 1e100
+
+    def remove(self, path: Path) -> None:
+        """Forget a request, e.g. because it was deleted."""
+        if self._scores.pop(path, None) is not None:
+            self._maximum = max(self._scores.values(), default=0.0)
+
+    def boost(self, path: Path) -> float:
+        """Return the score of a request relative to the top one, between 0 and 1."""
+        if not self._maximum:
+            return 0.0
+        return self._scores.get(path, 0.0) / self._maximum
+
+    def most_recent(self, limit: int | None = None) -> list[Path]:
+        """Return the opened requests, highest scoring first."""
+        ranked = sorted(self._scores, key=self._scores.__getitem__, reverse=True)
+        return ranked if limit is None else ranked[:limit]
+
+    def boosted(self, path: Path, score: float) -> float:
+        """Raise the score of a request by how often and recently it was opened."""
+        return score * (1 + RECENT_BOOST * self.boost(path)) / (1 + RECENT_BOOST)
+
+
+class RequestSearchIndex:
+    """An inverted index from tokens to the requests containing them."""
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[int, float]] = {}
+        """For each token, the IDs of the requests containing it and the weight
+        of the token in each request."""
+        self._documents: dict[int, dict[str, float]] = {}
+        """The tokens of each request, so that they can be removed."""
+        self._ids: dict[Path, int] = {}
+        self._paths: dict[int, Path] = {}
+        self._names: dict[int, str] = {}
+        self._next_id = 0
+        self._vocabulary: list[str] = []
+        """Every token, sorted, for finding the tokens starting with a prefix."""
+        self.names: FuzzyIndex[Path] = FuzzyIndex()
+        """The names of the requests, for fuzzy matching."""
+        self.recent = RecentRequests()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._ids
+
+    def add(self, path: Path, data: dict[str, Any]) -> None:
+        """Add (or replace) a request, from the data in its file."""
+        self.remove(path)
+        fields = search_fields(data)
+        weights: dict[str, float] = {}
+        # Fields are visited from the highest weight to the lowest, so each
+        # token keeps the weight of the most important field it appears in.
+        for field, weight in FIELD_WEIGHTS_DESCENDING:
+            field_weights = dict.fromkeys(tokenize(fields[field]), weight)
+            field_weights.update(weights)
+            weights = field_weights
+
+        document_id = self._next_id
+        self._next_id += 1
+        self._ids[path] = document_id
+        self._paths[document_id] = path
+        self._names[document_id] = fields["name"]
+        self.names.add(path, fields["name"])
+        self._documents[document_id] = weights
+        postings = self._postings
+        for token, weight in weights.items():
+            documents = postings.get(token)
+            if documents is None:
+                documents = postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+            documents[document_id] = weight
+
+    def add_request(self, request: RequestModel) -> None:
+        """Add (or replace) a request from its model."""
+        if request.path is not None:
+            self.add(request.path, request.model_dump(mode="json"))
+
+    def remove(self, path: Path) -> None:
+        """Remove a request from the index, if it's present."""
+        document_id = self._ids.pop(path, None)
+        if document_id is None:
+            return
+        del self._paths[document_id]
+        del self._names[document_id]
+        self.names.remove(path)
+        for token in self._documents.pop(document_id):
+            documents = self._postings[token]
+            del documents[document_id]
+            if not documents:
+                del self._postings[token]
+                position = bisect.bisect_left(self._vocabulary, token)
+                del self._vocabulary[position]
+
+    def search(self, query: str, limit: int = 50) -> list[SearchResult]:
+        """Return the requests matching every word of a query, most relevant first.
+
+        The last word of the query also matches tokens it's a prefix of,
+        so that results can be shown as the query is typed.
+
+        Args:
+            query: The words to search for.
+            limit: The maximum number of results to return.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        document_count = len(self._documents)
+        scores: dict[int, float] | None = None
+        maximum = 0.0
+        for position, token in enumerate(query_tokens):
+            is_prefix = position == len(query_tokens) - 1
+            matches: dict[int, float] = {}
+            for candidate in self._matching_tokens(token, is_prefix):
+                documents = self._postings[candidate]
+                # Rarer tokens are a stronger signal of relevance.
+                idf = math.log(1 + document_count / len(documents))
+                scale = idf if candidate == token else idf / 2
+                for document_id, weight in documents.items():
+                    score = weight * scale
+                    if score > matches.get(document_id, 0.0):
+                        matches[document_id] = score
+            maximum += FIELD_WEIGHTS["name"] * math.log(1 + document_count)
+
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    document_id: score + matches[document_id]
+                    for document_id, score in scores.items()
+                    if document_id in matches
+                }
+            if not scores:
+                return []
+
+        assert scores is not None
+        paths = self._paths
+        names = self._names
+        recent = self.recent
+
+        def final_score(item: tuple[int, float]) -> float:
+            document_id, score = item
+            return recent.boosted(paths[document_id], min(1.0, score / maximum))
+
+        best = heapq.nlargest(limit, scores.items(), key=final_score)
+        return [
+            SearchResult(paths[item[0]], names[item[0]], final_score(item))
+            for item in best
+        ]
+
+    def name_candidates(self, query: str, limit: int = 50) -> list[tuple[Path, str]]:
+        """Return the paths and names of the requests whose names are most likely
+        to fuzzy match a query, including any recently opened ones which could.
+
+        The candidates still need to be scored with the fuzzy matcher.
+        """
+        names = self.names
+        recent = self.recent.most_recent(limit)
+        return [
+            (path, names.text(path))
+            for path in names.best(query, limit, include=recent)
+        ]
+
+    def _matching_tokens(self, token: str, is_prefix: bool) -> Iterable[str]:
+        if not is_prefix:
+            return (token,) if token in self._postings else ()
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, token)
+        end = bisect.bisect_left(vocabulary, token + "\U0010ffff", lo=start)
+        return vocabulary[start:end]
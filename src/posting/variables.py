@@ -4,6 +4,9 @@ from functools import lru_cache
 import re
 import os
 from pathlib import Path
+from string import Template
+from types import MappingProxyType
+from typing import Iterable, Literal, Mapping
 from dotenv import dotenv_values
 
 
@@ -12,65 +15,328 @@ _VARIABLES_PATTERN = re.compile(
 )
 
 
+VariableLayer = Literal["environment", "host", "session"]
+
+LAYERS: tuple[VariableLayer, ...] = ("environment", "host", "session")
+"""The layers of variables, from lowest to highest precedence.
+
+Variables from environment files are overridden by variables from the host
+environment (if `use_host_environment` is enabled), which are overridden by
+variables set in scripts during the session.
+"""
+
+_EMPTY: Mapping[str, object] = MappingProxyType({})
+_MISSING = object()
+
+
 class SharedVariables:
-    def __init__(self):
-        self._variables: dict[str, object] = {}
+    """The variables available for substitution, stored in layers.
 
-    def get(self) -> dict[str, object]:
-        return self._variables.copy()
+    Each layer is replaced as a whole when it changes (e.g. when an environment
+    file is reloaded, or a script sets a variable), and the merged variables are
+    patched for the keys which changed. Reads return a read-only view of the
+    merged variables, which is never modified once returned, so they don't need
+    to be copied.
 
-    def set(self, variables: dict[str, object]) -> None:
-        self._variables = variables
+    `generation` increases whenever the variables change, so consumers can
+    cheaply check whether anything they've derived from them is stale.
+    """
 
-    def update(self, new_variables: dict[str, object]) -> None:
-        self._variables.update(new_variables)
+    def __init__(self) -> None:
+        self._layers: dict[VariableLayer, Mapping[str, object]] = {
+            layer: _EMPTY for layer in LAYERS
+        }
+        self._layer_generations: dict[VariableLayer, int] = dict.fromkeys(LAYERS, 0)
+        self._merged: Mapping[str, object] = _EMPTY
+        self.generation = 0
+
+    def get(self) -> Mapping[str, object]:
+        """Return the merged variables. The mapping returned is read-only."""
+        return self._merged
+
+    def layer(self, layer: VariableLayer) -> Mapping[str, object]:
+        """Return the variables in a single layer."""
+        return self._layers[layer]
+
+    def layer_generation(self, layer: VariableLayer) -> int:
+        """Return the generation at which a layer last changed."""
+        return self._layer_generations[layer]
+
+    def set(self, variables: Mapping[str, object]) -> None:
+        """Replace every layer, making `variables` the only variables."""
+        for layer in LAYERS:
+            self.set_layer(layer, variables if layer == "environment" else {})
+
+    def set_layer(
+        self, layer: VariableLayer, variables: Mapping[str, object]
+    ) -> set[str]:
+        """Replace the variables in a layer.
+
+        Read-only mappings (`MappingProxyType`) are used as they are, so
+        prepared layers can be switched between without being copied.
+
+        Returns:
+            The names of the variables whose merged value changed.
+        """
+        old = self._layers[layer]
+        new = (
+            variables
+            if isinstance(variables, MappingProxyType)
+            else MappingProxyType(dict(variables))
+        )
+        changed = {
+            key
+            for key in old.keys() | new.keys()
+            if old.get(key, _MISSING) != new.get(key, _MISSING)
+        }
+        if not changed:
+            return changed
+
+        self._layers[layer] = new
+        merged = dict(self._merged)
+        effective: set[str] = set()
+        for key in changed:
+            value = self._resolve(key)
+            if merged.get(key, _MISSING) == value:
+                continue
+            effective.add(key)
+            if value is _MISSING:
+                del merged[key]
+            else:
+                merged[key] = value
+
+        self.generation += 1
+        self._layer_generations[layer] = self.generation
+        if effective:
+            self._merged = MappingProxyType(merged)
+        return effective
+
+    def update(self, new_variables: Mapping[str, object]) -> set[str]:
+        """Add or replace variables in the session layer.
+
+        Returns:
+            The names of the variables whose merged value changed.
+        """
+        return self.set_layer("session", {**self._layers["session"], **new_variables})
+
+    def _resolve(self, key: str) -> object:
+        for layer in reversed(LAYERS):
+            value = self._layers[layer].get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return _MISSING
 
 
 VARIABLES = SharedVariables()
 
 
-def get_variables() -> dict[str, object]:
+def get_variables() -> Mapping[str, object]:
+    """Return the variables available for substitution.
+
+    The mapping is read-only. Use `variables_generation` to check whether
+    the variables have changed since they were last read.
+    """
     return VARIABLES.get()
 
 
+def variables_generation() -> int:
+    """Return a number which increases whenever the variables change."""
+    return VARIABLES.generation
+
+
+_environment_file_cache: dict[
+    Path, tuple[tuple[int, int], Mapping[str, str | None]]
+] = {}
+"""The variables parsed from each environment file, with the modification
+time and size of the file when it was parsed."""
+
+
+def read_environment_file(path: Path) -> Mapping[str, str | None]:
+    """Return the variables in a dotenv file.
+
+    The file is only parsed again if its modification time or size has
+    changed since it was last read.
+    """
+    path = path.absolute()
+    try:
+        stat = path.stat()
+    except OSError:
+        _environment_file_cache.pop(path, None)
+        return {}
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _environment_file_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    values = MappingProxyType(dotenv_values(path))
+    _environment_file_cache[path] = (version, values)
+    return values
+
+
+def _environment_variables(
+    environment_files: Iterable[Path],
+) -> dict[str, object]:
+    variables: dict[str, object] = {}
+    for file in environment_files:
+        variables.update(read_environment_file(file))
+    return variables
+
+
 def load_variables(
     environment_files: tuple[Path, ...],
     use_host_environment: bool,
     avoid_cache: bool = False,
-) -> dict[str, object]:
+) -> Mapping[str, object]:
     """Load the variables that are currently available in the environment.
 
     This will likely involve reading from a set of environment files,
     but it could also involve reading from the host machine's environment
     if `use_host_environment` is True.
 
-    This will make them available via the `get_variables` function.
+    This will make them available via the `get_variables` function. Variables
+    set during the session are kept, and still take precedence.
 
     Args:
         environment_files: The environment files to load variables from.
         use_host_environment: Whether to use env vars from the host machine.
         avoid_cache: Whether to avoid using cached variables (so do a full lookup).
-        overlay_variables: Additional variables to overlay on top of the result.
+            Environment files which haven't changed since they were last read
+            still aren't parsed again.
     """
 
     existing_variables = get_variables()
     if existing_variables and not avoid_cache:
-        return {key: value for key, value in existing_variables.items()}
+        return existing_variables
 
-    variables: dict[str, object] = {
-        key: value
-        for file in environment_files
-        for key, value in dotenv_values(file).items()
-    }
-    if use_host_environment:
-        host_env_variables = {key: value for key, value in os.environ.items()}
-        variables = {**variables, **host_env_variables}
+    VARIABLES.set_layer("environment", _environment_variables(environment_files))
+    VARIABLES.set_layer("host", os.environ if use_host_environment else {})
+    return get_variables()
 
-    VARIABLES.set(variables)
-    return variables
 
+def forget_environment_files(paths: Iterable[Path]) -> None:
+    """Discard the parsed contents of environment files, so they're parsed
+    again the next time they're read."""
+    for path in paths:
+        _environment_file_cache.pop(path.absolute(), None)
+
+
+def reload_environment_files(
+    environment_files: tuple[Path, ...], changed_files: Iterable[Path]
+) -> set[str]:
+    """Reload the variables from environment files after some of them changed.
+
+    Only the changed files are parsed again, and the host environment and
+    session variables aren't touched.
+
+    Args:
+        environment_files: Every environment file, in order of precedence.
+        changed_files: The environment files which have changed.
+
+    Returns:
+        The names of the variables whose values changed.
+    """
+    forget_environment_files(changed_files)
+    return VARIABLES.set_layer(
+        "environment", _environment_variables(environment_files)
+    )
 
-def update_variables(new_variables: dict[str, object]) -> None:
+
+def use_environment_layer(layer: Mapping[str, object]) -> set[str]:
+    """Replace the variables from environment files with a prepared layer
+    (e.g. that of a named environment).
+
+    Returns:
+        The names of the variables whose values changed.
+    """
+    return VARIABLES.set_layer("environment", layer)
+
+
+class EnvironmentProfiles:
+    """Named environments, each of which is read into a layer of variables
+    ahead of time, so that switching between them doesn't read from disk."""
+
+    def __init__(self) -> None:
+        self._files: dict[str, tuple[Path, ...]] = {}
+        self._variables: dict[str, Mapping[str, str]] = {}
+        self._layers: dict[str, Mapping[str, object]] = {}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._layers
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    @property
+    def names(self) -> list[str]:
+        """The names of the environments, in the order they were added."""
+        return list(self._layers)
+
+    def add(
+        self,
+        name: str,
+        files: Iterable[Path],
+        variables: Mapping[str, str] | None = None,
+    ) -> None:
+        """Add (or replace) an environment, reading its files.
+
+        Args:
+            name: The name of the environment.
+            files: The dotenv files to load variables from, in order.
+            variables: Variables which override those in the files.
+        """
+        self._files[name] = tuple(files)
+        self._variables[name] = dict(variables or {})
+        self._layers[name] = self._build(name)
+
+    def files(self, name: str) -> tuple[Path, ...]:
+        """Return the dotenv files of an environment."""
+        return self._files[name]
+
+    def all_files(self) -> set[Path]:
+        """Return the dotenv files used by any environment."""
+        return {path for files in self._files.values() for path in files}
+
+    def layer(self, name: str) -> Mapping[str, object]:
+        """Return the variables of an environment."""
+        return self._layers[name]
+
+    def reload(self, changed_files: Iterable[Path]) -> set[str]:
+        """Read the environments which use any of the changed files again.
+
+        Returns:
+            The names of the environments which were read again.
+        """
+        changed = {path.absolute() for path in changed_files}
+        forget_environment_files(changed)
+        reloaded = {
+            name
+            for name, files in self._files.items()
+            if any(path.absolute() in changed for path in files)
+        }
+        for name in reloaded:
+            self._layers[name] = self._build(name)
+        return reloaded
+
+    def _build(self, name: str) -> Mapping[str, object]:
+        variables = _environment_variables(self._files[name])
+        variables.update(self._variables[name])
+        return MappingProxyType(variables)
+
+
+def changed_variables(
+    before: Mapping[str, object], after: Mapping[str, object]
+) -> set[str]:
+    """Return the names of the variables which differ between two snapshots
+    returned by `get_variables`."""
+    if before is after:
+        return set()
+    return {
+        key
+        for key in before.keys() | after.keys()
+        if before.get(key, _MISSING) != after.get(key, _MISSING)
+    }
+
+
+def update_variables(new_variables: Mapping[str, object]) -> None:
     """Update the current variables with new values.
 
     This function safely updates the shared variables with new key-value pairs.
@@ -82,7 +348,17 @@ def update_variables(new_variables: dict[str, object]) -> None:
     VARIABLES.update(new_variables)
 
 
-@lru_cache()
+def set_session_variables(session_variables: Mapping[str, object]) -> None:
+    """Replace the variables set during the session (e.g. by scripts).
+
+    Unlike `update_variables`, variables which are no longer present are removed.
+
+    Args:
+        session_variables: Every session variable.
+    """
+    VARIABLES.set_layer("session", session_variables)
+
+
 def find_variables(template_str: str) -> list[tuple[str, int, int]]:
     return [
         (m.group(2) or m.group(3), m.start(1), m.end(1))
@@ -91,7 +367,9 @@ def find_variables(template_str: str) -> list[tuple[str, int, int]]:
     ]
 
 
-@lru_cache()
+# The same text and cursor are looked up several times for each keystroke, but
+# the cache is kept small so it doesn't hold on to every version of the text.
+@lru_cache(maxsize=8)
 def variable_range_at_cursor(cursor: int, text: str) -> tuple[int, int] | None:
     if not text or cursor < 0 or cursor > len(text):
         return None
@@ -130,7 +408,7 @@ def get_variable_at_cursor(cursor: int, text: str) -> str | None:
     return text[variable_range[0] : variable_range[1]]
 
 
-@lru_cache()
+@lru_cache(maxsize=64)
 def extract_variable_name(variable_text: str) -> str:
     """
     Extract the variable name from a variable reference.
@@ -154,5 +432,107 @@ def extract_variable_name(variable_text: str) -> str:
     return variable_text  # Return as-is if it doesn't match expected formats
 
 
+class CompiledTemplate:
+    """A template which has been split into literal text and the variables
+    between it, so that it can be substituted without being parsed again.
+
+    The syntax is that of `string.Template`: `$name` and `${name}` are
+    variables, and `$$` is a literal `$`.
+    """
+
+    __slots__ = ("text", "literals", "names", "valid")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.literals: tuple[str, ...] = (text,)
+        """The literal text before, between and after the variables."""
+        self.names: tuple[str, ...] = ()
+        """The name of each variable, in the order they appear."""
+        self.valid = True
+        """False if the template contains a `$` which isn't a variable, in which
+        case substituting it raises a `ValueError`."""
+
+        literals: list[str] = []
+        names: list[str] = []
+        current: list[str] = []
+        position = 0
+        for match in Template.pattern.finditer(text):
+            current.append(text[position : match.start()])
+            position = match.end()
+            name = match.group("named") or match.group("braced")
+            if name is not None:
+                literals.append("".join(current))
+                names.append(name)
+                current = []
+            elif match.group("escaped") is not None:
+                current.append("$")
+            else:
+                self.valid = False
+        current.append(text[position:])
+        literals.append("".join(current))
+        self.literals = tuple(literals)
+        self.names = tuple(names)
+
+    @property
+    def variables(self) -> frozenset[str]:
+        """The names of the variables referenced by the template."""
+        return frozenset(self.names)
+
+    def substitute(self, variables: Mapping[str, object]) -> str:
+        """Substitute the variables into the template.
+
+        Raises:
+            KeyError: If a variable isn't defined.
+            ValueError: If the template contains an invalid placeholder.
+        """
+        if not self.valid:
+            # Let `string.Template` raise the error, with its position.
+            return Template(self.text).substitute(variables)
+        literals = self.literals
+        if not self.names:
+            return literals[0]
+        parts = [literals[0]]
+        for name, literal in zip(self.names, literals[1:]):
+            parts.append(str(variables[name]))
+            parts.append(literal)
+        return "".join(parts)
+
+
+TEMPLATE_CACHE_MAX_LENGTH = 16_384
+"""Templates longer than this (e.g. large request bodies) aren't cached, so
+the cache doesn't keep copies of them alive for the life of the process."""
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached_template(text: str) -> CompiledTemplate:
+    return CompiledTemplate(text)
+
+
+def compile_template(text: str) -> CompiledTemplate:
+    """Return the compiled template for some text. Templates are cached by
+    their content, so each distinct field is only parsed once, unless the
+    text is longer than `TEMPLATE_CACHE_MAX_LENGTH`."""
+    if len(text) > TEMPLATE_CACHE_MAX_LENGTH:
+        return CompiledTemplate(text)
+    return _compile_cached_template(text)
+
+
+def substitute_variables(text: str, variables: Mapping[str, object]) -> str:
+    """Substitute variables into some text, as `string.Template.substitute` does.
+
+    Text without a `$` is returned as it is, without being parsed or cached.
+    """
+    if "$" not in text:
+        return text
+    return compile_template(text).substitute(variables)
+
+
+def template_variables(text: str) -> frozenset[str]:
+    """Return the names of the variables referenced in some text."""
+    if "$" not in text:
+        return frozenset()
+    return compile_template(text).variables
+
+
 class SubstitutionError(Exception):
     """Raised when the user refers to a variable that doesn't exist."""
@@ -1,15 +1,17 @@
 import bisect
+from collections import Counter, OrderedDict
 from dataclasses import dataclass
 from functools import partial
 import os
 from pathlib import Path
-from typing import Union
+from typing import Iterator, Union
 from urllib.parse import urlparse
 from rich.style import Style
 from rich.text import Text, TextType
 from textual import on
 from textual.app import ComposeResult
 from textual.binding import Binding
+from textual.cache import LRUCache
 from textual.containers import Vertical, VerticalScroll
 from textual.geometry import Region
 from textual.message import Message
@@ -17,11 +19,12 @@ from textual.reactive import Reactive, reactive
 from textual.widgets import Static, Tree
 from textual.widgets.tree import TreeNode
 
-from posting.collection import Collection, RequestModel
+from posting.collection import Collection, RequestModel, RequestSummary
 from posting.config import SETTINGS
 from posting.files import get_unique_request_filename
 from posting.help_data import HelpData
 from posting.save_request import generate_request_filename
+from posting.search_index import RequestSearchIndex
 from posting.widgets.collection.new_request_modal import (
     NewRequestData,
     NewRequestModal,
@@ -34,7 +37,35 @@ TOGGLE_STYLE = Style.from_meta({"toggle": True}) + Style(dim=True)
 SUFFIX = ".posting.yaml"
 
 
-CollectionNode = Union[Collection, RequestModel]
+CollectionNode = Union[Collection, RequestModel, RequestSummary]
+REQUEST_NODE_TYPES = (RequestModel, RequestSummary)
+"""The types of data held by request (leaf) nodes. Requests are held as summaries
+until they're opened, or if they've been edited and saved, as full models."""
+
+LOADED_REQUESTS_CACHE_SIZE = 64
+"""The number of recently opened requests to keep in memory."""
+
+EXPAND_ALL_MAX_REQUESTS = 500
+"""Collections with at most this many requests are fully expanded on mount.
+
+The nodes for a sub-collection are only created when it's first expanded, so
+larger collections start with their sub-collections collapsed, and mounting
+them costs no more than mounting the top level of the collection."""
+
+LABEL_CACHE_SIZE = 4096
+"""The number of rendered node labels to keep."""
+
+
+def get_base_url(url: str) -> str | None:
+    """Return the scheme and host of a URL, e.g. `https://example.com`, or
+    None if the URL doesn't have both."""
+    try:
+        parsed_url = urlparse(url)
+    except ValueError:
+        return None
+    if parsed_url.scheme and parsed_url.netloc:
+        return f"{parsed_url.scheme}://{parsed_url.netloc}"
+    return None
 
 
 class CollectionTree(PostingTree[CollectionNode]):
@@ -108,11 +139,25 @@ Sub-collections cannot be deleted from the UI yet.
             classes=classes,
             disabled=disabled,
         )
-        self.cached_base_urls: set[str] = set()
+        self.base_url_counts: Counter[str] = Counter()
+        """The number of requests in the collection using each base URL."""
+        self.search_index = RequestSearchIndex()
+        """The full-text index used by request search. It's built in the
+        background after startup, and kept up to date as requests change."""
+        self._loaded_requests: OrderedDict[Path, RequestModel] = OrderedDict()
+        """Recently opened requests, so that going back and forth between
+        requests doesn't read them from disk every time."""
+        self._populated: set[int] = set()
+        """The IDs of the collection nodes whose children have been added."""
+        self._label_cache: LRUCache[int, tuple[tuple[object, ...], Text]] = LRUCache(
+            LABEL_CACHE_SIZE
+        )
+        """Rendered labels, keyed by node ID. The tree renders the label of
+        every expanded node to measure its width whenever the tree changes."""
 
     @dataclass
     class RequestAdded(Message):
-        request: RequestModel
+        request: RequestModel | RequestSummary
         node: TreeNode[CollectionNode]
         tree: "CollectionTree"
 
@@ -142,17 +187,82 @@ Sub-collections cannot be deleted from the UI yet.
     currently_open: Reactive[TreeNode[CollectionNode] | None] = reactive(None)
 
     def watch_currently_open(self, node: TreeNode[CollectionNode] | None) -> None:
-        if node and isinstance(node.data, RequestModel):
+        if node and isinstance(node.data, REQUEST_NODE_TYPES):
+            request = self.load_request(node.data)
+            if request is None:
+                return
+            if request.path is not None:
+                self.search_index.recent.record(request.path)
             self.post_message(
                 self.RequestSelected(
-                    request=node.data,
+                    request=request,
                     node=node,
                     tree=self,
                 )
             )
 
+    def load_request(
+        self, request: RequestModel | RequestSummary
+    ) -> RequestModel | None:
+        """Return the full request model for the data of a request node,
+        loading it from disk if it's only a summary.
+
+        Returns:
+            The request model, or None if it couldn't be loaded.
+        """
+        if isinstance(request, RequestModel):
+            return request
+
+        loaded_requests = self._loaded_requests
+        path = request.path
+        if (request_model := loaded_requests.get(path)) is not None:
+            loaded_requests.move_to_end(path)
+            return request_model
+
+        try:
+            request_model = request.load()
+        except Exception as error:
+            self.notify(
+                title="Couldn't load request",
+                message=f"{path.name}: {error}",
+                severity="error",
+                timeout=5,
+            )
+            return None
+
+        loaded_requests[path] = request_model
+        if len(loaded_requests) > LOADED_REQUESTS_CACHE_SIZE:
+            loaded_requests.popitem(last=False)
+        return request_model
+
+    def forget_request(self, path: Path) -> None:
+        """Drop a request from the cache of loaded requests, e.g. because
+        the file has changed on disk."""
+        self._loaded_requests.pop(path, None)
+
     def render_label(
         self, node: TreeNode[CollectionNode], base_style: Style, style: Style
+    ) -> Text:
+        """Render a label for the given node, reusing the previous render
+        if nothing which affects the label has changed."""
+        cache_key = (
+            node._updates,
+            node._label,
+            node is self._cursor_node,
+            node is self.currently_open,
+            base_style,
+            style,
+            self.is_mounted and self.app.theme,
+        )
+        cached = self._label_cache.get(node._id)
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+        label = self._render_label(node, base_style, style)
+        self._label_cache[node._id] = (cache_key, label)
+        return label
+
+    def _render_label(
+        self, node: TreeNode[CollectionNode], base_style: Style, style: Style
     ) -> Text:
         """Render a label for the given node.
 
@@ -201,7 +311,9 @@ Sub-collections cannot be deleted from the UI yet.
 
             open_indicator = ">" if node is self.currently_open else " "
             method = (
-                f"{node.data.method[:3]}" if isinstance(node.data, RequestModel) else ""
+                f"{node.data.method[:3]}"
+                if isinstance(node.data, REQUEST_NODE_TYPES)
+                else ""
             )
             node_label = Text.assemble(
                 open_indicator,
@@ -238,17 +350,101 @@ Sub-collections cannot be deleted from the UI yet.
         self.scroll_to_region(region, animate=animate, force=True)
 
     def on_mount(self) -> None:
-        self.post_message(
-            self.RequestCacheUpdated(
-                cached_base_urls=list(self.cached_base_urls),
-                tree=self,
-            )
+        self.base_url_counts = Counter(
+            base_url
+            for request in self.iter_requests()
+            if (base_url := get_base_url(request.url))
         )
+        self._publish_base_urls()
+
+    def populate(self, node: TreeNode[CollectionNode], recursive: bool = False) -> None:
+        """Add the nodes for the requests and sub-collections of a collection
+        node, if they haven't been added already.
+
+        Args:
+            node: The collection node.
+            recursive: Also populate all sub-collections, at every depth.
+        """
+        collection = node.data
+        if not isinstance(collection, Collection):
+            return
+
+        if node._id not in self._populated:
+            self._populated.add(node._id)
+            for request in collection.requests:
+                self.add_request(request, node)
+            for child_collection in collection.children:
+                node.add(child_collection.name, data=child_collection)
+
+        if recursive:
+            for child in node.children:
+                self.populate(child, recursive=True)
+
+    @on(Tree.NodeExpanded)
+    def on_node_expanded(self, event: Tree.NodeExpanded[CollectionNode]) -> None:
+        event.stop()
+        self.populate(event.node)
+
+    def reveal_request(self, path: Path) -> TreeNode[CollectionNode] | None:
+        """Populate and expand the collections containing a request,
+        and return its node.
+
+        Args:
+            path: The path of the request file.
+        """
+        node = self.root
+        root_path = self.root.data.path if self.root.data else None
+        if root_path is None or not path.is_relative_to(root_path):
+            return None
+
+        for part in path.relative_to(root_path).parent.parts:
+            self.populate(node)
+            for child in node.children:
+                if isinstance(child.data, Collection) and child.data.name == part:
+                    node = child
+                    break
+            else:
+                return None
+            node.expand()
+
+        self.populate(node)
+        for child in node.children:
+            if isinstance(child.data, REQUEST_NODE_TYPES) and child.data.path == path:
+                return child
+        return None
+
+    def iter_requests(self) -> Iterator[RequestModel | RequestSummary]:
+        """Yield every request in the tree, including those in collections
+        whose nodes haven't been populated yet."""
+
+        def walk(
+            node: TreeNode[CollectionNode],
+        ) -> Iterator[RequestModel | RequestSummary]:
+            collection = node.data
+            if not isinstance(collection, Collection):
+                return
+            if node._id not in self._populated:
+                yield from walk_collection(collection)
+                return
+            for child in node.children:
+                if isinstance(child.data, REQUEST_NODE_TYPES):
+                    yield child.data
+                else:
+                    yield from walk(child)
+
+        def walk_collection(
+            collection: Collection,
+        ) -> Iterator[RequestModel | RequestSummary]:
+            yield from collection.requests
+            for child in collection.children:
+                yield from walk_collection(child)
+
+        yield from walk(self.root)
 
     @on(Tree.NodeSelected)
     def on_node_selected(self, event: Tree.NodeSelected[CollectionNode]) -> None:
         event.stop()
-        if isinstance(event.node.data, RequestModel):
+        if isinstance(event.node.data, REQUEST_NODE_TYPES):
             self.currently_open = event.node
             self._clear_line_cache()
             self.refresh()
@@ -269,7 +465,7 @@ Sub-collections cannot be deleted from the UI yet.
             node_data = cursor_node.data
             if isinstance(node_data, Collection):
                 parent_node = cursor_node
-            elif isinstance(node_data, RequestModel):
+            elif isinstance(node_data, REQUEST_NODE_TYPES):
                 parent_node = cursor_node.parent or self.root
             else:
                 parent_node = self.root
@@ -330,6 +526,7 @@ Sub-collections cannot be deleted from the UI yet.
 
                 subpath = os.path.join(subpath, part)
 
+                self.populate(pointer)
                 found = False
                 for child in pointer.children:
                     if isinstance(child.data, Collection) and child.data.name == part:
@@ -341,12 +538,21 @@ Sub-collections cannot be deleted from the UI yet.
                     # Collection couldn't be found at this level of the tree.
                     # Create it and move down.
                     new_collection = Collection(name=part, path=Path(subpath))
+                    if isinstance(pointer.data, Collection):
+                        bisect.insort_right(
+                            pointer.data.children,
+                            new_collection,
+                            key=lambda collection: collection.name,
+                        )
                     pointer = pointer.add(part, data=new_collection)
+                    # There's nothing on disk to populate the new node from.
+                    self._populated.add(pointer._id)
                     pointer.expand()
 
+            self.populate(pointer)
             new_request_parent = pointer
             parent_collection = new_request_parent.data
-            sibling_requests: list[RequestModel] = (
+            sibling_requests: list[RequestModel | RequestSummary] = (
                 parent_collection.requests
                 if isinstance(parent_collection, Collection)
                 else []
@@ -383,12 +589,14 @@ Sub-collections cannot be deleted from the UI yet.
                 new_request_parent,
                 before=before,
             )
+            self.cache_request(new_request)
             self.currently_open = new_node
 
             # Persist the request on disk.
             save_path = new_request.path
             assert save_path is not None, "new request must have a path"
             new_request.save_to_disk(save_path)
+            self.search_index.add_request(new_request)
 
             def post_new_request() -> None:
                 self.screen.set_focus(focused_before)
@@ -416,13 +624,12 @@ Sub-collections cannot be deleted from the UI yet.
 
     def add_request(
         self,
-        request: RequestModel,
+        request: RequestModel | RequestSummary,
         parent_node: TreeNode[CollectionNode],
         after: TreeNode[CollectionNode] | int | None = None,
         before: TreeNode[CollectionNode] | int | None = None,
     ) -> TreeNode[CollectionNode] | None:
-        """Add a new request to the tree, and cache data from it."""
-        self.cache_request(request)
+        """Add a new request to the tree."""
         try:
             added_node = parent_node.add_leaf(
                 request.name, data=request, after=after, before=before
@@ -443,8 +650,11 @@ Sub-collections cannot be deleted from the UI yet.
         if cursor_node is None:
             return
 
-        current_request = cursor_node.data
-        if not isinstance(current_request, RequestModel):
+        if not isinstance(cursor_node.data, REQUEST_NODE_TYPES):
+            return
+
+        current_request = self.load_request(cursor_node.data)
+        if current_request is None:
             return
 
         await self.new_request_flow(templated_from=current_request)
@@ -454,8 +664,11 @@ Sub-collections cannot be deleted from the UI yet.
         if cursor_node is None:
             return
 
-        cursor_request = cursor_node.data
-        if not isinstance(cursor_request, RequestModel):
+        if not isinstance(cursor_node.data, REQUEST_NODE_TYPES):
+            return
+
+        cursor_request = self.load_request(cursor_node.data)
+        if cursor_request is None:
             return
 
         original_path = cursor_request.path if cursor_request.path is not None else None
@@ -480,16 +693,16 @@ Sub-collections cannot be deleted from the UI yet.
             parent_node=cursor_node.parent if cursor_node.parent else self.root,
             after=cursor_node,
         )
+        self.cache_request(cursor_request_copy)
+        self.search_index.add_request(cursor_request_copy)
 
     def action_delete_request(self) -> None:
         cursor_node = self.cursor_node
         if cursor_node is None:
             return
 
-        if isinstance(cursor_node.data, RequestModel):
-            cursor_request = cursor_node.data
-            cursor_request.delete_from_disk()
-            cursor_node.remove()
+        if isinstance(cursor_node.data, REQUEST_NODE_TYPES):
+            self._delete_request_node(cursor_node)
 
     async def action_delete_request_with_confirmation(self) -> None:
         cursor_node = self.cursor_node
@@ -498,12 +711,10 @@ Sub-collections cannot be deleted from the UI yet.
 
         def deletion_callback(confirmed: bool | None) -> None:
             if confirmed is True:
-                if cursor_node and isinstance(cursor_node.data, RequestModel):
-                    cursor_request = cursor_node.data
-                    cursor_request.delete_from_disk()
-                    cursor_node.remove()
+                if cursor_node and isinstance(cursor_node.data, REQUEST_NODE_TYPES):
+                    self._delete_request_node(cursor_node)
 
-        if isinstance(cursor_node.data, RequestModel):
+        if isinstance(cursor_node.data, REQUEST_NODE_TYPES):
             cursor_path = cursor_node.data.path
             collection_root_path = self.root.data.path if self.root.data else None
             if not cursor_path or not collection_root_path:
@@ -523,40 +734,223 @@ Sub-collections cannot be deleted from the UI yet.
                 callback=deletion_callback,
             )
 
-    def cache_request(self, request: RequestModel) -> None:
-        def get_base_url(url: str) -> str | None:
-            try:
-                parsed_url = urlparse(url)
-                # Check if the scheme and netloc are present
-                if parsed_url.scheme and parsed_url.netloc:
-                    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                    return base_url
-            except Exception:
-                return None
+    def _delete_request_node(self, node: TreeNode[CollectionNode]) -> None:
+        request = node.data
+        assert isinstance(request, REQUEST_NODE_TYPES)
+        request.delete_from_disk()
+        if request.path is not None:
+            self.forget_request(request.path)
+            self.search_index.remove(request.path)
+            self.search_index.recent.remove(request.path)
+        self.uncache_request(request)
+        if node.parent is not None and isinstance(node.parent.data, Collection):
+            siblings = node.parent.data.requests
+            position = next(
+                (index for index, sibling in enumerate(siblings) if sibling is request),
+                None,
+            )
+            if position is not None:
+                del siblings[position]
+        node.remove()
 
-        base_url = get_base_url(request.url)
-        if base_url:
-            self.cached_base_urls.add(base_url)
-            # Post a message up to the screen so that it can inform
-            # the URL bar that the autocomplete suggestions have changed.
-            self.post_message(
-                # TODO: We should sort these cached URLs on frequency instead
-                # of alphabetically. Bring the most used URLs to the top.
-                self.RequestCacheUpdated(
-                    cached_base_urls=list(self.cached_base_urls),
-                    tree=self,
+    def sync_requests(
+        self,
+        updated: list[RequestSummary],
+        removed: list[Path],
+    ) -> None:
+        """Patch the tree to match request files which changed on disk.
+
+        Only the collections and nodes containing the changed requests are
+        touched. Collections whose nodes haven't been populated yet are only
+        updated, and their nodes are created from them when they're expanded.
+
+        Args:
+            updated: Summaries of the request files which were added or modified.
+            removed: The paths of the request files which were deleted.
+        """
+        counts_changed = False
+        for path in removed:
+            self.forget_request(path)
+            location = self._locate_collection(path, create=False)
+            if location is None:
+                continue
+            collection, node = location
+            position = _request_position(collection, path)
+            if position is None:
+                continue
+            request = collection.requests.pop(position)
+            counts_changed |= self._count_base_url(None, replaces=request)
+            request_node = _child_node(node, request)
+            if request_node is not None:
+                if request_node is self.currently_open:
+                    self.currently_open = None
+                request_node.remove()
+
+        for request in updated:
+            self.forget_request(request.path)
+            location = self._locate_collection(request.path, create=True)
+            if location is None:
+                continue
+            collection, node = location
+            position = _request_position(collection, request.path)
+            if position is None:
+                bisect.insort_right(collection.requests, request)
+                counts_changed |= self._count_base_url(request)
+                if node is not None and node._id in self._populated:
+                    before = sum(
+                        1
+                        for child in node.children
+                        if isinstance(child.data, REQUEST_NODE_TYPES)
+                        and not request < child.data
+                    )
+                    self.add_request(request, node, before=before)
+            else:
+                previous = collection.requests[position]
+                collection.requests[position] = request
+                counts_changed |= self._count_base_url(request, replaces=previous)
+                request_node = _child_node(node, previous)
+                if request_node is not None:
+                    request_node.data = request
+                    request_node.set_label(request.name)
+
+        if counts_changed:
+            self._publish_base_urls()
+
+    def _locate_collection(
+        self, path: Path, create: bool
+    ) -> tuple[Collection, TreeNode[CollectionNode] | None] | None:
+        """Find the collection which a request file belongs in, and its node
+        if it has one.
+
+        Args:
+            path: The path of the request file.
+            create: Create any sub-collections which don't exist yet.
+
+        Returns:
+            The collection and its node, or None if the file isn't inside the
+                collection (or its collection doesn't exist and `create` is False).
+        """
+        collection = self.root.data
+        if not isinstance(collection, Collection) or collection.path is None:
+            return None
+        if not path.is_relative_to(collection.path):
+            return None
+
+        node: TreeNode[CollectionNode] | None = self.root
+        for part in path.relative_to(collection.path).parent.parts:
+            child_collection = next(
+                (child for child in collection.children if child.name == part), None
+            )
+            if child_collection is None:
+                if not create:
+                    return None
+                child_collection = Collection(name=part, path=collection.path / part)
+                bisect.insort_right(
+                    collection.children,
+                    child_collection,
+                    key=lambda collection: collection.name,
                 )
+
+            child_node = _child_node(node, child_collection)
+            if (
+                child_node is None
+                and node is not None
+                and node._id in self._populated
+            ):
+                child_node = node.add(part, data=child_collection)
+            node = child_node
+            collection = child_collection
+        return collection, node
+
+    def cache_request(
+        self,
+        request: RequestModel | RequestSummary,
+        replaces: RequestModel | RequestSummary | None = None,
+    ) -> None:
+        """Count the base URL of a request towards autocomplete suggestions.
+
+        Args:
+            request: The request which has been added or saved.
+            replaces: The previous version of the request, if it was edited,
+                whose base URL no longer counts.
+        """
+        if self._count_base_url(request, replaces):
+            self._publish_base_urls()
+
+    def uncache_request(self, request: RequestModel | RequestSummary) -> None:
+        """Stop counting the base URL of a request which has been removed."""
+        if self._count_base_url(None, replaces=request):
+            self._publish_base_urls()
+
+    def _count_base_url(
+        self,
+        request: RequestModel | RequestSummary | None,
+        replaces: RequestModel | RequestSummary | None = None,
+    ) -> bool:
+        """Update the base URL counts without publishing them.
+
+        Returns:
+            True if the counts changed.
+        """
+        base_url = get_base_url(request.url) if request is not None else None
+        old_base_url = get_base_url(replaces.url) if replaces is not None else None
+        if base_url == old_base_url:
+            return False
+        if old_base_url:
+            self._discount_base_url(old_base_url)
+        if base_url:
+            self.base_url_counts[base_url] += 1
+        return True
+
+    def _discount_base_url(self, base_url: str) -> None:
+        self.base_url_counts[base_url] -= 1
+        if self.base_url_counts[base_url] <= 0:
+            del self.base_url_counts[base_url]
+
+    def _publish_base_urls(self) -> None:
+        """Post a message up to the screen so that it can inform the URL bar
+        that the autocomplete suggestions have changed.
+
+        The most used base URLs come first."""
+        self.post_message(
+            self.RequestCacheUpdated(
+                cached_base_urls=sorted(
+                    self.base_url_counts,
+                    key=lambda base_url: (-self.base_url_counts[base_url], base_url),
+                ),
+                tree=self,
             )
+        )
+
+
+def _request_position(collection: Collection, path: Path) -> int | None:
+    """Return the position of the request with the given path in a collection."""
+    for position, request in enumerate(collection.requests):
+        if request.path == path:
+            return position
+    return None
+
+
+def _child_node(
+    node: TreeNode[CollectionNode] | None, data: CollectionNode
+) -> TreeNode[CollectionNode] | None:
+    """Return the child of a node which holds the given data, if there is one."""
+    if node is None:
+        return None
+    for child in node.children:
+        if child.data is data:
+            return child
+    return None
 
 
 class RequestPreview(VerticalScroll):
-    request: Reactive[RequestModel | None] = reactive(None)
+    request: Reactive[RequestModel | RequestSummary | None] = reactive(None)
 
     def compose(self) -> ComposeResult:
         self.can_focus = False
         yield Static("", markup=False, id="description")
 
-    def watch_request(self, request: RequestModel | None) -> None:
+    def watch_request(self, request: RequestModel | RequestSummary | None) -> None:
         self.set_class(request is None or not request.description, "hidden")
         if request:
             description = self.query_one("#description", Static)
@@ -596,24 +990,14 @@ class CollectionBrowser(Vertical):
         tree.show_guides = False
         self.border_subtitle = collection.name
 
-        def add_collection_to_tree(
-            parent_node: TreeNode[CollectionNode], collection: Collection
-        ) -> None:
-            # Add the requests (leaf nodes)
-            for request in collection.requests:
-                tree.add_request(request, parent_node)
-
-            # Add the subcollections (child nodes)
-            for child_collection in collection.children:
-                child_node = parent_node.add(
-                    child_collection.name, data=child_collection
-                )
-                add_collection_to_tree(child_node, child_collection)
-
-        # Start building the tree from the root node
-        add_collection_to_tree(tree.root, collection)
-
-        tree.root.expand_all()
+        # Small collections are shown fully expanded. In larger collections,
+        # the nodes of each sub-collection are added when it's expanded.
+        if sum(1 for _ in tree.iter_requests()) <= EXPAND_ALL_MAX_REQUESTS:
+            tree.populate(tree.root, recursive=True)
+            tree.root.expand_all()
+        else:
+            tree.populate(tree.root)
+            tree.root.expand()
         tree.cursor_line = 0
         yield tree
         yield RequestPreview()
@@ -626,7 +1010,7 @@ class CollectionBrowser(Vertical):
 
     @on(CollectionTree.RequestSelected)
     def on_request_selected(self, event: CollectionTree.RequestSelected) -> None:
-        if isinstance(event.node.data, RequestModel):
+        if isinstance(event.node.data, REQUEST_NODE_TYPES):
             self.request_preview.request = event.node.data
 
     @on(Tree.NodeHighlighted)
@@ -634,7 +1018,7 @@ class CollectionBrowser(Vertical):
         node_data = event.node.data
         # TODO - display more preview data.
         #  It's already all in the node, just need to display it.
-        if isinstance(node_data, RequestModel):
+        if isinstance(node_data, REQUEST_NODE_TYPES):
             self.request_preview.request = node_data
         else:
             self.request_preview.request = None
@@ -647,10 +1031,23 @@ class CollectionBrowser(Vertical):
     def update_currently_open_node(self, request_model: RequestModel) -> None:
         """Update the request tree node with the new request model."""
         currently_open = self.collection_tree.currently_open
-        if currently_open is not None and isinstance(currently_open.data, RequestModel):
+        if currently_open is not None and isinstance(
+            currently_open.data, REQUEST_NODE_TYPES
+        ):
+            if request_model.path is not None:
+                self.collection_tree.forget_request(request_model.path)
+            previous = currently_open.data
+            self.collection_tree.cache_request(request_model, replaces=previous)
+            self.collection_tree.search_index.add_request(request_model)
+            parent = currently_open.parent
+            if parent is not None and isinstance(parent.data, Collection):
+                siblings = parent.data.requests
+                for index, sibling in enumerate(siblings):
+                    if sibling is previous:
+                        siblings[index] = request_model
+                        break
             currently_open.data = request_model
             currently_open.set_label(request_model.name or "")
-            self.collection_tree.cache_request(request_model)
             currently_open.refresh()
             # Update the description preview if it's the one currently being displayed.
             if currently_open is self.collection_tree.cursor_node:
@@ -15,7 +15,12 @@ from textual.widgets import Button, Input, Static
 from textual_autocomplete import DropdownItem, PathAutoComplete, TargetState
 
 from posting.locations import config_directory
-from posting.variables import load_variables, update_variables
+from posting.variables import (
+    changed_variables,
+    get_variables,
+    load_variables,
+    set_session_variables,
+)
 from posting.widgets.input import PostingInput
 
 if TYPE_CHECKING:
@@ -57,13 +62,17 @@ def load_env_file(
         return False
 
     app.environment_files = (resolved_path,)
+    app.active_environment = None
+    before = get_variables()
     load_variables(
         app.environment_files,
         app.settings.use_host_environment,
         avoid_cache=True,
     )
-    update_variables(app.session_env)
-    app.env_changed_signal.publish(None)
+    set_session_variables(app.session_env)
+    changed = changed_variables(before, get_variables())
+    if changed:
+        app.env_changed_signal.publish(frozenset(changed))
     app.notify(f"Loaded environment from: {resolved_path}")
     return True
 
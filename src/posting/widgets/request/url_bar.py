@@ -21,13 +21,17 @@ from posting.highlighters import VariablesAndUrlHighlighter
 from posting.themes import UrlStyles, VariableStyles
 from posting.variables import (
     extract_variable_name,
+    find_variables,
     get_variable_at_cursor,
     get_variables,
 )
 from posting.widgets.input import PostingInput
 from posting.widgets.request.method_selection import MethodSelector
 from posting.widgets.response.response_trace import Event
-from posting.widgets.variable_autocomplete import VariableAutoComplete
+from posting.widgets.variable_autocomplete import (
+    VariableAutoComplete,
+    get_variable_candidates,
+)
 
 
 class CurlMessage(Message):
@@ -48,6 +52,7 @@ Enter the URL to send a request to. Refer to variables from the environment (loa
 Resolved variables will be highlighted green. Move the cursor over a variable to preview the value.
 Base URL suggestions are loaded based on the URLs found in the currently open collection.
 Press `ctrl+l` to quickly focus this bar from elsewhere.
+Press `ctrl+g` to switch to another of the named environments from the config.
 
 You can also import a `curl` command by pasting it into the URL bar.
 This will fill out the request details in the UI based on the curl command you pasted, overwriting any existing values.
@@ -177,8 +182,13 @@ class UrlBar(Vertical):
         super().__init__(name=name, id=id, classes=classes, disabled=disabled)
         self.cached_base_urls: list[str] = []
         self._trace_events: set[Event] = set()
+        self._http_version: str | None = None
+        """The HTTP version of the latest response, once it's been received."""
 
-    def on_env_changed(self, _: None) -> None:
+    def on_env_changed(self, changed: frozenset[str]) -> None:
+        value = self.url_input.value
+        if not any(name in changed for name, _, _ in find_variables(value)):
+            return
         self._display_variable_at_cursor()
         self.url_input.refresh()
 
@@ -288,7 +298,7 @@ class UrlBar(Vertical):
         return [DropdownItem(main=base_url) for base_url in self.cached_base_urls]
 
     def _get_variable_candidates(self, target_state: TargetState) -> list[DropdownItem]:
-        return [DropdownItem(main=f"${variable}") for variable in get_variables()]
+        return get_variable_candidates(target_state)
 
     def on_theme_change(self, theme: Theme) -> None:
         markers = self._build_markers()
@@ -304,6 +314,11 @@ class UrlBar(Vertical):
 
         self.trace_markers.set_class(len(self._trace_events) > 0, "has-events")
 
+    def set_http_version(self, http_version: str) -> None:
+        """Show the markers for the HTTP version the response was received with."""
+        self._http_version = http_version
+        self.trace_markers.update(self._build_markers())
+
     def _build_markers(self) -> Text:
         def get_marker(event_base: str) -> Text:
             if f"{event_base}.complete" in self._trace_events:
@@ -319,15 +334,33 @@ class UrlBar(Vertical):
                 style = self.get_component_rich_style("not-started-marker")
                 return Text("■", style=style)
 
-        event_bases = [
-            "connection.connect_tcp",
-            "connection.start_tls",
-            "http11.send_request_headers",
-            "http11.send_request_body",
-            "http11.receive_response_headers",
-            "http11.receive_response_body",
-            "http11.response_closed",
-        ]
+        # The protocol is only known for certain once the response arrives.
+        # Until then, HTTP/1.1 markers are shown unless we see an HTTP/2 event.
+        if self._http_version is not None:
+            is_http2 = self._http_version == "HTTP/2"
+        else:
+            is_http2 = any(event.startswith("http2.") for event in self._trace_events)
+        if is_http2:
+            event_bases = [
+                "connection.connect_tcp",
+                "connection.start_tls",
+                "http2.send_connection_init",
+                "http2.send_request_headers",
+                "http2.send_request_body",
+                "http2.receive_response_headers",
+                "http2.receive_response_body",
+                "http2.response_closed",
+            ]
+        else:
+            event_bases = [
+                "connection.connect_tcp",
+                "connection.start_tls",
+                "http11.send_request_headers",
+                "http11.send_request_body",
+                "http11.receive_response_headers",
+                "http11.receive_response_body",
+                "http11.response_closed",
+            ]
 
         markers = {event: get_marker(event) for event in event_bases}
 
@@ -337,6 +370,7 @@ class UrlBar(Vertical):
         """Clear the events from the request trace."""
         self.trace_markers.update("")
         self._trace_events.clear()
+        self._http_version = None
 
     @property
     def trace_markers(self) -> Label:
@@ -0,0 +1,806 @@
+"""A read-only viewer for response bodies too large for a `TextArea`.
+
+`TextArea` holds the entire document as a list of Python strings and
+(re)parses all of it with tree-sitter, which is slow and uses several times
+the size of the body in memory. The viewer here instead keeps the body as
+bytes, alongside an index of the byte offset at which each line starts.
+Only the lines currently on screen are decoded and highlighted.
+"""
+
+from __future__ import annotations
+
+import codecs
+import mmap
+import os
+import re
+import shlex
+import subprocess
+import tempfile
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Union
+
+from rich.segment import Segment
+from rich.style import Style
+from rich.text import Text
+from textual import events, on
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Vertical
+from textual.geometry import Size
+from textual.message import Message
+from textual.reactive import Reactive, reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.theme import Theme as TextualTheme
+from textual.widgets import Input, Label
+from textual.widgets.text_area import Location, TextAreaTheme
+
+from posting.config import SETTINGS
+from posting.help_data import HelpData
+from posting.themes import Theme
+from posting.widgets.input import PostingInput
+from posting.widgets.text_area import (
+    DRACULA_THEME,
+    GITHUB_LIGHT_THEME,
+    MONOKAI_THEME,
+    POSTING_THEME,
+)
+
+Buffer = Union[bytes, mmap.mmap]
+"""The types of buffer which can back a `LineIndex`."""
+
+INDEX_BLOCK_SIZE = 1024 * 1024
+"""The number of bytes scanned for newlines at a time when building an index."""
+
+LINE_CACHE_SIZE = 512
+"""The number of decoded lines kept around to avoid re-decoding on redraw."""
+
+_JSON_TOKENS = re.compile(
+    r'(?P<string>"(?:[^"\\]|\\.)*")(?P<label>\s*:)?'
+    r"|(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)"
+    r"|(?P<boolean>\b(?:true|false)\b)"
+    r"|(?P<null>\bnull\b)"
+)
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    """Return True if newlines in the encoding are single `\\n` bytes,
+    meaning a body in that encoding can be split into lines without
+    decoding it."""
+    try:
+        return "\n".encode(encoding) == b"\n" and "\r".encode(encoding) == b"\r"
+    except LookupError:
+        return False
+
+
+class LineIndex:
+    """The byte offset of the start of each line in a buffer.
+
+    Building the index is linear in the size of the buffer, so should be
+    done in a thread for large buffers. Lookups are constant time, apart
+    from mapping a byte offset back to a line, which is a binary search.
+    """
+
+    def __init__(
+        self, data: Buffer, encoding: str = "utf-8", path: str | None = None
+    ) -> None:
+        if not is_ascii_compatible(encoding):
+            raise ValueError(f"Can't index a buffer encoded with {encoding!r}.")
+
+        self.data = data
+        self.path = path
+        """The file containing the buffer, if it's mapped from disk."""
+        self.encoding = codecs.lookup(encoding).name
+        self.size = len(data)
+
+        # The buffer is scanned in blocks so that we never hold more than one
+        # block's worth of lines as Python objects at a time.
+        offsets = array("Q", [0])
+        for block_start in range(0, self.size, INDEX_BLOCK_SIZE):
+            lines = data[block_start : block_start + INDEX_BLOCK_SIZE].split(b"\n")
+            # The final piece runs into the next block (or is the last line).
+            lines.pop()
+            line_starts = accumulate(
+                (len(line) + 1 for line in lines), initial=block_start
+            )
+            next(line_starts)
+            offsets.extend(line_starts)
+
+        self.offsets = offsets
+        line_lengths = map(int.__sub__, offsets[1:], offsets)
+        self.max_line_length = max(
+            max(line_lengths, default=0), self.size - offsets[-1]
+        )
+        self._line_cache: OrderedDict[int, str] = OrderedDict()
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def end(self) -> Location:
+        """The location of the end of the buffer."""
+        last_row = self.line_count - 1
+        return (last_row, len(self.get_line(last_row)))
+
+    def _line_span(self, row: int) -> tuple[int, int]:
+        """The start and end byte offsets of a line, excluding line endings."""
+        start = self.offsets[row]
+        if row + 1 < len(self.offsets):
+            end = self.offsets[row + 1] - 1
+            if end > start and self.data[end - 1 : end] == b"\r":
+                end -= 1
+        else:
+            end = self.size
+        return start, end
+
+    def get_line(self, row: int) -> str:
+        """Return the decoded line at the given row, without its line ending."""
+        cache = self._line_cache
+        try:
+            line = cache[row]
+        except KeyError:
+            line = self.decode(*self._line_span(row))
+            cache[row] = line
+            if len(cache) > LINE_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(row)
+        return line
+
+    def location_to_offset(self, location: Location) -> int:
+        """Convert a (row, column) location to a byte offset."""
+        row, column = location
+        row = max(0, min(row, self.line_count - 1))
+        line_start, _ = self._line_span(row)
+        line = self.get_line(row)
+        return line_start + len(line[: max(column, 0)].encode(self.encoding))
+
+    def offset_to_location(self, offset: int) -> Location:
+        """Convert a byte offset to a (row, column) location."""
+        offset = max(0, min(offset, self.size))
+        row = bisect_right(self.offsets, offset) - 1
+        line_start, line_end = self._line_span(row)
+        return (row, len(self.decode(line_start, min(offset, line_end))))
+
+    def get_text_range(self, start: Location, end: Location) -> str:
+        """Return the text between two locations, `end` being exclusive."""
+        start_offset = self.location_to_offset(start)
+        end_offset = self.location_to_offset(end)
+        if end[1] > len(self.get_line(end[0])):
+            # Selecting beyond the end of a line includes the line ending.
+            next_row = end[0] + 1
+            end_offset = (
+                self.offsets[next_row] if next_row < self.line_count else self.size
+            )
+        return self.decode(start_offset, end_offset)
+
+    def decode(self, start: int = 0, end: int | None = None) -> str:
+        """Decode a range of bytes (by default, the whole buffer)."""
+        end = self.size if end is None else end
+        # Decoding from a view avoids copying the range out of the buffer first.
+        with memoryview(self.data) as view:
+            return str(view[start:end], self.encoding, "replace")
+
+    def find(
+        self, query: str, start: Location, backwards: bool = False
+    ) -> Location | None:
+        """Find the next occurrence of `query` after (or before) `start`,
+        wrapping around the buffer if required.
+
+        Returns:
+            The location of the start of the match, or None if there are no matches.
+        """
+        needle = query.encode(self.encoding)
+        if not needle:
+            return None
+        offset = self.location_to_offset(start)
+        data = self.data
+        if backwards:
+            found = data.rfind(needle, 0, offset)
+            if found == -1:
+                found = data.rfind(needle, offset)
+        else:
+            found = data.find(needle, offset + 1)
+            if found == -1:
+                found = data.find(needle, 0, offset + len(needle))
+        return None if found == -1 else self.offset_to_location(found)
+
+
+def get_syntax_theme(
+    theme: TextualTheme, theme_variables: dict[str, str]
+) -> TextAreaTheme:
+    """Return the syntax theme which the response `TextArea` would use."""
+    builtin_theme = theme.variables.get("syntax-theme")
+    if isinstance(builtin_theme, str):
+        posting_themes = {
+            syntax_theme.name: syntax_theme
+            for syntax_theme in (
+                POSTING_THEME,
+                MONOKAI_THEME,
+                GITHUB_LIGHT_THEME,
+                DRACULA_THEME,
+            )
+        }
+        syntax_theme = posting_themes.get(
+            builtin_theme
+        ) or TextAreaTheme.get_builtin_theme(builtin_theme)
+        if syntax_theme is not None:
+            return syntax_theme
+    return Theme.text_area_theme_from_theme_variables(theme_variables)
+
+
+def highlight_json(text: Text, syntax_styles: dict[str, Style]) -> None:
+    """Apply JSON syntax highlighting to a single line of text.
+
+    Lines are highlighted independently, without parsing the document,
+    so this works on any window into a (potentially invalid) document.
+    """
+    plain = text.plain
+    for match in _JSON_TOKENS.finditer(plain):
+        kind = match.lastgroup
+        if kind == "label":
+            style = syntax_styles.get("json.label")
+            start, end = match.span("string")
+        elif kind == "null":
+            style = syntax_styles.get("json.null")
+            start, end = match.span()
+        else:
+            style = syntax_styles.get(kind or "")
+            start, end = match.span()
+        if style is not None:
+            text.stylize(style, start, end)
+
+
+class LargeBodyView(ScrollView, can_focus=True):
+    """A scrollable, read-only view over a `LineIndex`."""
+
+    COMPONENT_CLASSES = {
+        "large-body-view--cursor",
+        "large-body-view--cursor-line",
+        "large-body-view--gutter",
+        "large-body-view--cursor-gutter",
+        "large-body-view--selection",
+    }
+
+    DEFAULT_CSS = """\
+    LargeBodyView {
+        background: transparent;
+        & .large-body-view--cursor {
+            color: $input-cursor-foreground;
+            background: $warning-darken-1;
+        }
+        & .large-body-view--cursor-line {
+            background: $boost;
+        }
+        & .large-body-view--gutter {
+            color: $text-disabled;
+        }
+        & .large-body-view--cursor-gutter {
+            color: $text-muted;
+            background: $boost;
+            text-style: bold;
+        }
+        & .large-body-view--selection {
+            background: $input-selection-background;
+        }
+    }
+    """
+
+    BINDINGS = [
+        Binding("up,k", "cursor_up", "Cursor Up", show=False),
+        Binding("down,j", "cursor_down", "Cursor Down", show=False),
+        Binding("right,l", "cursor_right", "Cursor Right", show=False),
+        Binding("left,h", "cursor_left", "Cursor Left", show=False),
+        Binding("shift+up,K", "cursor_up(True)", "cursor up select", show=False),
+        Binding("shift+down,J", "cursor_down(True)", "cursor down select", show=False),
+        Binding("shift+left,H", "cursor_left(True)", "cursor left select", show=False),
+        Binding(
+            "shift+right,L", "cursor_right(True)", "cursor right select", show=False
+        ),
+        Binding(
+            "home,ctrl+a,0,^", "cursor_line_start", "cursor line start", show=False
+        ),
+        Binding("end,ctrl+e,$", "cursor_line_end", "cursor line end", show=False),
+        Binding("pageup,ctrl+b", "cursor_page_up", "cursor page up", show=False),
+        Binding("pagedown,ctrl+f", "cursor_page_down", "cursor page down", show=False),
+        Binding("ctrl+d", "cursor_half_page_down", "cursor half page down", show=False),
+        Binding("ctrl+u", "cursor_half_page_up", "cursor half page up", show=False),
+        Binding("g", "cursor_top", "Go to top", show=False),
+        Binding("G", "cursor_bottom", "Go to bottom", show=False),
+        Binding(
+            "v",
+            "toggle_visual_mode",
+            description="Toggle visual mode",
+            show=False,
+        ),
+        Binding(
+            "y,c",
+            "copy_to_clipboard",
+            description="Copy selection",
+            show=False,
+        ),
+        Binding("slash", "search", "Search", show=False),
+        Binding("n", "search_next", "Next match", show=False),
+        Binding("N", "search_previous", "Previous match", show=False),
+        Binding("f3,ctrl+P", "open_in_pager", "Pager", id="open-in-pager"),
+    ]
+
+    @dataclass
+    class CursorMoved(Message):
+        location: Location
+        visual_mode: bool
+        view: "LargeBodyView"
+
+        @property
+        def control(self) -> "LargeBodyView":
+            return self.view
+
+    @dataclass
+    class SearchRequested(Message):
+        view: "LargeBodyView"
+
+        @property
+        def control(self) -> "LargeBodyView":
+            return self.view
+
+    visual_mode: Reactive[bool] = reactive(False, init=False)
+    language: Reactive[str | None] = reactive("json", init=False)
+
+    def __init__(
+        self,
+        name: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+        disabled: bool = False,
+    ) -> None:
+        super().__init__(name=name, id=id, classes=classes, disabled=disabled)
+        self.index: LineIndex | None = None
+        self.cursor: Location = (0, 0)
+        self.anchor: Location | None = None
+        """The other end of the selection from the cursor, if there is a selection."""
+        self.search_query = ""
+        self._syntax_styles: dict[str, Style] = {}
+        self._mouse_selecting = False
+
+    def on_mount(self) -> None:
+        self.on_theme_change(self.app.current_theme)
+        self.app.theme_changed_signal.subscribe(self, self.on_theme_change)
+
+    def on_theme_change(self, theme: TextualTheme) -> None:
+        syntax_theme = get_syntax_theme(theme, self.app.theme_variables)
+        self._syntax_styles = syntax_theme.syntax_styles
+        self.refresh()
+
+    def load(self, index: LineIndex | None) -> None:
+        """Display the buffer of a line index (or nothing, if None)."""
+        self.index = index
+        self.cursor = (0, 0)
+        self.anchor = None
+        self.visual_mode = False
+        self.scroll_to(0, 0, animate=False)
+        self._update_virtual_size()
+        self._cursor_moved()
+        self.refresh()
+
+    @property
+    def gutter_width(self) -> int:
+        if self.index is None:
+            return 0
+        return len(str(self.index.line_count)) + 2
+
+    def _update_virtual_size(self) -> None:
+        index = self.index
+        if index is None:
+            self.virtual_size = Size(0, 0)
+        else:
+            self.virtual_size = Size(
+                self.gutter_width + index.max_line_length + 1, index.line_count
+            )
+
+    @property
+    def selection(self) -> tuple[Location, Location] | None:
+        """The start and end of the selection (in document order), if any."""
+        if self.anchor is None or self.anchor == self.cursor:
+            return None
+        start, end = sorted((self.anchor, self.cursor))
+        return start, end
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        row = scroll_y + y
+        width = self.scrollable_content_region.width
+        index = self.index
+        if index is None or row >= index.line_count:
+            return Strip.blank(width, self.rich_style)
+
+        gutter_width = self.gutter_width
+        content_width = max(width - gutter_width, 0)
+        cursor_row, cursor_column = self.cursor
+        is_cursor_row = row == cursor_row
+
+        # Only the visible slice of the line is styled and rendered, which
+        # keeps redraws cheap even for (minified) lines megabytes long.
+        line = index.get_line(row)
+        visible = line[scroll_x : scroll_x + content_width].replace("\t", " ")
+        text = Text(visible, no_wrap=True, end="")
+        if self.language == "json":
+            highlight_json(text, self._syntax_styles)
+
+        get_style = self.get_component_rich_style
+        if selection := self.selection:
+            (start_row, start_column), (end_row, end_column) = selection
+            if self.visual_mode:
+                end_column += 1
+            if start_row <= row <= end_row:
+                start = start_column if row == start_row else 0
+                end = end_column if row == end_row else len(line) + 1
+                text.stylize(
+                    get_style("large-body-view--selection"),
+                    max(start - scroll_x, 0),
+                    max(end - scroll_x, 0),
+                )
+
+        if is_cursor_row:
+            text.stylize_before(get_style("large-body-view--cursor-line"))
+            if self.has_focus or self.visual_mode or cursor_column < len(line):
+                cursor_x = cursor_column - scroll_x
+                if 0 <= cursor_x < content_width:
+                    if cursor_x >= len(visible):
+                        text.append(" " * (cursor_x - len(visible) + 1))
+                    text.stylize(
+                        get_style("large-body-view--cursor"), cursor_x, cursor_x + 1
+                    )
+
+        gutter_style = get_style(
+            "large-body-view--cursor-gutter"
+            if is_cursor_row
+            else "large-body-view--gutter"
+        )
+        gutter = Strip([Segment(f"{row + 1:>{gutter_width - 1}} ", gutter_style)])
+        line_style = (
+            get_style("large-body-view--cursor-line") if is_cursor_row else None
+        )
+        content = Strip(text.render(self.app.console)).crop_extend(
+            0, content_width, line_style
+        )
+        return Strip.join([gutter, content]).apply_style(self.rich_style)
+
+    def _cursor_moved(self) -> None:
+        self.post_message(self.CursorMoved(self.cursor, self.visual_mode, self))
+
+    def move_cursor(self, location: Location, select: bool = False) -> None:
+        """Move the cursor, clamping the location to the document.
+
+        Args:
+            location: The location to move the cursor to.
+            select: Extend the selection rather than clearing it.
+        """
+        index = self.index
+        if index is None:
+            return
+        row, column = location
+        row = max(0, min(row, index.line_count - 1))
+        column = max(0, min(column, len(index.get_line(row))))
+        if select or self.visual_mode:
+            if self.anchor is None:
+                self.anchor = self.cursor
+        else:
+            self.anchor = None
+        self.cursor = (row, column)
+        self.scroll_cursor_visible()
+        self.refresh()
+        self._cursor_moved()
+
+    def scroll_cursor_visible(self) -> None:
+        row, column = self.cursor
+        region = self.scrollable_content_region
+        width = max(region.width - self.gutter_width, 1)
+        height = max(region.height, 1)
+        scroll_x, scroll_y = self.scroll_offset
+        if row < scroll_y:
+            scroll_y = row
+        elif row >= scroll_y + height:
+            scroll_y = row - height + 1
+        if column < scroll_x:
+            scroll_x = column
+        elif column >= scroll_x + width:
+            scroll_x = column - width + 1
+        self.scroll_to(scroll_x, scroll_y, animate=False, immediate=True)
+
+    def action_cursor_up(self, select: bool = False) -> None:
+        row, column = self.cursor
+        self.move_cursor((row - 1, column), select)
+
+    def action_cursor_down(self, select: bool = False) -> None:
+        row, column = self.cursor
+        self.move_cursor((row + 1, column), select)
+
+    def action_cursor_left(self, select: bool = False) -> None:
+        row, column = self.cursor
+        if column == 0 and row > 0 and self.index is not None:
+            self.move_cursor((row - 1, len(self.index.get_line(row - 1))), select)
+        else:
+            self.move_cursor((row, column - 1), select)
+
+    def action_cursor_right(self, select: bool = False) -> None:
+        row, column = self.cursor
+        if self.index is not None and column >= len(self.index.get_line(row)):
+            self.move_cursor((row + 1, 0), select)
+        else:
+            self.move_cursor((row, column + 1), select)
+
+    def action_cursor_line_start(self) -> None:
+        self.move_cursor((self.cursor[0], 0))
+
+    def action_cursor_line_end(self) -> None:
+        row, _ = self.cursor
+        if self.index is not None:
+            self.move_cursor((row, len(self.index.get_line(row))))
+
+    def action_cursor_page_up(self) -> None:
+        row, column = self.cursor
+        self.move_cursor((row - self.scrollable_content_region.height, column))
+
+    def action_cursor_page_down(self) -> None:
+        row, column = self.cursor
+        self.move_cursor((row + self.scrollable_content_region.height, column))
+
+    def action_cursor_half_page_up(self) -> None:
+        row, column = self.cursor
+        self.move_cursor((row - self.scrollable_content_region.height // 2, column))
+
+    def action_cursor_half_page_down(self) -> None:
+        row, column = self.cursor
+        self.move_cursor((row + self.scrollable_content_region.height // 2, column))
+
+    def action_cursor_top(self) -> None:
+        self.move_cursor((0, 0))
+
+    def action_cursor_bottom(self) -> None:
+        if self.index is not None:
+            self.move_cursor((self.index.line_count - 1, 0))
+
+    def action_toggle_visual_mode(self) -> None:
+        self.visual_mode = not self.visual_mode
+
+    def watch_visual_mode(self, value: bool) -> None:
+        self.anchor = self.cursor if value else None
+        self.set_class(value, "visual-mode")
+        self.refresh()
+        self._cursor_moved()
+
+    def action_copy_to_clipboard(self) -> None:
+        index = self.index
+        if index is None:
+            return
+
+        if selection := self.selection:
+            start, (end_row, end_column) = selection
+            if self.visual_mode:
+                end_column += 1
+            text_to_copy = index.get_text_range(start, (end_row, end_column))
+            message = f"Copied {len(text_to_copy)} characters."
+            title = "Selection copied"
+        else:
+            text_to_copy = index.decode()
+            message = f"Copied ({len(text_to_copy)} characters)."
+            title = "Text copied"
+
+        try:
+            import pyperclip
+
+            pyperclip.copy(text_to_copy)
+        except pyperclip.PyperclipException as exc:
+            self.notify(
+                str(exc),
+                title="Clipboard error",
+                severity="error",
+                timeout=10,
+            )
+        else:
+            self.notify(message, title=title)
+
+        self.visual_mode = False
+
+    def action_search(self) -> None:
+        self.post_message(self.SearchRequested(self))
+
+    def search(self, query: str, backwards: bool = False) -> None:
+        """Move the cursor to the next match of `query`, selecting the match."""
+        self.search_query = query
+        index = self.index
+        if index is None or not query:
+            return
+
+        # Search from the start of the current match, so that repeating a
+        # search moves to the next match rather than finding the same one.
+        start = self.selection[0] if self.selection else self.cursor
+        match = index.find(query, start, backwards=backwards)
+        if match is None:
+            self.notify(f"Pattern not found: {query}", severity="warning")
+            return
+
+        self.visual_mode = False
+        row, column = match
+        self.move_cursor((row, column))
+        self.move_cursor((row, column + len(query)), select=True)
+
+    def action_search_next(self) -> None:
+        self.search(self.search_query)
+
+    def action_search_previous(self) -> None:
+        self.search(self.search_query, backwards=True)
+
+    def action_open_in_pager(self) -> None:
+        settings = SETTINGS.get()
+        if self.language == "json" and settings.pager_json:
+            pager_command = settings.pager_json
+        else:
+            pager_command = settings.pager
+            if not pager_command:
+                self.app.notify(
+                    severity="warning",
+                    title="No pager configured",
+                    message="Set the [b]$POSTING_PAGER[/b] environment variable.",
+                )
+                return
+
+        self._open_as_tempfile(pager_command)
+
+    def _open_as_tempfile(self, command: str) -> None:
+        index = self.index
+        if index is None:
+            return
+
+        if index.path is not None:
+            # The body is already on disk, so open the file it was spilled to.
+            file_name = index.path
+        else:
+            suffix = f".{self.language}" if self.language in {"json", "html"} else ""
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+                file_name = temp_file.name
+                # The bytes are written as-is, to avoid decoding the whole body.
+                temp_file.write(index.data)
+
+        with self.app.suspend():
+            try:
+                subprocess.call([*shlex.split(command), file_name])
+            except OSError:
+                self.app.notify(
+                    severity="error",
+                    title="Can't run command",
+                    message=f"The command [b]{command}[/b] failed to run.",
+                )
+
+        if index.path is None:
+            os.remove(file_name)
+        self.app.refresh()
+
+    def _location_at(self, event: events.MouseEvent) -> Location | None:
+        offset = event.get_content_offset(self)
+        if offset is None:
+            return None
+        scroll_x, scroll_y = self.scroll_offset
+        return (
+            scroll_y + offset.y,
+            scroll_x + max(offset.x - self.gutter_width, 0),
+        )
+
+    def on_mouse_down(self, event: events.MouseDown) -> None:
+        location = self._location_at(event)
+        if location is None:
+            return
+        self.focus()
+        self.visual_mode = False
+        self.move_cursor(location)
+        self.anchor = self.cursor
+        self._mouse_selecting = True
+        self.capture_mouse()
+
+    def on_mouse_move(self, event: events.MouseMove) -> None:
+        if self._mouse_selecting and (location := self._location_at(event)):
+            self.move_cursor(location, select=True)
+
+    def on_mouse_up(self, event: events.MouseUp) -> None:
+        if self._mouse_selecting:
+            self._mouse_selecting = False
+            self.release_mouse()
+
+    def on_focus(self) -> None:
+        self.refresh()
+
+    def on_blur(self) -> None:
+        self.refresh()
+
+
+class LargeBodyViewer(Vertical):
+    """A `LargeBodyView`, plus a search bar and a status bar."""
+
+    help = HelpData(
+        title="Large Response Body Viewer",
+        description="""\
+A *read-only* viewer for large response bodies. Only the visible lines are
+decoded and highlighted, so bodies of hundreds of megabytes remain responsive.
+The threshold is configured with `response.large_body_threshold`.
+Supports several Vim keys (see table below).
+Hold `shift` and move the cursor or click and drag to select text.
+Press `v` to toggle *visual mode*, equivalent to keeping `shift` held down.
+Copy to the clipboard by pressing `y`. If no text is selected, the entire response body is copied.
+Press `/` to search, then `n` and `N` to jump to the next and previous match.
+
+Open the response in your `$PAGER` by pressing `f3`.
+""",
+    )
+
+    DEFAULT_CSS = """\
+    LargeBodyViewer {
+        & > #large-body-search {
+            dock: bottom;
+            display: none;
+        }
+        & > #large-body-status {
+            dock: bottom;
+            height: 1;
+            width: 1fr;
+            padding: 0 1;
+            color: $text-muted;
+        }
+        &.-searching > #large-body-search {
+            display: block;
+        }
+    }
+    """
+
+    def compose(self) -> ComposeResult:
+        yield LargeBodyView()
+        yield PostingInput(placeholder="Search…", id="large-body-search")
+        yield Label(id="large-body-status")
+
+    def load(self, index: LineIndex | None, language: str | None) -> None:
+        view = self.view
+        view.language = language
+        view.load(index)
+
+    @property
+    def view(self) -> LargeBodyView:
+        return self.query_one(LargeBodyView)
+
+    @property
+    def search_input(self) -> PostingInput:
+        return self.query_one("#large-body-search", PostingInput)
+
+    @on(LargeBodyView.CursorMoved)
+    def update_status(self, event: LargeBodyView.CursorMoved) -> None:
+        index = event.view.index
+        if index is None:
+            self.query_one("#large-body-status", Label).update("")
+            return
+        row, column = event.location
+        mode = "[b]VISUAL[/]  " if event.visual_mode else ""
+        self.query_one("#large-body-status", Label).update(
+            f"{mode}{row + 1}:{column + 1}  [dim]{index.line_count:,} lines[/]"
+        )
+
+    @on(LargeBodyView.SearchRequested)
+    def open_search(self, event: LargeBodyView.SearchRequested) -> None:
+        self.add_class("-searching")
+        search_input = self.search_input
+        search_input.value = event.view.search_query
+        search_input.focus()
+
+    @on(Input.Submitted, "#large-body-search")
+    def run_search(self, event: Input.Submitted) -> None:
+        self.remove_class("-searching")
+        view = self.view
+        view.focus()
+        view.search(event.value)
+
+    def key_escape(self) -> None:
+        if self.has_class("-searching"):
+            self.remove_class("-searching")
+            self.view.focus()
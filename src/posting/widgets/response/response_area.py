@@ -1,8 +1,16 @@
 import json
 import httpx
+from textual import work
 from textual.lazy import Lazy
+from textual.worker import get_current_worker
 from posting.config import SETTINGS
+from posting.response_buffer import response_body, response_text, spill_path
 
+from posting.widgets.response.large_body import (
+    LargeBodyViewer,
+    LineIndex,
+    is_ascii_compatible,
+)
 from posting.widgets.response.response_trace import ResponseTrace
 from posting.widgets.response.script_output import ScriptOutput
 from posting.widgets.tabbed_content import PostingTabbedContent
@@ -14,9 +22,20 @@ from posting.widgets.response.response_headers import ResponseHeadersTable
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.reactive import Reactive, reactive
+from textual.timer import Timer
+from textual.widget import Widget
 from textual.widgets import TabPane
 from textual.widgets._tabbed_content import ContentTabs
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+STREAM_FLUSH_INTERVAL = 0.1
+"""Seconds between writes of streamed response chunks to the body text area."""
+
 
 class ResponseTabbedContent(PostingTabbedContent):
     pass
@@ -36,6 +55,9 @@ class ResponseArea(Vertical):
     def on_mount(self) -> None:
         self.border_title = "Response"
         self._latest_response: httpx.Response | None = None
+        self._stream_buffer: list[str] = []
+        self._stream_progress: tuple[int, float] = (0, 0.0)
+        self._stream_flush_timer: Timer | None = None
         self.add_class("section")
         self.app.theme_changed_signal.subscribe(self, self.on_theme_change)
 
@@ -47,6 +69,7 @@ class ResponseArea(Vertical):
                     text_area,
                     TextAreaFooter(text_area),
                 )
+                yield LargeBodyViewer()
             with TabPane("Headers", id="response-headers-pane"):
                 yield Lazy(ResponseHeadersTable())
             with TabPane("Cookies", id="response-cookies-pane"):
@@ -64,9 +87,155 @@ class ResponseArea(Vertical):
         self._latest_response = response
         if response is None:
             return
+
+        self._cancel_stream_flush()
+        self._show_response_metadata(response)
+
+        # Decoding and formatting a large body can take a long time, so it's
+        # done in a thread while a loading indicator is shown in the body.
+        response_text_area = self.text_editor.text_area
+        response_settings = SETTINGS.get().response
+        body = response_body(response)
+        body_size = len(body)
+        # Bodies spilled to disk are never loaded into memory in their
+        # entirety, so can't be prettified or shown in the text area.
+        spilled = spill_path(body) is not None
+        max_size = response_settings.prettify_json_max_size
+        prettify = (
+            response_text_area.language == "json"
+            and response_settings.prettify_json
+            and not spilled
+            and (max_size is None or body_size <= max_size)
+        )
+        large_body_threshold = response_settings.large_body_threshold
+        use_large_body_viewer = spilled or (
+            large_body_threshold is not None and body_size > large_body_threshold
+        )
+        self._show_large_body_viewer(use_large_body_viewer)
+        if use_large_body_viewer:
+            # Drop the previous body from the text area, as it may be large.
+            response_text_area.text = ""
+            self.large_body_viewer.loading = True
+            self.load_large_response_body(response, prettify)
         else:
-            self.query_one(ResponseTabbedContent).disabled = False
+            self.large_body_viewer.load(None, None)
+            response_text_area.loading = True
+            self.load_response_body(response, prettify)
+
+        settings = SETTINGS.get()
+        if settings.response.show_size_and_time:
+            self.border_subtitle = f"{human_readable_size(body_size)} in {response.elapsed.total_seconds() * 1000:.2f}[dim]ms[/]"
+
+    @work(thread=True, exclusive=True, group="response-body")
+    def load_response_body(self, response: httpx.Response, prettify: bool) -> None:
+        """Decode (and optionally prettify) the response body, then display it."""
+        text = response_text(response)
+        if prettify:
+            text = prettify_json(text) or text
+
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self._show_response_body, text)
+
+    def _show_response_body(self, response_text: str) -> None:
+        response_text_area = self.text_editor.text_area
+        response_text_area.text = response_text
+        response_text_area.loading = False
+
+    @work(thread=True, exclusive=True, group="response-body")
+    def load_large_response_body(
+        self, response: httpx.Response, prettify: bool
+    ) -> None:
+        """Index the lines of a large response body, then display it.
+
+        The body is kept as bytes where possible, so that it's only ever
+        decoded a screenful at a time by the viewer."""
+        path = None
+        text = prettify_json(response_text(response)) if prettify else None
+        if text is not None:
+            content, encoding = text.encode("utf-8"), "utf-8"
+        else:
+            content = response_body(response)
+            encoding = response.encoding or "utf-8"
+            if is_ascii_compatible(encoding):
+                path = spill_path(content)
+            else:
+                content, encoding = response_text(response).encode("utf-8"), "utf-8"
+
+        line_index = LineIndex(content, encoding, path=path)
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self._show_large_response_body, line_index)
+
+    def _show_large_response_body(self, line_index: LineIndex) -> None:
+        large_body_viewer = self.large_body_viewer
+        large_body_viewer.load(line_index, self.text_editor.language)
+        large_body_viewer.loading = False
+
+    def _show_large_body_viewer(self, show: bool) -> None:
+        """Toggle between the text area and the large body viewer."""
+        text_editor = self.text_editor
+        had_focus = self.body_widget.has_focus
+        text_editor.display = not show
+        self.large_body_viewer.display = show
+        if had_focus:
+            self.body_widget.focus()
+
+    def start_stream(self, response: httpx.Response) -> None:
+        """Display the status and headers of a response whose body
+        is still being received. The body is cleared, ready for chunks
+        to be appended via `append_stream_chunk`."""
+        self._latest_response = response
+        self._cancel_stream_flush()
+        self.workers.cancel_group(self, "response-body")
+        self._show_response_metadata(response)
+        self._show_large_body_viewer(False)
+        self.large_body_viewer.load(None, None)
+        self.text_editor.text_area.loading = False
+        self.text_editor.text_area.text = ""
+        self.border_subtitle = ""
+
+    def append_stream_chunk(
+        self, text: str, bytes_received: int, elapsed: float
+    ) -> None:
+        """Append newly received text to the body of a streamed response.
+
+        Chunks can arrive far faster than it's sensible to redraw, so
+        they're buffered and written to the text area periodically.
 
+        Once the body is too large for the text area, only the progress
+        is updated. The complete body is shown in the large body viewer
+        when the response has been fully received.
+        """
+        large_body_threshold = SETTINGS.get().response.large_body_threshold
+        if large_body_threshold is None or bytes_received <= large_body_threshold:
+            self._stream_buffer.append(text)
+        self._stream_progress = (bytes_received, elapsed)
+        if self._stream_flush_timer is None:
+            self._stream_flush_timer = self.set_timer(
+                STREAM_FLUSH_INTERVAL, self._flush_stream
+            )
+
+    def _flush_stream(self) -> None:
+        self._stream_flush_timer = None
+        text = "".join(self._stream_buffer)
+        self._stream_buffer.clear()
+        if text:
+            text_area = self.text_editor.text_area
+            text_area.insert(text, text_area.document.end)
+
+        if SETTINGS.get().response.show_size_and_time:
+            bytes_received, elapsed = self._stream_progress
+            rate = bytes_received / elapsed if elapsed > 0 else 0
+            self.border_subtitle = f"{human_readable_size(bytes_received)} received at {human_readable_size(rate)}/s"
+
+    def _cancel_stream_flush(self) -> None:
+        if self._stream_flush_timer is not None:
+            self._stream_flush_timer.stop()
+            self._stream_flush_timer = None
+        self._stream_buffer.clear()
+
+    def _show_response_metadata(self, response: httpx.Response) -> None:
+        """Display everything about the response except the body."""
+        self.query_one(ResponseTabbedContent).disabled = False
         self.add_class("response-ready")
 
         content_type = response.headers.get("content-type")
@@ -74,20 +243,6 @@ class ResponseArea(Vertical):
             language = content_type_to_language(content_type)
             self.text_editor.language = language
 
-        # Update the body text area with the body content.
-        response_text_area = self.text_editor.text_area
-        response_text = response.text
-        response_settings = SETTINGS.get().response
-        if response_text_area.language == "json" and response_settings.prettify_json:
-            try:
-                response_text = json.dumps(
-                    json.loads(response_text), indent=2, ensure_ascii=False
-                )
-            except json.JSONDecodeError:
-                pass
-
-        response_text_area.text = response_text
-
         # Update the response headers table with the response headers.
         response_headers_table = self.headers_table
         response_headers_table.clear()
@@ -112,18 +267,26 @@ class ResponseArea(Vertical):
 
         self.border_title = self._make_border_title(response)
 
-        settings = SETTINGS.get()
-        if settings.response.show_size_and_time:
-            self.border_subtitle = f"{human_readable_size(len(response.content))} in {response.elapsed.total_seconds() * 1000:.2f}[dim]ms[/]"
-
     def _make_border_title(self, response: httpx.Response) -> str:
         style = self.get_component_rich_style("border-title-status")
-        return f"Response [{style}] {response.status_code} {response.reason_phrase} [/]"
+        return f"Response [{style}] {response.status_code} {response.reason_phrase} [/] [dim]{response.http_version}[/]"
 
     @property
     def text_editor(self) -> TextEditor:
         return self.query_one(TextEditor)
 
+    @property
+    def large_body_viewer(self) -> LargeBodyViewer:
+        return self.query_one(LargeBodyViewer)
+
+    @property
+    def body_widget(self) -> Widget:
+        """The widget currently displaying the response body."""
+        large_body_viewer = self.large_body_viewer
+        if large_body_viewer.display:
+            return large_body_viewer.view
+        return self.text_editor.text_area
+
     @property
     def headers_table(self) -> ResponseHeadersTable:
         return self.query_one(ResponseHeadersTable)
@@ -141,6 +304,38 @@ class ResponseArea(Vertical):
         return self.tabbed_content.query_one(ContentTabs)
 
 
+def prettify_json(text: str) -> str | None:
+    """Return the JSON document formatted with an indent of two spaces,
+    or None if the text is not valid JSON.
+
+    Formatting with an indent can't use the C accelerated encoder in the
+    standard library, so orjson is used for encoding if it's installed.
+    Parsing is always done by the standard library, as orjson silently
+    converts integers larger than 64 bits to floats, and `NaN`/`Infinity`
+    to `null`.
+    """
+    non_finite = False
+
+    def parse_constant(constant: str) -> float:
+        nonlocal non_finite
+        non_finite = True
+        return float(constant)
+
+    try:
+        document = json.loads(text, parse_constant=parse_constant)
+    except json.JSONDecodeError:
+        return None
+
+    if orjson is not None and not non_finite:
+        try:
+            return orjson.dumps(document, option=orjson.OPT_INDENT_2).decode()
+        except orjson.JSONEncodeError:
+            # e.g. integers larger than 64 bits.
+            pass
+
+    return json.dumps(document, indent=2, ensure_ascii=False)
+
+
 def content_type_to_language(content_type: str) -> str | None:
     """Given the value of an HTTP content-type header, return the name
     of the language to use in the response body text area."""
@@ -28,6 +28,8 @@ can be used for JSON responses by setting the `pager_json` config to the command
 
     @on(TextArea.Changed)
     def on_change(self, event: TextArea.Changed) -> None:
-        empty = len(self.text) == 0
+        # Avoid materialising the whole document, which would be costly
+        # when a large response body is being streamed in.
+        empty = self.document.end == (0, 0)
         self.set_class(empty, "empty")
         self.show_line_numbers = not empty
@@ -21,12 +21,33 @@ Event = Literal[
     "http11.send_request_body.started",
     "http11.send_request_body.complete",
     "http11.send_request_body.failed",
+    "http11.receive_response_headers.started",
+    "http11.receive_response_headers.complete",
+    "http11.receive_response_headers.failed",
     "http11.receive_response_body.started",
     "http11.receive_response_body.complete",
     "http11.receive_response_body.failed",
     "http11.response_closed.started",
     "http11.response_closed.complete",
     "http11.response_closed.failed",
+    "http2.send_connection_init.started",
+    "http2.send_connection_init.complete",
+    "http2.send_connection_init.failed",
+    "http2.send_request_headers.started",
+    "http2.send_request_headers.complete",
+    "http2.send_request_headers.failed",
+    "http2.send_request_body.started",
+    "http2.send_request_body.complete",
+    "http2.send_request_body.failed",
+    "http2.receive_response_headers.started",
+    "http2.receive_response_headers.complete",
+    "http2.receive_response_headers.failed",
+    "http2.receive_response_body.started",
+    "http2.receive_response_body.complete",
+    "http2.receive_response_body.failed",
+    "http2.response_closed.started",
+    "http2.response_closed.complete",
+    "http2.response_closed.failed",
 ]
 
 
@@ -12,8 +12,24 @@ from posting.variables import (
     get_variable_at_cursor,
     get_variables,
     is_cursor_within_variable,
+    variables_generation,
 )
 
+_variable_candidates: tuple[int, list[DropdownItem]] = (-1, [])
+
+
+def get_variable_candidates(
+    target_state: TargetState | None = None,
+) -> list[DropdownItem]:
+    """Return a dropdown item for each variable. The items are only rebuilt
+    when the variables have changed."""
+    global _variable_candidates
+    generation, candidates = _variable_candidates
+    if generation != variables_generation():
+        candidates = [DropdownItem(main=f"${variable}") for variable in get_variables()]
+        _variable_candidates = (variables_generation(), candidates)
+    return list(candidates)
+
 
 class VariableAutoComplete(AutoComplete):
     def __init__(
@@ -43,9 +59,7 @@ class VariableAutoComplete(AutoComplete):
             disabled=disabled,
         )
         if variable_candidates is None:
-            variable_candidates = [
-                DropdownItem(main=f"${variable}") for variable in get_variables()
-            ]
+            variable_candidates = get_variable_candidates()
         self.variable_candidates = variable_candidates
 
     def get_candidates(self, target_state: TargetState) -> list[DropdownItem]:
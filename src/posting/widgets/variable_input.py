@@ -3,10 +3,12 @@ from textual_autocomplete import DropdownItem, TargetState
 from posting.help_data import HelpData
 from posting.highlighters import VariableHighlighter
 from posting.themes import Theme, VariableStyles
-from posting.variables import get_variables
 from posting.widgets.input import PostingInput
 
-from posting.widgets.variable_autocomplete import VariableAutoComplete
+from posting.widgets.variable_autocomplete import (
+    VariableAutoComplete,
+    get_variable_candidates,
+)
 
 
 class VariableInput(PostingInput):
@@ -59,4 +61,4 @@ Press `tab` to both insert *and* shift focus.
         self.refresh()
 
     def _get_variable_candidates(self, target_state: TargetState) -> list[DropdownItem]:
-        return [DropdownItem(main=f"${variable}") for variable in get_variables()]
+        return get_variable_candidates(target_state)
@@ -0,0 +1,208 @@
+import asyncio
+import io
+import threading
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from posting.bench import (
+    BenchStats,
+    Benchmark,
+    LatencyHistogram,
+    MultiProcessBenchmark,
+    build_timeline,
+)
+from posting.collection import load_request_from_yaml
+from posting.config import SETTINGS, Settings
+from posting.runner import CollectionRunner, RunResult
+from posting.variables import VARIABLES
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = b"ok"
+        self.send_response(200 if self.path == "/ok" else 500)
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_histogram_percentiles_within_precision():
+    histogram = LatencyHistogram(significant_figures=3)
+    for value in range(1, 100_001):
+        histogram.record(value)
+
+    assert histogram.total_count == 100_000
+    assert histogram.min == 1
+    assert histogram.max == 100_000
+    assert histogram.mean == pytest.approx(50_000.5)
+    for percentile, expected in [(50, 50_000), (90, 90_000), (99.9, 99_900)]:
+        assert histogram.percentile(percentile) == pytest.approx(expected, rel=1e-3)
+    assert histogram.percentile(100) == 100_000
+
+
+def test_histogram_merge():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(10, count=3)
+    second.record(5_000_000)
+
+    first.merge(second)
+
+    assert first.total_count == 4
+    assert first.min == 10
+    assert first.max == 5_000_000
+    assert first.percentile(75) == 10
+    assert first.percentile(99) == pytest.approx(5_000_000, rel=1e-3)
+    with pytest.raises(ValueError):
+        first.merge(LatencyHistogram(significant_figures=2))
+
+
+def test_stats_error_breakdown():
+    stats = BenchStats()
+    result = RunResult(name="r", path=None, method="GET", url="http://x")
+    stats.add(replace(result, status=200, size=10, elapsed_ms=1.5))
+    stats.add(replace(result, status=503, elapsed_ms=2.0))
+    stats.add(replace(result, error="ConnectError: refused"))
+    stats.add(replace(result, status=200, scripts={"on_response": "error"}))
+
+    assert stats.requests == 4
+    assert stats.statuses == {200: 2, 503: 1}
+    assert stats.errors == {
+        "HTTP 503": 1,
+        "ConnectError": 1,
+        "on_response script": 1,
+    }
+    assert stats.bytes_received == 10
+    assert stats.latency.total_count == 2
+    assert stats.to_dict()["latency_ms"]["max"] == 2.0
+
+
+@pytest.mark.parametrize("rate", [None, 500.0])
+def test_benchmark_sends_requested_number(tmp_path: Path, server_url: str, rate):
+    SETTINGS.set(Settings())
+    VARIABLES.set({"path": "ok"})
+    request_path = tmp_path / "ok.posting.yaml"
+    request_path.write_text(f"name: ok\nurl: {server_url}/${{path}}\n")
+    request_model = load_request_from_yaml(str(request_path))
+    runner = CollectionRunner(tmp_path, error_stream=io.StringIO())
+    benchmark = Benchmark(
+        runner, request_model, concurrency=4, rate=rate, total_requests=20
+    )
+
+    stats = asyncio.run(benchmark.run())
+
+    assert stats.requests == 20
+    assert stats.statuses == {200: 20}
+    assert not stats.errors
+    assert stats.throughput > 0
+    assert "receive_response_headers" in stats.phases
+    # Templating is applied to a copy for each request.
+    assert "${path}" in request_model.url
+
+
+def test_constant_timeline():
+    assert list(build_timeline("constant", 4, duration=1)) == [0, 0.25, 0.5, 0.75]
+    assert len(build_timeline("constant", 4, duration=10, total_requests=3)) == 3
+
+
+def test_poisson_timeline():
+    timeline = build_timeline("poisson", 1000, duration=10, seed=1)
+    assert list(timeline) == sorted(timeline)
+    assert timeline[-1] < 10
+    assert len(timeline) == pytest.approx(10_000, rel=0.05)
+
+
+def test_ramp_timeline():
+    timeline = build_timeline("ramp", 100, duration=10, ramp_from=0)
+    # The average rate is halfway between the start and end rates.
+    assert len(timeline) == 500
+    assert timeline[-1] < 10
+    first_half = sum(1 for offset in timeline if offset < 5)
+    assert first_half == pytest.approx(125, abs=1)
+
+    with pytest.raises(ValueError):
+        build_timeline("ramp", 100, total_requests=10)
+
+
+def test_open_loop_records_schedule_delay(tmp_path: Path, server_url: str):
+    SETTINGS.set(Settings())
+    request_path = tmp_path / "ok.posting.yaml"
+    request_path.write_text(f"name: ok\nurl: {server_url}/ok\n")
+    runner = CollectionRunner(tmp_path, error_stream=io.StringIO())
+    benchmark = Benchmark(
+        runner,
+        load_request_from_yaml(str(request_path)),
+        concurrency=1,
+        rate=1000,
+        total_requests=10,
+    )
+
+    stats = asyncio.run(benchmark.run())
+
+    assert stats.requests == 10
+    assert stats.schedule_delay.total_count == 10
+    assert stats.service_time.total_count == 10
+    # With one request in flight at a time, later requests queue behind
+    # earlier ones, and their latency includes the time spent waiting.
+    assert stats.latency.max >= stats.service_time.max
+    assert stats.latency.max >= stats.schedule_delay.max
+
+
+def test_multi_process_benchmark_divides_work(tmp_path: Path):
+    request_path = tmp_path / "ok.posting.yaml"
+    request_path.write_text("name: ok\nurl: http://127.0.0.1/\n")
+    request_model = load_request_from_yaml(str(request_path))
+
+    closed_loop = MultiProcessBenchmark(
+        tmp_path, request_model, processes=4, concurrency=10, total_requests=3
+    )
+    assert closed_loop.processes == 3
+    assert [options["concurrency"] for options in closed_loop._worker_options()] == [
+        4,
+        3,
+        3,
+    ]
+    assert [
+        options["total_requests"] for options in closed_loop._worker_options()
+    ] == [1, 1, 1]
+
+    open_loop = MultiProcessBenchmark(
+        tmp_path, request_model, processes=2, concurrency=4, rate=10, duration=1
+    )
+    timelines = [options["timeline"] for options in open_loop._worker_options()]
+    assert sorted([*timelines[0], *timelines[1]]) == list(open_loop.timeline)
+    assert list(timelines[0]) == [0.0, 0.2, 0.4, 0.6, 0.8]
+
+
+def test_multi_process_benchmark_merges_results(tmp_path: Path, server_url: str):
+    SETTINGS.set(Settings())
+    VARIABLES.set({"path": "ok"})
+    request_path = tmp_path / "ok.posting.yaml"
+    request_path.write_text(f"name: ok\nurl: {server_url}/${{path}}\n")
+    benchmark = MultiProcessBenchmark(
+        tmp_path,
+        load_request_from_yaml(str(request_path)),
+        processes=2,
+        concurrency=2,
+        total_requests=10,
+    )
+
+    stats = benchmark.run()
+
+    assert stats.requests == 10
+    assert stats.statuses == {200: 10}
+    assert stats.latency.total_count == 10
@@ -0,0 +1,163 @@
+from pathlib import Path
+
+import pytest
+
+from posting import collection as collection_module
+from posting import collection_index as collection_index_module
+from posting.collection import (
+    Auth,
+    Collection,
+    Header,
+    RequestBody,
+    RequestModel,
+    RequestSummary,
+)
+from posting.collection_index import CollectionIndex
+from posting.runner import iter_requests
+
+
+@pytest.fixture
+def collection_path(tmp_path: Path) -> Path:
+    for relative in (
+        "a.posting.yaml",
+        "users/b.posting.yaml",
+        "users/admin/c.posting.yaml",
+    ):
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"name: {path.stem.split('.')[0]}\nurl: https://example.com\n")
+    (tmp_path / "users" / "broken.posting.yaml").write_text("name: [unterminated\n")
+    return tmp_path
+
+
+def describe(collection: Collection) -> dict[str, object]:
+    return {
+        "path": collection.path,
+        "requests": [request.name for request in collection.requests],
+        "children": {child.name: describe(child) for child in collection.children},
+    }
+
+
+def test_from_directory_builds_tree(collection_path: Path, capsys):
+    tree = Collection.from_directory(str(collection_path), max_workers=1)
+
+    assert describe(tree) == {
+        "path": collection_path,
+        "requests": ["a"],
+        "children": {
+            "users": {
+                "path": collection_path / "users",
+                "requests": ["b"],
+                "children": {
+                    "admin": {
+                        "path": collection_path / "users" / "admin",
+                        "requests": ["c"],
+                        "children": {},
+                    }
+                },
+            }
+        },
+    }
+    assert "Failed to load" in capsys.readouterr().out
+
+
+def test_parallel_load_matches_serial(collection_path: Path, monkeypatch):
+    serial = Collection.from_directory(str(collection_path), max_workers=1)
+    monkeypatch.setattr(collection_module, "PARALLEL_LOAD_MIN_FILES", 0)
+
+    parallel = Collection.from_directory(str(collection_path), max_workers=2)
+
+    assert parallel == serial
+
+
+def test_index_reuses_unchanged_files(collection_path: Path, tmp_path_factory):
+    index_path = tmp_path_factory.mktemp("cache") / "collection.index"
+    index = CollectionIndex(index_path)
+    first = Collection.from_directory(str(collection_path), 1, index)
+    assert (index.hits, index.misses) == (0, 4)
+    # The broken file isn't indexed, so it's read every time.
+    assert len(index) == 3
+
+    changed = collection_path / "users" / "b.posting.yaml"
+    changed.write_text("name: b2\nurl: https://example.com/changed\n")
+    (collection_path / "a.posting.yaml").unlink()
+
+    index = CollectionIndex(index_path)
+    index.load()
+    second = Collection.from_directory(str(collection_path), 1, index)
+    assert (index.hits, index.misses) == (1, 2)
+    assert len(index) == 2
+    assert [request.name for request in second.children[0].requests] == ["b2"]
+    assert second.children[0].children == first.children[0].children
+
+
+def test_index_discarded_when_outdated(tmp_path: Path, monkeypatch):
+    index = CollectionIndex(tmp_path / "collection.index")
+    index.put("request.posting.yaml", tmp_path.stat(), {"name": "request"})
+    index.save()
+
+    monkeypatch.setattr(collection_index_module, "INDEX_FORMAT_VERSION", -1)
+    index = CollectionIndex(tmp_path / "collection.index")
+    index.load()
+    assert len(index) == 0
+
+
+def test_lazy_load_summarises_requests(collection_path: Path):
+    eager = Collection.from_directory(str(collection_path), max_workers=1)
+    lazy = Collection.from_directory(str(collection_path), max_workers=1, lazy=True)
+
+    [summary] = lazy.requests
+    assert isinstance(summary, RequestSummary)
+    assert (summary.name, summary.method, summary.url) == (
+        "a",
+        "GET",
+        "https://example.com",
+    )
+    assert summary.load() == eager.requests[0]
+    assert [request.name for request in iter_requests(lazy)] == ["a", "b", "c"]
+
+
+def test_summary_rejects_invalid_method(tmp_path: Path):
+    with pytest.raises(ValueError):
+        RequestSummary.from_data({"method": "FETCH"}, tmp_path / "r.posting.yaml")
+
+
+def test_apply_template_substitutes_fields():
+    request = RequestModel(
+        name="Create",
+        url="$host/users",
+        headers=[Header(name="Authorization", value="Bearer ${token}")],
+        body=RequestBody(content='{"price": "$$5"}'),
+        auth=Auth.bearer_token_auth("$token"),
+    )
+    assert request.referenced_variables() == {"host", "token"}
+
+    request.apply_template({"host": "example.com", "token": "abc"})
+    assert request.url == "http://example.com/users"
+    assert request.headers[0].value == "Bearer abc"
+    assert request.body is not None
+    assert request.body.content == '{"price": "$5"}'
+    assert request.auth is not None and request.auth.bearer_token is not None
+    assert request.auth.bearer_token.token == "abc"
+
+
+def test_content_type_header_added_unless_set():
+    request = RequestModel(
+        url="https://example.com",
+        body=RequestBody(content='{"a": 1}', content_type="application/json"),
+    )
+    request.add_content_type_header()
+    request.add_content_type_header()
+    assert [(h.name, h.value) for h in request.headers] == [
+        ("content-type", "application/json")
+    ]
+
+    request = RequestModel(
+        url="https://example.com",
+        headers=[Header(name="Content-Type", value="text/plain")],
+        body=RequestBody(content="hello", content_type="application/json"),
+    )
+    request.add_content_type_header()
+    assert [(h.name, h.value) for h in request.headers] == [
+        ("Content-Type", "text/plain")
+    ]
@@ -0,0 +1,236 @@
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from textual.command import CommandList
+from textual.lazy import Lazy
+from textual.pilot import Pilot
+
+from posting import collection as collection_module
+from posting.__main__ import make_posting
+from posting.collection import RequestSummary
+from posting.widgets.collection import browser
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+async def wait_until(
+    pilot: Pilot, condition: Callable[[], bool], timeout: float = 5
+) -> None:
+    """Let the app run until the condition is met, failing after a timeout."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the app"
+        await pilot.pause(0.01)
+
+
+@pytest.fixture
+def collection_path(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    for setting in ("ENV_FILES", "COLLECTION_FILES", "THEMES"):
+        monkeypatch.setenv(f"POSTING_WATCH_{setting}", "false")
+
+    collection = tmp_path / "collection"
+    for folder in ("users", "users/admin", "posts"):
+        (collection / folder).mkdir(parents=True)
+        for index in range(2):
+            name = f"{folder.replace('/', '-')}-{index}"
+            (collection / folder / f"{name}.posting.yaml").write_text(
+                f"name: {name}\nurl: https://example.com/{folder}/{index}\n"
+            )
+    return collection
+
+
+@pytest.mark.anyio
+async def test_large_collection_populated_on_expand(collection_path: Path, monkeypatch):
+    monkeypatch.setattr(browser, "EXPAND_ALL_MAX_REQUESTS", 2)
+    app = make_posting(collection_path)
+
+    async with app.run_test() as pilot:
+        tree = app.main_screen.collection_tree
+        # Only the top-level collections have nodes, and they're collapsed.
+        assert [node.label.plain for node in tree.root.children] == [
+            "posts",
+            "users",
+        ]
+        assert all(not node.children for node in tree.root.children)
+        assert len(list(tree.iter_requests())) == 6
+
+        users = tree.root.children[1]
+        users.expand()
+        await wait_until(pilot, lambda: bool(users.children))
+        assert [node.label.plain for node in users.children] == [
+            "users-0",
+            "users-1",
+            "admin",
+        ]
+        assert isinstance(users.children[0].data, RequestSummary)
+
+        path = collection_path / "users" / "admin" / "users-admin-1.posting.yaml"
+        node = tree.reveal_request(path)
+        assert node is not None and node.data.path == path
+        assert node.parent is not None and node.parent.is_expanded
+
+
+@pytest.mark.anyio
+async def test_small_collection_fully_expanded(collection_path: Path):
+    app = make_posting(collection_path)
+
+    async with app.run_test():
+        tree = app.main_screen.collection_tree
+        nodes = list(tree.walk_nodes())
+        # The root, 3 collections and 6 requests.
+        assert len(nodes) == 10
+        assert all(node.is_expanded for node in nodes if node.allow_expand)
+
+
+@pytest.mark.anyio
+async def test_base_urls_ordered_by_usage(collection_path: Path, monkeypatch):
+    monkeypatch.setattr(browser, "EXPAND_ALL_MAX_REQUESTS", 2)
+    (collection_path / "other.posting.yaml").write_text(
+        "name: other\nurl: http://other.test/\n"
+    )
+    app = make_posting(collection_path)
+
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        tree = app.main_screen.collection_tree
+        # Requests in collections which haven't been populated are counted.
+        assert tree.base_url_counts == {
+            "https://example.com": 6,
+            "http://other.test": 1,
+        }
+        assert app.main_screen.url_bar.cached_base_urls == [
+            "https://example.com",
+            "http://other.test",
+        ]
+
+        other = next(
+            node
+            for node in tree.root.children
+            if node.data is not None and node.data.name == "other"
+        )
+        tree._delete_request_node(other)
+        await pilot.pause()
+        assert app.main_screen.url_bar.cached_base_urls == ["https://example.com"]
+
+
+@pytest.mark.anyio
+async def test_changed_request_files_patched_into_tree(collection_path: Path, monkeypatch):
+    monkeypatch.setattr(browser, "EXPAND_ALL_MAX_REQUESTS", 2)
+    app = make_posting(collection_path)
+
+    def no_process_pool(*args, **kwargs):
+        raise AssertionError("A process pool was started inside the app")
+
+    # Even a large burst of changes is read without a process pool.
+    monkeypatch.setattr(collection_module, "PARALLEL_LOAD_MIN_FILES", 1)
+    monkeypatch.setattr(collection_module.os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(collection_module, "ProcessPoolExecutor", no_process_pool)
+
+    async with app.run_test() as pilot:
+        tree = app.main_screen.collection_tree
+        users = tree.root.children[1]
+        users.expand()
+        await wait_until(pilot, lambda: bool(users.children))
+
+        edited = collection_path / "users" / "users-0.posting.yaml"
+        edited.write_text("name: renamed\nurl: http://edited.test/\n")
+        deleted = collection_path / "users" / "users-1.posting.yaml"
+        deleted.unlink()
+        # A request in a collection whose node hasn't been populated.
+        added = collection_path / "posts" / "posts-2.posting.yaml"
+        added.write_text("name: posts-2\nurl: https://example.com/posts/2\n")
+        # A request in a new sub-collection.
+        nested = collection_path / "users" / "guests" / "guest.posting.yaml"
+        nested.parent.mkdir()
+        nested.write_text("name: guest\nurl: https://example.com/guest\n")
+
+        app._changed_request_files.update(
+            str(path) for path in (edited, deleted, added, nested)
+        )
+        await app.reload_request_files().wait()
+        await pilot.pause()
+
+        assert [node.label.plain for node in users.children] == [
+            "renamed",
+            "admin",
+            "guests",
+        ]
+        assert users.children[0].data.url == "http://edited.test/"
+        assert tree.base_url_counts == {
+            "https://example.com": 6,
+            "http://edited.test": 1,
+        }
+
+        posts = tree.root.children[0]
+        assert not posts.children
+        posts.expand()
+        await wait_until(pilot, lambda: bool(posts.children))
+        assert [node.label.plain for node in posts.children] == [
+            "posts-0",
+            "posts-1",
+            "posts-2",
+        ]
+        assert tree.reveal_request(nested) is not None
+
+
+@pytest.mark.anyio
+async def test_request_search_uses_index(collection_path: Path, monkeypatch):
+    monkeypatch.setattr(browser, "EXPAND_ALL_MAX_REQUESTS", 2)
+    (collection_path / "users" / "admin" / "users-admin-1.posting.yaml").write_text(
+        "name: users-admin-1\n"
+        "url: https://example.com/users/admin/1\n"
+        "headers:\n"
+        "- name: X-Tenant\n"
+        "  value: acme\n"
+    )
+    app = make_posting(collection_path)
+
+    async with app.run_test() as pilot:
+        tree = app.main_screen.collection_tree
+        await app.main_screen.search_index_worker.wait()
+        assert len(tree.search_index) == 6
+        # The request editor's tabs are mounted after the screen's first
+        # refresh, so they must be in place before a request can be opened.
+        await wait_until(pilot, lambda: not app.main_screen.query(Lazy))
+
+        async def open_from_search(query: str, name: str) -> None:
+            app.main_screen.action_open_request_search_palette()
+            await pilot.press(*query)
+            # Wait for the palette to show its only result before choosing it.
+            await wait_until(
+                pilot, lambda: app.screen.query_one(CommandList).option_count == 1
+            )
+            await pilot.press("enter")
+            await wait_until(
+                pilot,
+                lambda: tree.currently_open is not None
+                and tree.currently_open.data.name == name,
+            )
+
+        await open_from_search("acme", "users-admin-1")
+
+        # Names are fuzzy matched, too.
+        await open_from_search("psts1", "posts-1")
+        assert tree.search_index.recent.most_recent(2) == [
+            collection_path / "posts" / "posts-1.posting.yaml",
+            collection_path / "users" / "admin" / "users-admin-1.posting.yaml",
+        ]
+
+
+@pytest.mark.anyio
+async def test_collection_index_saved_in_background(collection_path: Path):
+    app = make_posting(collection_path)
+    index_path = app.collection_index.path
+    # The index isn't written while loading the collection at startup...
+    assert not index_path.exists()
+
+    async with app.run_test():
+        # ...but once the app has read every request file in the background.
+        await app.main_screen.search_index_worker.wait()
+        assert index_path.exists()
@@ -0,0 +1,79 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from posting.__main__ import make_posting
+from posting.app import Posting
+from posting.variables import get_variables
+from posting.widgets.text_area import PostingTextArea
+
+
+@pytest.fixture
+def environments(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    for setting in ("ENV_FILES", "COLLECTION_FILES", "THEMES"):
+        monkeypatch.setenv(f"POSTING_WATCH_{setting}", "false")
+    monkeypatch.chdir(tmp_path)
+
+    (tmp_path / "local.env").write_text("HOST=localhost\n")
+    (tmp_path / "staging.env").write_text("HOST=staging.example.com\n")
+    monkeypatch.setenv(
+        "POSTING_ENVIRONMENTS",
+        json.dumps(
+            {
+                "local": {"files": ["local.env"]},
+                "staging": {"files": ["staging.env"], "variables": {"TOKEN": "xyz"}},
+            }
+        ),
+    )
+    monkeypatch.setenv("POSTING_DEFAULT_ENVIRONMENT", "local")
+
+    collection = tmp_path / "collection"
+    collection.mkdir()
+    (collection / "get-host.posting.yaml").write_text(
+        "name: get host\nurl: https://$HOST/\n"
+    )
+    return collection
+
+
+def test_default_environment_used_on_startup(environments: Path):
+    app = make_posting(environments)
+    assert app.active_environment == "local"
+    assert app.environment_profiles.names == ["local", "staging"]
+    assert get_variables()["HOST"] == "localhost"
+
+
+def test_switching_environment_publishes_changed_variables(environments: Path):
+    app = make_posting(environments)
+
+    async def run() -> None:
+        async with app.run_test() as pilot:
+            published: list[frozenset[str]] = []
+            app.env_changed_signal.subscribe(app.screen, published.append)
+
+            app.switch_environment("staging")
+            await pilot.pause()
+            assert published == [frozenset({"HOST", "TOKEN"})]
+            assert app.active_environment == "staging"
+            assert app.environment_files == (
+                (environments.parent / "staging.env").resolve(),
+            )
+            assert get_variables()["HOST"] == "staging.example.com"
+
+            await pilot.press("ctrl+g")
+            await pilot.pause()
+            assert app.screen.id == "environment-palette"
+
+    asyncio.run(run())
+
+
+def test_switch_environment_key_not_bound_by_text_areas():
+    def keys(bindings) -> set[str]:
+        return {key for binding in bindings for key in binding.key.split(",")}
+
+    switch_environment = next(
+        binding for binding in Posting.BINDINGS if binding.id == "switch-environment"
+    )
+    assert not keys([switch_environment]) & keys(PostingTextArea.BINDINGS)
@@ -0,0 +1,116 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from posting.file_watcher import FileChange, FileWatcher, IgnoreRules
+
+
+@pytest.fixture
+def collection_path(tmp_path: Path) -> Path:
+    for folder in ("users/admin", "node_modules/lib", ".venv/lib", "build/out"):
+        (tmp_path / folder).mkdir(parents=True)
+    (tmp_path / ".gitignore").write_text("# Build output\nbuild/\n*.log\n!keep.log\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "relative_path, is_dir, ignored",
+    [
+        ("users", True, False),
+        ("users/get.posting.yaml", False, False),
+        ("node_modules", True, True),
+        ("node_modules/lib/index.js", False, True),
+        ("users/.venv", True, True),
+        ("build/out/request.posting.yaml", False, True),
+        ("users/debug.log", False, True),
+        ("scripts/__pycache__/hooks.cpython-311.pyc", False, True),
+        # Directory-only patterns don't match files.
+        ("users/build", False, False),
+    ],
+)
+def test_ignore_rules(
+    collection_path: Path, relative_path: str, is_dir: bool, ignored: bool
+):
+    rules = IgnoreRules.for_directory(collection_path)
+    assert rules.ignores(collection_path / relative_path, is_dir=is_dir) is ignored
+
+
+def test_ignored_directories_not_watched(collection_path: Path):
+    watcher = FileWatcher(ignore=["admin"])
+    watcher.subscribe([collection_path], lambda changes: None, recursive=True)
+    assert watcher.watch_paths() == {collection_path, collection_path / "users"}
+
+
+def test_changes_dispatched_to_matching_subscribers(tmp_path: Path):
+    env_file = tmp_path / ".env"
+    themes = tmp_path / "themes"
+    received: dict[str, list[FileChange]] = {"env": [], "themes": []}
+
+    async def on_theme_change(changes: list[FileChange]) -> None:
+        received["themes"] += changes
+
+    watcher = FileWatcher()
+    watcher.subscribe([env_file], received["env"].extend)
+    watcher.subscribe([themes], on_theme_change)
+    asyncio.run(
+        watcher.dispatch(
+            [
+                FileChange("modified", env_file),
+                FileChange("added", themes / "dark.yaml"),
+                FileChange("added", themes / "nested" / "light.yaml"),
+            ]
+        )
+    )
+    assert received == {
+        "env": [FileChange("modified", env_file)],
+        "themes": [FileChange("added", themes / "dark.yaml")],
+    }
+
+
+def test_gitignored_file_watched_by_another_subscriber(collection_path: Path):
+    (collection_path / ".gitignore").write_text(".env\n*.local.env\n")
+    env_file = collection_path / ".env"
+    received: list[FileChange] = []
+    watcher = FileWatcher()
+    watcher.subscribe([env_file], received.extend)
+    watcher.subscribe([collection_path], lambda changes: None, recursive=True)
+
+    # The collection ignores the env file, but the env subscription names it.
+    assert watcher._watch_filter(None, str(env_file))
+    assert not watcher._watch_filter(None, str(collection_path / "dev.local.env"))
+    asyncio.run(watcher.dispatch([FileChange("modified", env_file)]))
+    assert received == [FileChange("modified", env_file)]
+
+
+def test_new_directories_watched(collection_path: Path):
+    received: list[FileChange] = []
+    watcher = FileWatcher(debounce=200)
+    watcher.subscribe([collection_path], received.extend, recursive=True)
+
+    async def run() -> None:
+        task = asyncio.create_task(watcher.run())
+        await asyncio.sleep(0.5)
+        (collection_path / "node_modules" / "ignored.posting.yaml").write_text("")
+        nested = collection_path / "posts" / "drafts"
+        nested.mkdir(parents=True)
+        (nested / "draft.posting.yaml").write_text("name: draft\n")
+        for _ in range(50):
+            await asyncio.sleep(0.1)
+            if watcher.metrics.restarts:
+                break
+        await asyncio.sleep(0.5)
+        (nested / "second.posting.yaml").write_text("name: second\n")
+        for _ in range(50):
+            await asyncio.sleep(0.1)
+            if any(change.path.name == "second.posting.yaml" for change in received):
+                break
+        task.cancel()
+
+    asyncio.run(run())
+    paths = {change.path for change in received}
+    assert collection_path / "posts" / "drafts" / "draft.posting.yaml" in paths
+    assert collection_path / "posts" / "drafts" / "second.posting.yaml" in paths
+    assert not any("node_modules" in path.parts for path in paths)
+    assert watcher.metrics.restarts >= 1
+    assert watcher.metrics.watched_paths == 5
@@ -0,0 +1,70 @@
+import pytest
+from textual.fuzzy import Matcher
+
+from posting.fuzzy import FuzzyIndex, character_bitsets, query_bitsets
+
+NAMES = [
+    "List users",
+    "Create user",
+    "Delete user",
+    "Get order",
+    "Update order status",
+    "Login",
+    "users/admin",
+]
+
+
+def build_index() -> FuzzyIndex[int]:
+    index: FuzzyIndex[int] = FuzzyIndex()
+    index.update(enumerate(NAMES))
+    return index
+
+
+def test_pairs_are_ordered():
+    _, pairs = character_bitsets("ab")
+    assert query_bitsets("ab")[1] & pairs
+    assert not query_bitsets("ba")[1] & pairs
+
+
+@pytest.mark.parametrize("query", ["u", "usr", "del", "ordst", "USERS", "r/a", "zz"])
+def test_candidates_include_every_match(query: str):
+    index = build_index()
+    matcher = Matcher(query)
+    expected = {key for key, name in enumerate(NAMES) if matcher.match(name) > 0}
+    assert expected <= set(index.candidates(query))
+
+
+def test_candidates_narrowed_as_query_extended():
+    index = build_index()
+    assert set(index.candidates("o")) == {3, 4, 5}
+    assert set(index.candidates("or")) == {3, 4}
+    assert set(index.candidates("ord")) == {3, 4}
+    assert set(index.candidates("l")) == {0, 2, 5}
+
+
+def test_best_prefers_word_starts_and_short_names():
+    index = build_index()
+    assert index.best("user", 1) == [0]
+    assert index.best("ord", 1) == [3]
+    assert index.best("ser", 1) == [0]
+
+
+def test_best_includes_recent():
+    index = build_index()
+    assert index.best("us", 1, include=[4, 5]) == [0, 4]
+
+
+def test_best_with_large_pool(monkeypatch):
+    monkeypatch.setattr("posting.fuzzy.LARGE_POOL_FACTOR", 1)
+    index = build_index()
+    assert index.best("u", 1) == [0]
+    assert index.best("ds", 3) == [2, 4]
+
+
+def test_removed_and_replaced():
+    index = build_index()
+    index.remove(6)
+    index.add(5, "Logout user")
+    assert 6 not in index
+    assert index.text(5) == "Logout user"
+    assert set(index.candidates("usr")) == {0, 1, 2, 5}
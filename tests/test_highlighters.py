@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+from rich.text import Text
+
+from posting.highlighters import (
+    HIGHLIGHT_CACHE_SIZE,
+    SEGMENT_CACHE_SIZE,
+    VariablesAndUrlHighlighter,
+    path_param_spans,
+    variable_spans,
+)
+from posting.variables import VARIABLES
+
+
+@pytest.fixture(autouse=True)
+def variables():
+    VARIABLES.set({"host": "example.com", "id": "1"})
+    yield
+    VARIABLES.set({})
+
+
+def make_highlighter(params: dict[str, str] | None = None):
+    highlighter = VariablesAndUrlHighlighter(
+        SimpleNamespace(cursor_position=0, value="")  # type: ignore[arg-type]
+    )
+    highlighter.set_path_params(params or {})
+    return highlighter
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://$host/users/:id",
+        "${host}/a$$b/$$$id/:user_id/::literal",
+        "$host:8080/x?q=$missing&r=${id}",
+        "/$/:/$",
+    ],
+)
+def test_spans_match_whole_text(url: str):
+    highlighter = make_highlighter({"id": "7", "user_id": ""})
+    expected = variable_spans(url) + path_param_spans(url, {"id"})
+    assert sorted(highlighter.spans(url)) == sorted(expected)
+
+
+def test_only_edited_segment_searched_again():
+    highlighter = make_highlighter()
+    highlighter.spans("$host/users/$id/orders")
+    misses = highlighter._segment_spans.misses
+    highlighter.spans("$host/users/$id/orders/$ord")
+    assert highlighter._segment_spans.misses == misses + 1
+
+    # A change to the variables invalidates the spans.
+    VARIABLES.update({"ord": "1"})
+    assert highlighter.spans("$host/users/$id/orders/$ord")[-1][2] is True
+
+
+def test_caches_bounded_while_typing():
+    highlighter = make_highlighter()
+    url = "https://$host/" + "/".join(f"segment{i}/$id" for i in range(150))
+    for end in range(1, len(url) + 1):
+        text = Text(url[:end])
+        highlighter.highlight(text)
+    assert len(highlighter._spans) <= HIGHLIGHT_CACHE_SIZE
+    assert len(highlighter._segment_spans) <= SEGMENT_CACHE_SIZE
+
+
+def test_spans_updated_for_edits():
+    highlighter = make_highlighter({"id": "7"})
+    url = "https://$host/users/:id/$id"
+    edits = [
+        url.replace("users", "accounts"),
+        url.replace("/:id", ""),
+        url + "/$new",
+        "$host" + url,
+        url.replace("$host", "$$host"),
+        url.replace("/", "", 1),
+        "",
+        url,
+    ]
+    highlighter.spans(url)
+    for edited in edits:
+        expected = sorted(
+            variable_spans(edited) + path_param_spans(edited, {"id"})
+        )
+        assert highlighter.spans(edited) == expected
@@ -0,0 +1,123 @@
+import asyncio
+import os
+
+import certifi
+import httpx
+
+from posting.config import CertificateSettings, HttpSettings
+from posting.http_client import (
+    ClientPool,
+    _cookie_jar,
+    get_ssl_context,
+    send_request,
+)
+
+CONTEXT = get_ssl_context(True, CertificateSettings())
+INSECURE_CONTEXT = get_ssl_context(False, CertificateSettings())
+
+
+def test_client_reused_for_same_configuration():
+    pool = ClientPool(HttpSettings())
+    first = pool.get_client(verify=CONTEXT, proxy=None, timeout=5.0)
+    second = pool.get_client(verify=CONTEXT, proxy="", timeout=5.0)
+    assert first is second
+    assert len(pool) == 1
+
+
+def test_distinct_clients_for_distinct_configuration():
+    pool = ClientPool(HttpSettings())
+    first = pool.get_client(verify=CONTEXT, proxy=None, timeout=5.0)
+    second = pool.get_client(verify=INSECURE_CONTEXT, proxy=None, timeout=5.0)
+    third = pool.get_client(verify=CONTEXT, proxy=None, timeout=10.0)
+    fourth = pool.get_client(verify=CONTEXT, proxy=None, timeout=5.0, http2=True)
+    assert len({id(first), id(second), id(third), id(fourth)}) == 4
+
+
+def test_pooled_client_never_stores_cookies():
+    pool = ClientPool(HttpSettings())
+    client = pool.get_client(verify=CONTEXT, proxy=None, timeout=5.0)
+    request = httpx.Request("GET", "https://example.com/")
+    response = httpx.Response(
+        200, headers={"Set-Cookie": "session=abc; Path=/"}, request=request
+    )
+    client.cookies.extract_cookies(response)
+    assert len(client.cookies) == 0
+
+
+def test_send_request_carries_cookies_across_redirects():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/login":
+            return httpx.Response(
+                302,
+                headers={"Location": "/home", "Set-Cookie": "session=abc; Path=/"},
+            )
+        return httpx.Response(200, text=request.headers.get("Cookie", ""))
+
+    async def run(follow_redirects: bool) -> httpx.Response:
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), cookies=_cookie_jar()
+        ) as client:
+            request = client.build_request("GET", "https://example.com/login")
+            response = await send_request(
+                client, request, auth=None, follow_redirects=follow_redirects
+            )
+            await response.aread()
+            assert len(client.cookies) == 0
+            return response
+
+    response = asyncio.run(run(follow_redirects=True))
+    assert response.text == "session=abc"
+    assert [r.status_code for r in response.history] == [302]
+
+    response = asyncio.run(run(follow_redirects=False))
+    assert response.status_code == 302
+    assert response.history == []
+
+
+def test_send_request_does_not_leak_cookies_between_sends():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/login":
+            return httpx.Response(200, headers={"Set-Cookie": "session=abc"})
+        return httpx.Response(200, text=request.headers.get("Cookie", ""))
+
+    async def run() -> str:
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), cookies=_cookie_jar()
+        ) as client:
+            for path in ("/login", "/home"):
+                request = client.build_request("GET", f"https://example.com{path}")
+                response = await send_request(
+                    client, request, auth=None, follow_redirects=True
+                )
+                await response.aread()
+            return response.text
+
+    assert asyncio.run(run()) == ""
+
+
+def test_closed_pool_creates_new_clients():
+    pool = ClientPool(HttpSettings())
+    client = pool.get_client(verify=CONTEXT, proxy=None, timeout=5.0)
+    asyncio.run(pool.aclose())
+    assert client.is_closed
+    assert len(pool) == 0
+    assert pool.get_client(verify=CONTEXT, proxy=None, timeout=5.0) is not client
+
+
+def test_ssl_context_cached():
+    assert get_ssl_context(True, CertificateSettings()) is CONTEXT
+    assert get_ssl_context(False, CertificateSettings()) is INSECURE_CONTEXT
+    assert CONTEXT is not INSECURE_CONTEXT
+
+
+def test_ssl_context_rebuilt_when_ca_bundle_changes(tmp_path):
+    ca_bundle = tmp_path / "ca.pem"
+    ca_bundle.write_text(open(certifi.where()).read())
+    settings = CertificateSettings(ca_bundle=str(ca_bundle))
+    first = get_ssl_context(True, settings)
+    assert get_ssl_context(True, settings) is first
+
+    os.utime(ca_bundle, (0, 0))
+    assert get_ssl_context(True, settings) is not first
+    # The CA bundle is irrelevant when verification is disabled.
+    assert get_ssl_context(False, settings) is INSECURE_CONTEXT
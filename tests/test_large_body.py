@@ -0,0 +1,63 @@
+import pytest
+
+from posting.widgets.response import large_body
+from posting.widgets.response.large_body import LineIndex
+
+BODY = "first\r\nsecond line\n\nünïcode here\nlast".encode("utf-8")
+
+
+def test_lines_indexed():
+    index = LineIndex(BODY)
+    assert index.line_count == 5
+    assert [index.get_line(row) for row in range(5)] == [
+        "first",
+        "second line",
+        "",
+        "ünïcode here",
+        "last",
+    ]
+    assert index.max_line_length == len("ünïcode here\n".encode("utf-8"))
+
+
+def test_trailing_newline_gives_empty_last_line():
+    index = LineIndex(b"one\ntwo\n")
+    assert index.line_count == 3
+    assert index.get_line(2) == ""
+    assert index.end == (2, 0)
+
+
+def test_index_spans_block_boundaries(monkeypatch):
+    monkeypatch.setattr(large_body, "INDEX_BLOCK_SIZE", 4)
+    lines = [b"a", b"longer line", b"", b"bc", b"d" * 9]
+    index = LineIndex(b"\n".join(lines))
+    assert [index.get_line(row) for row in range(index.line_count)] == [
+        line.decode() for line in lines
+    ]
+
+
+def test_location_offset_round_trip_with_multibyte_characters():
+    index = LineIndex(BODY)
+    offset = index.location_to_offset((3, 3))
+    assert BODY[offset:].startswith("code".encode("utf-8"))
+    assert index.offset_to_location(offset) == (3, 3)
+
+
+def test_get_text_range():
+    index = LineIndex(BODY)
+    assert index.get_text_range((1, 7), (3, 2)) == "line\n\nün"
+    # Selecting past the end of a line includes the line ending.
+    assert index.get_text_range((0, 0), (0, 6)) == "first\r\n"
+
+
+def test_find_wraps_around():
+    index = LineIndex(b"match\nother\nmatch")
+    assert index.find("match", (0, 0)) == (2, 0)
+    assert index.find("match", (2, 0)) == (0, 0)
+    assert index.find("match", (2, 0), backwards=True) == (0, 0)
+    assert index.find("match", (0, 0), backwards=True) == (2, 0)
+    assert index.find("missing", (0, 0)) is None
+
+
+def test_encodings_without_single_byte_newlines_rejected():
+    with pytest.raises(ValueError):
+        LineIndex("text".encode("utf-16"), "utf-16")
@@ -189,7 +189,7 @@ def test_load_env_file_updates_app_state_and_variables(tmp_path) -> None:
     env_file.write_text("FROM_FILE=1\n", encoding="utf-8")
 
     notifications: list[tuple[str, str | None]] = []
-    published: list[None] = []
+    published: list[frozenset[str]] = []
     app = SimpleNamespace(
         environment_files=(),
         settings=SimpleNamespace(use_host_environment=False),
@@ -202,12 +202,32 @@ def test_load_env_file_updates_app_state_and_variables(tmp_path) -> None:
 
     assert loaded is True
     assert app.environment_files == (env_file.resolve(),)
-    assert published == [None]
+    assert len(published) == 1
+    assert "FROM_FILE" in published[0]
     assert notifications == [(f"Loaded environment from: {env_file.resolve()}", None)]
     assert get_variables()["FROM_FILE"] == "1"
     assert get_variables()["FROM_SESSION"] == "2"
 
 
+def test_load_env_file_publishes_nothing_if_unchanged(tmp_path) -> None:
+    env_file = tmp_path / "loaded.env"
+    env_file.write_text("LOADED_TWICE=1\n", encoding="utf-8")
+
+    published: list[frozenset[str]] = []
+    app = SimpleNamespace(
+        environment_files=(),
+        settings=SimpleNamespace(use_host_environment=False),
+        session_env={},
+        env_changed_signal=SimpleNamespace(publish=published.append),
+        notify=lambda message, severity=None: None,
+    )
+
+    assert load_env_file(app, "loaded.env", working_directory=tmp_path)
+    assert load_env_file(app, "loaded.env", working_directory=tmp_path)
+    assert len(published) == 1
+    assert "LOADED_TWICE" in published[0]
+
+
 def test_make_posting_reloads_env_variables_even_when_cache_is_populated(tmp_path) -> None:
     other_env = tmp_path / "other.env"
     other_env.write_text("OTHER=1\n", encoding="utf-8")
@@ -0,0 +1,42 @@
+import httpx
+
+from posting.response_buffer import response_text
+from posting.widgets.response.response_area import prettify_json
+
+
+def test_prettify_json():
+    assert prettify_json('{"a": [1, 2], "b": {}}') == (
+        '{\n  "a": [\n    1,\n    2\n  ],\n  "b": {}\n}'
+    )
+
+
+def test_prettify_json_non_ascii():
+    assert prettify_json('{"name": "café"}') == '{\n  "name": "café"\n}'
+
+
+def test_prettify_json_declared_charset():
+    response = httpx.Response(
+        200,
+        content='{"name": "café"}'.encode("latin-1"),
+        headers={"Content-Type": "application/json; charset=latin-1"},
+    )
+    assert prettify_json(response_text(response)) == '{\n  "name": "café"\n}'
+
+
+def test_prettify_json_large_integer():
+    # Larger than orjson supports, so the standard library must be used.
+    assert prettify_json("[123456789012345678901234567890]") == (
+        "[\n  123456789012345678901234567890\n]"
+    )
+
+
+def test_prettify_json_non_finite_floats():
+    # orjson would write these as null.
+    assert prettify_json("[NaN, Infinity, -Infinity, 1.5]") == (
+        "[\n  NaN,\n  Infinity,\n  -Infinity,\n  1.5\n]"
+    )
+
+
+def test_prettify_json_invalid():
+    assert prettify_json("not json") is None
+    assert prettify_json("\ufffd\ufffd{") is None
@@ -0,0 +1,117 @@
+import asyncio
+import datetime
+import gc
+import gzip
+import mmap
+import os
+
+import httpx
+
+from posting.response_buffer import (
+    ResponseBodyBuffer,
+    buffered_response,
+    read_response,
+    response_body,
+    response_text,
+    spill_path,
+)
+
+
+def test_small_body_kept_in_memory():
+    body = ResponseBodyBuffer(spill_threshold=10)
+    body.write(b"hello")
+    body.write(b"world")
+    assert not body.spilled
+    assert body.getvalue() == b"helloworld"
+
+
+def test_no_threshold_never_spills():
+    body = ResponseBodyBuffer(spill_threshold=None)
+    body.write(b"x" * 100_000)
+    assert not body.spilled
+    assert spill_path(body.getvalue()) is None
+
+
+def test_large_body_spilled_and_mapped():
+    body = ResponseBodyBuffer(spill_threshold=4)
+    for chunk in (b"abc", b"def", b"ghi"):
+        body.write(chunk)
+    assert body.spilled
+    assert body.size == 9
+
+    content = body.getvalue()
+    assert isinstance(content, mmap.mmap)
+    assert content[:] == b"abcdefghi"
+    path = spill_path(content)
+    assert path is not None and os.path.exists(path)
+
+    # The file is removed once nothing refers to the mapping.
+    del content
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_close_removes_spilled_file():
+    body = ResponseBodyBuffer(spill_threshold=0)
+    body.write(b"abc")
+    path = body._file.name
+    body.close()
+    assert not os.path.exists(path)
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def make_response(*chunks: bytes, **kwargs) -> httpx.Response:
+    request = httpx.Request("GET", "https://example.com/")
+    response = httpx.Response(200, content=stream(*chunks), request=request, **kwargs)
+    # Set by the client once the response has been received.
+    response.elapsed = datetime.timedelta(milliseconds=5)
+    return response
+
+
+def test_spilled_response_read_through_mapping():
+    response = make_response(b'{"name": ', b'"posting"}')
+    asyncio.run(read_response(response, spill_threshold=4))
+
+    # Posting reads the body through the mapping...
+    body = response_body(response)
+    assert isinstance(body, mmap.mmap)
+    assert spill_path(body) is not None
+    assert response_text(response) == '{"name": "posting"}'
+
+    # ...but scripts see the usual httpx response.
+    buffered = buffered_response(response)
+    assert type(buffered) is httpx.Response
+    assert buffered.content == b'{"name": "posting"}'
+    assert buffered.json() == {"name": "posting"}
+    assert buffered.request is response.request
+    assert buffered.elapsed == response.elapsed
+
+
+def test_small_response_kept_in_memory():
+    response = make_response(b"hello")
+    asyncio.run(read_response(response, spill_threshold=1024))
+    assert response_body(response) == b"hello"
+    assert buffered_response(response).content == b"hello"
+
+
+def test_buffered_response_keeps_headers_and_encoding():
+    body = "caf\u00e9".encode("latin-1")
+    response = make_response(
+        gzip.compress(body),
+        headers={
+            "Content-Type": "text/plain; charset=latin-1",
+            "Content-Encoding": "gzip",
+        },
+    )
+    asyncio.run(read_response(response, spill_threshold=None))
+    assert response_body(response) == body
+    assert response_text(response) == "caf\u00e9"
+
+    buffered = buffered_response(response)
+    assert buffered.headers["Content-Encoding"] == "gzip"
+    assert buffered.content == body
+    assert buffered.text == "caf\u00e9"
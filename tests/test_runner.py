@@ -0,0 +1,158 @@
+import asyncio
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from posting.__main__ import glob_root, is_bare_pattern
+from posting.collection import Collection
+from posting.config import SETTINGS, Settings
+from posting.runner import CollectionRunner, RequestTimings, iter_requests
+from posting.variables import VARIABLES
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = json.dumps({"token": self.headers.get("X-Token")}).encode()
+        self.send_response(200 if self.path == "/ok" else 404)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def collection_path(tmp_path: Path, server_url: str) -> Path:
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "scripts" / "hooks.py").write_text(
+        "def setup(posting):\n"
+        "    posting.set_variable('token', 'abc123')\n"
+        "\n"
+        "def on_response(response, posting):\n"
+        "    posting.set_variable('echoed', response.json()['token'])\n"
+    )
+    (tmp_path / "users").mkdir()
+    (tmp_path / "users" / "ok.posting.yaml").write_text(
+        "name: ok\n"
+        f"url: {server_url}/ok\n"
+        "headers:\n"
+        "- name: X-Token\n"
+        "  value: ${token}\n"
+        "scripts:\n"
+        "  setup: scripts/hooks.py\n"
+        "  on_response: scripts/hooks.py\n"
+    )
+    (tmp_path / "missing.posting.yaml").write_text(
+        f"name: missing\nurl: {server_url}/missing\n"
+    )
+    return tmp_path
+
+
+def test_run_writes_a_json_line_per_request(collection_path: Path):
+    SETTINGS.set(Settings())
+    VARIABLES.set({})
+    requests = list(iter_requests(Collection.from_directory(str(collection_path))))
+    output = io.StringIO()
+    runner = CollectionRunner(
+        collection_path, concurrency=2, output=output, error_stream=io.StringIO()
+    )
+
+    results = asyncio.run(runner.run(requests))
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(line["name"] for line in lines) == ["missing", "ok"]
+    by_name = {result.name: result for result in results}
+    assert by_name["missing"].status == 404
+    assert by_name["missing"].scripts["setup"] == "no-script"
+
+    ok = by_name["ok"]
+    assert ok.ok and ok.status == 200
+    assert ok.size == len(b'{"token": "abc123"}')
+    assert ok.scripts == {
+        "setup": "success",
+        "on_request": "no-script",
+        "on_response": "success",
+    }
+    assert "receive_response_headers" in ok.timings
+    assert runner.host.session_env["echoed"] == "abc123"
+
+
+def test_connection_errors_reported(tmp_path: Path):
+    SETTINGS.set(Settings())
+    (tmp_path / "refused.posting.yaml").write_text(
+        "name: refused\nurl: http://127.0.0.1:1/\n"
+    )
+    requests = list(iter_requests(Collection.from_directory(str(tmp_path))))
+    output = io.StringIO()
+    runner = CollectionRunner(tmp_path, output=output)
+
+    [result] = asyncio.run(runner.run(requests))
+
+    assert not result.ok
+    assert result.status is None
+    assert result.error is not None and result.error.startswith("ConnectError")
+    assert json.loads(output.getvalue())["error"] == result.error
+
+
+def test_request_timings_from_trace_events():
+    timings = RequestTimings()
+
+    async def trace() -> None:
+        await timings.trace("connection.connect_tcp.started", {})
+        await timings.trace("connection.connect_tcp.complete", {})
+        await timings.trace("http11.receive_response_headers.started", {})
+        await timings.trace("http11.receive_response_headers.failed", {})
+
+    asyncio.run(trace())
+    assert set(timings.durations) == {"connect_tcp", "receive_response_headers"}
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("requests/get.posting.yaml", Path("requests")),
+        ("api/*/get.posting.yaml", Path("api")),
+        ("api/**/*.posting.yaml", Path("api")),
+        ("*.posting.yaml", Path()),
+    ],
+)
+def test_glob_root(pattern: str, expected: Path):
+    assert glob_root(pattern) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("*.posting.yaml", True),
+        ("get.posting.yaml", True),
+        ("**.posting.yaml", False),
+        ("api/*.posting.yaml", False),
+    ],
+)
+def test_is_bare_pattern(pattern: str, expected: bool):
+    assert is_bare_pattern(pattern) is expected
+
+
+def test_non_recursive_collection_only_reads_top_level(tmp_path: Path):
+    (tmp_path / "top.posting.yaml").write_text("name: top\nurl: https://example.com\n")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "deep.posting.yaml").write_text(
+        "name: deep\nurl: https://example.com\n"
+    )
+    collection = Collection.from_directory(str(tmp_path), recursive=False)
+    assert [request.name for request in iter_requests(collection)] == ["top"]
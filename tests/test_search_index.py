@@ -0,0 +1,125 @@
+from pathlib import Path
+
+from posting.collection import Header, RequestBody, RequestModel
+from posting.search_index import RecentRequests, RequestSearchIndex, tokenize
+
+
+def request_data(name: str, **fields: object) -> dict[str, object]:
+    return {"name": name, "url": "https://example.com/", **fields}
+
+
+def build_index() -> RequestSearchIndex:
+    index = RequestSearchIndex()
+    index.add(Path("users.posting.yaml"), request_data("List users"))
+    index.add(
+        Path("create.posting.yaml"),
+        request_data(
+            "Create item",
+            method="POST",
+            body={"content": '{"owner": "users/1"}'},
+            headers=[{"name": "X-Tenant", "value": "acme"}],
+        ),
+    )
+    index.add(
+        Path("orders.posting.yaml"),
+        request_data("Orders", url="https://shop.test/orders", description="Paged"),
+    )
+    return index
+
+
+def test_tokenize():
+    assert tokenize("GET https://api.test/users_v2?id=1") == [
+        "get",
+        "https",
+        "api",
+        "test",
+        "users",
+        "v2",
+        "id",
+        "1",
+    ]
+
+
+def test_matches_in_name_rank_above_body():
+    results = build_index().search("users")
+    assert [result.path.name for result in results] == [
+        "users.posting.yaml",
+        "create.posting.yaml",
+    ]
+    assert results[0].score > results[1].score
+    assert all(0 < result.score <= 1 for result in results)
+
+
+def test_every_word_must_match():
+    index = build_index()
+    assert [result.name for result in index.search("post acme")] == ["Create item"]
+    assert index.search("post orders") == []
+
+
+def test_last_word_matches_as_prefix():
+    index = build_index()
+    assert [result.name for result in index.search("ord")] == ["Orders"]
+    assert [result.name for result in index.search("shop pag")] == ["Orders"]
+    assert index.search("ord shop") == []
+
+
+def test_requests_replaced_and_removed():
+    index = build_index()
+    path = Path("orders.posting.yaml")
+    index.add_request(
+        RequestModel(
+            name="Invoices",
+            path=path,
+            headers=[Header(name="Accept", value="text/csv")],
+            body=RequestBody(content="{}"),
+        )
+    )
+    assert len(index) == 3
+    assert index.search("orders") == []
+    assert [result.name for result in index.search("csv")] == ["Invoices"]
+
+    index.remove(path)
+    assert path not in index
+    assert index.search("invoices") == []
+    assert "invoices" not in index._vocabulary
+
+
+def test_recently_opened_requests_rank_first():
+    index = build_index()
+    index.add(Path("user.posting.yaml"), request_data("Get user"))
+    assert [path.name for path, _ in index.name_candidates("user", limit=1)] == [
+        "user.posting.yaml"
+    ]
+
+    create = Path("create.posting.yaml")
+    before = {result.path: result.score for result in index.search("users")}
+    index.recent.record(create)
+    after = {result.path: result.score for result in index.search("users")}
+    assert after[create] > before[create]
+    assert after[Path("users.posting.yaml")] == before[Path("users.posting.yaml")]
+    assert index.name_candidates("item", limit=1) == [(create, "Create item")]
+
+    # Recent requests which could match are included, even if there are better ones.
+    users = Path("users.posting.yaml")
+    index.recent.record(users)
+    assert index.name_candidates("user", limit=1) == [
+        (Path("user.posting.yaml"), "Get user"),
+        (users, "List users"),
+    ]
+
+
+def test_recent_opens_count_for_more():
+    recent = RecentRequests()
+    first, second = Path("first.posting.yaml"), Path("second.posting.yaml")
+    for _ in range(3):
+        recent.record(first)
+    assert recent.most_recent() == [first]
+    for _ in range(4):
+        recent.record(second)
+    assert recent.most_recent() == [second, first]
+    assert recent.boost(second) == 1.0
+    assert 0 < recent.boost(first) < 1
+
+    recent.remove(second)
+    assert recent.most_recent() == [first]
+    assert recent.boost(first) == 1.0
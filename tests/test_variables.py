@@ -1,5 +1,20 @@
+from pathlib import Path
+from string import Template
+
 import pytest
-from posting.variables import find_variables, variable_range_at_cursor
+from posting import variables as variables_module
+from posting.variables import (
+    VARIABLES,
+    EnvironmentProfiles,
+    SharedVariables,
+    compile_template,
+    find_variables,
+    load_variables,
+    reload_environment_files,
+    substitute_variables,
+    use_environment_layer,
+    variable_range_at_cursor,
+)
 
 
 @pytest.mark.parametrize(
@@ -73,3 +88,164 @@ def test_variable_range_at_cursor(
     text: str, cursor: int, expected: tuple[int, int] | None
 ):
     assert variable_range_at_cursor(cursor, text) == expected
+
+
+def test_layers_override_in_order():
+    variables = SharedVariables()
+    variables.set_layer("environment", {"HOST": "file", "TOKEN": "file"})
+    variables.set_layer("session", {"TOKEN": "session"})
+    variables.set_layer("host", {"HOST": "host", "TOKEN": "host"})
+    assert dict(variables.get()) == {"HOST": "host", "TOKEN": "session"}
+
+    # Removing a variable from a layer reveals the one beneath it.
+    assert variables.set_layer("session", {}) == {"TOKEN"}
+    assert variables.get()["TOKEN"] == "host"
+
+
+def test_reads_are_read_only_snapshots():
+    variables = SharedVariables()
+    variables.set_layer("environment", {"A": "1"})
+    snapshot = variables.get()
+    assert variables.get() is snapshot
+    with pytest.raises(TypeError):
+        snapshot["A"] = "2"  # type: ignore[index]
+
+    variables.update({"A": "2"})
+    assert snapshot["A"] == "1"
+    assert variables.get()["A"] == "2"
+
+
+def test_generation_only_bumped_by_changes():
+    variables = SharedVariables()
+    variables.set_layer("environment", {"A": "1", "B": "2"})
+    generation = variables.generation
+    environment_generation = variables.layer_generation("environment")
+
+    assert variables.set_layer("environment", {"A": "1", "B": "2"}) == set()
+    assert variables.generation == generation
+
+    # A change which is hidden by a higher layer still bumps its own layer,
+    # but doesn't change the merged variables.
+    variables.update({"A": "session"})
+    merged = variables.get()
+    assert variables.set_layer("environment", {"A": "3", "B": "2"}) == set()
+    assert variables.get() is merged
+    assert variables.generation > generation
+    assert variables.layer_generation("environment") > environment_generation
+    assert variables.layer_generation("host") == 0
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "no variables",
+        "$host/users/${id}",
+        "$$escaped and $$$host",
+        "${id}${id}",
+        "costs $5",
+        "trailing $",
+        "$missing",
+    ],
+)
+def test_compiled_templates_match_string_template(text: str):
+    variables = {"host": "https://example.com", "id": 7}
+
+    def outcome(substitute):
+        try:
+            return substitute()
+        except (KeyError, ValueError) as error:
+            return type(error), str(error)
+
+    assert outcome(lambda: substitute_variables(text, variables)) == outcome(
+        lambda: Template(text).substitute(variables)
+    )
+
+
+def test_templates_compiled_once():
+    template = compile_template("$scheme://${host}/$$path")
+    assert compile_template("$scheme://${host}/$$path") is template
+    assert template.literals == ("", "://", "/$path")
+    assert template.variables == {"scheme", "host"}
+
+
+def test_large_templates_not_cached():
+    text = "$name " + "x" * variables_module.TEMPLATE_CACHE_MAX_LENGTH
+    template = compile_template(text)
+    assert compile_template(text) is not template
+    assert substitute_variables(text, {"name": "a"}) == "a " + text[6:]
+
+
+def test_only_changed_environment_files_parsed_again(tmp_path: Path, monkeypatch):
+    files = tuple(tmp_path / f"{index}.env" for index in range(3))
+    for index, file in enumerate(files):
+        file.write_text(f"SHARED={index}\nVALUE_{index}=a\n")
+
+    parsed: list[Path] = []
+    dotenv_values = variables_module.dotenv_values
+
+    def counting_dotenv_values(path):
+        parsed.append(Path(path))
+        return dotenv_values(path)
+
+    monkeypatch.setattr(variables_module, "dotenv_values", counting_dotenv_values)
+    VARIABLES.set({})
+    load_variables(files, use_host_environment=False, avoid_cache=True)
+    assert len(parsed) == 3
+    assert VARIABLES.get()["SHARED"] == "2"
+
+    parsed.clear()
+    files[1].write_text("SHARED=1\nVALUE_1=b\n")
+    assert reload_environment_files(files, [files[1]]) == {"VALUE_1"}
+    assert parsed == [files[1]]
+
+    # Unchanged files aren't parsed again when everything is reloaded, either.
+    parsed.clear()
+    load_variables(files, use_host_environment=False, avoid_cache=True)
+    assert parsed == []
+    VARIABLES.set({})
+
+
+def test_switching_environments_does_not_read_files(tmp_path: Path, monkeypatch):
+    base = tmp_path / "base.env"
+    base.write_text("HOST=localhost\nTOKEN=abc\n")
+    staging = tmp_path / "staging.env"
+    staging.write_text("HOST=staging.example.com\n")
+
+    profiles = EnvironmentProfiles()
+    profiles.add("local", [base])
+    profiles.add("staging", [base, staging], {"TOKEN": "xyz"})
+    assert profiles.names == ["local", "staging"]
+    assert profiles.all_files() == {base, staging}
+
+    def failing_dotenv_values(path):
+        raise AssertionError(f"{path} was read while switching")
+
+    monkeypatch.setattr(variables_module, "dotenv_values", failing_dotenv_values)
+    VARIABLES.set({})
+    VARIABLES.set_layer("session", {"SESSION": "1"})
+    assert use_environment_layer(profiles.layer("staging")) == {"HOST", "TOKEN"}
+    assert VARIABLES.get()["HOST"] == "staging.example.com"
+    assert VARIABLES.get()["TOKEN"] == "xyz"
+
+    assert use_environment_layer(profiles.layer("local")) == {"HOST", "TOKEN"}
+    assert use_environment_layer(profiles.layer("local")) == set()
+    assert VARIABLES.get() == {"HOST": "localhost", "TOKEN": "abc", "SESSION": "1"}
+    VARIABLES.set({})
+
+
+def test_environments_read_again_when_their_files_change(tmp_path: Path):
+    base = tmp_path / "base.env"
+    base.write_text("HOST=localhost\n")
+    staging = tmp_path / "staging.env"
+    staging.write_text("HOST=staging.example.com\n")
+
+    profiles = EnvironmentProfiles()
+    profiles.add("local", [base])
+    profiles.add("staging", [staging])
+    local = profiles.layer("local")
+
+    staging.write_text("HOST=staging.example.org\n")
+    assert profiles.reload([staging]) == {"staging"}
+    assert profiles.layer("local") is local
+    assert profiles.layer("staging")["HOST"] == "staging.example.org"